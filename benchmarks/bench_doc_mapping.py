@@ -0,0 +1,81 @@
+"""
+Compara o mapeamento código-fonte -> documentação anterior (varredura de SOURCE_EXTENSIONS,
+substituição de "src" no caminho inteiro e 'os.path.isfile' por candidato) com o índice de
+'doc_mapping.DocMapper', em uma árvore sintética.
+
+Uso:
+    python benchmarks/bench_doc_mapping.py [--files 100000] [--lookups 100000]
+
+O resultado é impresso em JSON.
+"""
+# Standard libraries
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from doc_mapping import DocMapper, DEFAULT_RULES, SOURCE_EXTENSIONS
+
+def legacy_get_doc_path(repo_path, src_file):
+    # Implementação anterior de UpdateDocs.get_doc_path
+    if any(src_file.endswith(ext) for ext in SOURCE_EXTENSIONS) and "src" in src_file:
+        for ext in SOURCE_EXTENSIONS:
+            if src_file.endswith(ext):
+                doc_file_name = src_file.replace(ext, ".md").replace("src", "docs")
+                break
+        doc_path = (f'{repo_path}/{doc_file_name}')
+        if os.path.isfile(doc_path):
+            return doc_path
+        return None
+    return None
+
+def build_listing(files):
+    """
+    Gera uma listagem com metade de arquivos de código-fonte em src/ e metade de documentos em docs/.
+    """
+    extensions = [".py", ".js", ".go", ".java"]
+    sources = [f"src/package_{i % 100}/module_{i}{extensions[i % len(extensions)]}" for i in range(files // 2)]
+    docs = [f"docs/package_{i % 100}/module_{i}.md" for i in range(files // 2)]
+    return sources, docs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=100000)
+    args = parser.parse_args()
+
+    sources, docs = build_listing(args.files)
+    queries = [sources[i % len(sources)] for i in range(args.lookups)]
+
+    start = time.perf_counter()
+    mapper = DocMapper(DEFAULT_RULES, sources + docs)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mapped = sum(1 for query in queries if mapper.lookup(query))
+    lookup_time = time.perf_counter() - start
+
+    # O mapeamento anterior consulta o sistema de arquivos; os arquivos não precisam existir para medir o custo
+    with tempfile.TemporaryDirectory() as repo_path:
+        start = time.perf_counter()
+        for query in queries:
+            legacy_get_doc_path(repo_path, query)
+        legacy_time = time.perf_counter() - start
+
+    print(json.dumps({
+        "files": len(sources) + len(docs),
+        "lookups": len(queries),
+        "mapped": mapped,
+        "index_build_seconds": round(build_time, 4),
+        "index_lookup_seconds": round(lookup_time, 4),
+        "index_lookup_us": round(lookup_time / len(queries) * 1e6, 3),
+        "legacy_lookup_seconds": round(legacy_time, 4),
+        "legacy_lookup_us": round(legacy_time / len(queries) * 1e6, 3)
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
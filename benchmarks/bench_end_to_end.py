@@ -0,0 +1,250 @@
+"""
+Benchmark de ponta a ponta do UpdateDocs, executado sem rede.
+
+Cria um repositório sintético (quantidade de arquivos, tamanho dos documentos, tamanho do diff
+e quantidade de commits configuráveis) e executa 'UpdateDocs.main' para cada commit com o provedor
+local determinístico ('UPDATEDOCS_PROVIDER=fake') e um revisor automático que aprova cada proposta.
+
+Uso:
+    python benchmarks/bench_end_to_end.py [--files 50] [--doc-lines 200] [--diff-lines 20] [--commits 3]
+                                          [--latency 0.05] [--output resultado.json] [--compare base.json]
+
+O resultado (tempo total e por etapa, processos criados e pico de memória) é impresso em JSON.
+Com '--compare', as métricas são comparadas com as de uma execução anterior salva com '--output'.
+"""
+# Standard libraries
+import argparse
+import contextlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+# Funções do UpdateDocs medidas individualmente (o tempo de etapas paralelas é somado entre as threads)
+STAGES = [
+    "get_revision_patches", "get_edited_files", "get_doc_mapper", "verify_valid_files", "verify_symbol_docs",
+    "get_file_diff", "generate_proposal", "generate_batch_proposals",
+    "write_approved", "manipulate_file", "save_last_documented"
+]
+
+def git(repo_path, *args):
+    return subprocess.run(["git", *args], cwd=repo_path, check=True, capture_output=True, text=True).stdout
+
+def write(path, content, mode="w"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, mode, encoding="utf-8") as f:
+        f.write(content)
+
+def build_repo(path, files, doc_lines, diff_lines, commits):
+    """
+    Cria um repositório com 'files' arquivos em src/ e os documentos correspondentes em docs/,
+    seguidos de 'commits' commits que acrescentam uma função de 'diff_lines' linhas a cada arquivo.
+    O README cita algumas das funções adicionadas, exercitando o índice de símbolos.
+
+    Retorna:
+        list: Hashes dos commits com alterações, em ordem.
+    """
+    git(path, "init", "-q")
+    git(path, "config", "user.email", "bench@example.com")
+    git(path, "config", "user.name", "bench")
+    for i in range(files):
+        module = f"pkg_{i % 10}/module_{i}"
+        write(os.path.join(path, "src", f"{module}.py"),
+              "".join(f"def function_{i}_{j}():\n    return {j}\n\n" for j in range(40)))
+        doc = [f"# Module {i}", ""]
+        while len(doc) < doc_lines:
+            j = len(doc)
+            doc += [f"## function_{i}_{j}", "", f"Retorna o valor {j}.", ""]
+        write(os.path.join(path, "docs", f"{module}.md"), "\n".join(doc[:doc_lines]) + "\n")
+    write(os.path.join(path, "README.md"),
+          "# Projeto\n\n## Funções\n\n" + "".join(f"- `feature_1_{i}()`\n" for i in range(min(files, 3))))
+    git(path, "add", ".")
+    git(path, "commit", "-qm", "base")
+
+    hashes = []
+    for c in range(1, commits + 1):
+        for i in range(files):
+            body = "".join(f"    value_{k} = {k}\n" for k in range(max(0, diff_lines - 2)))
+            write(os.path.join(path, "src", f"pkg_{i % 10}/module_{i}.py"),
+                  f"def feature_{c}_{i}():\n{body}    return {c}\n", mode="a")
+        git(path, "commit", "-qam", f"change {c}")
+        hashes.append(git(path, "rev-parse", "HEAD").strip())
+    return hashes
+
+class Recorder:
+    """
+    Acumula o tempo e a quantidade de chamadas de cada etapa.
+    """
+    def __init__(self):
+        self.stages = {}
+        self.lock = threading.Lock()
+
+    def wrap(self, name, function):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self.lock:
+                    stage = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0})
+                    stage["calls"] += 1
+                    stage["seconds"] += elapsed
+        return wrapper
+
+def count_subprocesses(counter):
+    # Conta os processos criados (Git, Node) substituindo 'subprocess.Popen', usado também por 'subprocess.run'
+    original = subprocess.Popen
+
+    class CountingPopen(original):
+        def __init__(self, *args, **kwargs):
+            with counter["lock"]:
+                counter["count"] += 1
+            super().__init__(*args, **kwargs)
+
+    subprocess.Popen = CountingPopen
+
+def start_auto_approver(review_queue, results):
+    """
+    Revisor automático: aprova cada proposta assim que sua geração termina (as alterações são aplicadas pelo servidor).
+    """
+    ready = threading.Event()
+    publish = review_queue.publish
+
+    def notify(event, payload):
+        if event in ("item_ready", "item_added"):
+            ready.set()
+        publish(event, payload)
+
+    review_queue.publish = notify
+
+    def approve():
+        while True:
+            ready.wait()
+            ready.clear()
+            for item in review_queue.pending():
+                if item["status"] != "pending":
+                    continue
+                try:
+                    review_queue.decide(item["id"], True)
+                    results["approved"] += 1
+                except (KeyError, ValueError):
+                    pass
+
+    threading.Thread(target=approve, daemon=True).start()
+
+def peak_rss_mib(who):
+    # ru_maxrss é informado em KiB no Linux e em bytes no macOS
+    usage = resource.getrusage(who).ru_maxrss
+    return round(usage / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def compare(baseline, current):
+    """
+    Compara as métricas numéricas de duas execuções, retornando a variação percentual de cada uma.
+    """
+    metrics = {"wall_seconds": (baseline["wall_seconds"], current["wall_seconds"]),
+               "subprocesses": (baseline["subprocesses"], current["subprocesses"]),
+               "peak_rss_mib": (baseline["peak_rss_mib"], current["peak_rss_mib"])}
+    for name, stage in current["stages"].items():
+        base_stage = baseline["stages"].get(name)
+        if base_stage:
+            metrics[f"stages.{name}.seconds"] = (base_stage["seconds"], stage["seconds"])
+    return {
+        name: {"baseline": base, "current": value,
+               "change_pct": round((value - base) / base * 100, 1) if base else None}
+        for name, (base, value) in metrics.items()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=50)
+    parser.add_argument("--doc-lines", type=int, default=200)
+    parser.add_argument("--diff-lines", type=int, default=20)
+    parser.add_argument("--commits", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05, help="Latência simulada de cada requisição (segundos)")
+    parser.add_argument("--output", help="Arquivo onde o resultado em JSON é salvo")
+    parser.add_argument("--compare", help="Resultado de uma execução anterior para comparação")
+    args = parser.parse_args()
+
+    # A configuração é lida na importação dos módulos: provedor local, sem cache, sem limites de vazão e sem interface
+    os.environ.update({
+        "UPDATEDOCS_PROVIDER": "fake",
+        "UPDATEDOCS_FAKE_LATENCY": str(args.latency),
+        "UPDATEDOCS_CACHE": "0",
+        "UPDATEDOCS_RPM": "0",
+        "UPDATEDOCS_TPM": "0",
+        "UPDATEDOCS_UI_MODE": "none"
+    })
+
+    counter = {"count": 0, "lock": threading.Lock()}
+    results = {"approved": 0}
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        repo_path = os.path.join(work_dir, "repo")
+        os.makedirs(repo_path)
+        start = time.perf_counter()
+        commits = build_repo(repo_path, args.files, args.doc_lines, args.diff_lines, args.commits)
+        build_seconds = time.perf_counter() - start
+
+        import_start = time.perf_counter()
+        import UpdateDocs
+        import doc_mapping
+        import symbol_index
+        import metrics
+        from request import review_queue
+        import_seconds = time.perf_counter() - import_start
+
+        # Caches e estado em um diretório temporário, sem afetar os da instalação
+        doc_mapping.INDEX_CACHE_DIR = os.path.join(work_dir, "doc_index")
+        symbol_index.SYMBOL_CACHE_DIR = os.path.join(work_dir, "symbol_index")
+        UpdateDocs.STATE_PATH = os.path.join(work_dir, "state.json")
+        metrics.TRACES_DIR = os.path.join(work_dir, "traces")
+
+        recorder = Recorder()
+        for name in STAGES:
+            if hasattr(UpdateDocs, name):
+                setattr(UpdateDocs, name, recorder.wrap(name, getattr(UpdateDocs, name)))
+        count_subprocesses(counter)
+        start_auto_approver(review_queue, results)
+
+        commit_seconds = []
+        start = time.perf_counter()
+        # As mensagens do UpdateDocs vão para stderr, mantendo apenas o JSON em stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            for commit in commits:
+                commit_start = time.perf_counter()
+                sys.argv = ["UpdateDocs.py", repo_path, commit]
+                UpdateDocs.main()
+                commit_seconds.append(round(time.perf_counter() - commit_start, 4))
+        wall_seconds = time.perf_counter() - start
+
+    result = {
+        "config": {"files": args.files, "doc_lines": args.doc_lines, "diff_lines": args.diff_lines,
+                   "commits": args.commits, "latency": args.latency},
+        "repo_build_seconds": round(build_seconds, 4),
+        "import_seconds": round(import_seconds, 4),
+        "wall_seconds": round(wall_seconds, 4),
+        "commit_seconds": commit_seconds,
+        "stages": {name: {"calls": stage["calls"], "seconds": round(stage["seconds"], 4)}
+                   for name, stage in sorted(recorder.stages.items())},
+        "approved": results["approved"],
+        "subprocesses": counter["count"],
+        "peak_rss_mib": peak_rss_mib(resource.RUSAGE_SELF)
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            result["comparison"] = compare(json.load(f), result)
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
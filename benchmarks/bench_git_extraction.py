@@ -0,0 +1,92 @@
+"""
+Compara a extração de diffs por arquivo (um 'git show' por arquivo, como o UpdateDocs fazia)
+com a extração em passagem única de 'git_access.get_commit_patches'.
+
+Uso:
+    python benchmarks/bench_git_extraction.py [--files 200] [--repo CAMINHO --commit HASH] [--repeat 3]
+
+Sem '--repo', um repositório sintético é criado em um diretório temporário.
+O resultado é impresso em JSON.
+"""
+# Standard libraries
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from git_access import get_commit_patches
+
+def git(repo_path, *args):
+    return subprocess.run(["git", *args], cwd=repo_path, check=True, capture_output=True, text=True).stdout
+
+def build_repo(path, files):
+    """
+    Cria um repositório com 'files' arquivos Python e um commit que altera todos eles.
+    """
+    git(path, "init", "-q")
+    git(path, "config", "user.email", "bench@example.com")
+    git(path, "config", "user.name", "bench")
+    os.makedirs(os.path.join(path, "src"))
+    for i in range(files):
+        with open(os.path.join(path, "src", f"module_{i}.py"), "w", encoding="utf-8") as f:
+            f.write("".join(f"def function_{i}_{j}():\n    return {j}\n\n" for j in range(40)))
+    git(path, "add", ".")
+    git(path, "commit", "-qm", "base")
+    for i in range(files):
+        with open(os.path.join(path, "src", f"module_{i}.py"), "a", encoding="utf-8") as f:
+            f.write(f"def added_{i}():\n    return 'novo'\n")
+    git(path, "commit", "-qam", "change")
+    return git(path, "rev-parse", "HEAD").strip()
+
+def legacy_extraction(repo_path, commit_hash):
+    """
+    Reproduz o fluxo anterior: validação com 'git cat-file', lista com 'git diff-tree'
+    e um 'git show' por arquivo.
+    """
+    git(repo_path, "cat-file", "-t", commit_hash)
+    files = git(repo_path, "diff-tree", "--no-commit-id", "--name-only", "-r", commit_hash).splitlines()
+    return {file: git(repo_path, "show", commit_hash, "--", file) for file in files}
+
+def measure(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--repo")
+    parser.add_argument("--commit", default="HEAD")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo_path, commit_hash = args.repo, args.commit
+        if not repo_path:
+            repo_path = tmp
+            commit_hash = build_repo(tmp, args.files)
+
+        legacy_time, legacy = measure(lambda: legacy_extraction(repo_path, commit_hash), args.repeat)
+        single_time, single = measure(lambda: get_commit_patches(repo_path, commit_hash), args.repeat)
+
+    print(json.dumps({
+        "files": len(single),
+        "legacy_seconds": round(legacy_time, 4),
+        "legacy_subprocesses": len(legacy) + 2,
+        "single_pass_seconds": round(single_time, 4),
+        "single_pass_subprocesses": 1,
+        "speedup": round(legacy_time / single_time, 2) if single_time else None,
+        "same_files": sorted(legacy) == sorted(single)
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Mede o custo de inicialização a frio do UpdateDocs em commits sem documentação associada.
+
+Executa 'python -X importtime' sobre o ponto de entrada em um repositório sintético cujo commit altera
+apenas arquivos sem documentação mapeada (o caminho mais comum de um hook post-commit) e verifica que:
+- nenhum módulo pesado (LangChain, FastAPI, uvicorn, pydantic) é importado;
+- o tempo total da execução fica dentro do orçamento informado.
+
+Uso:
+    python benchmarks/bench_import_time.py [--repeat 5] [--budget 1.0] [--top 10]
+
+O resultado é impresso em JSON. O código de saída é 1 se o orçamento for excedido ou se algum módulo
+pesado for importado.
+"""
+# Standard libraries
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+# Equivalente a 'python src/UpdateDocs.py', mas com o UpdateDocs importado como módulo (listado pelo -X importtime)
+# e com o estado e os caches em um diretório temporário (primeiro argumento)
+ENTRY_POINT = """
+import os, sys, UpdateDocs, doc_mapping, symbol_index
+work_dir = sys.argv.pop(1)
+UpdateDocs.STATE_PATH = os.path.join(work_dir, "state.json")
+doc_mapping.INDEX_CACHE_DIR = os.path.join(work_dir, "doc_index")
+symbol_index.SYMBOL_CACHE_DIR = os.path.join(work_dir, "symbol_index")
+sys.exit(UpdateDocs.main())
+"""
+
+# Módulos que só devem ser carregados quando há documentos a atualizar
+HEAVY_MODULES = ("langchain_core", "langchain_google_genai", "google.genai", "fastapi", "uvicorn", "pydantic", "starlette")
+
+IMPORT_LINE_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+def git(repo_path, *args):
+    return subprocess.run(["git", *args], cwd=repo_path, check=True, capture_output=True, text=True).stdout
+
+def build_repo(path):
+    """
+    Cria um repositório com código e documentação mapeada e um commit que altera apenas
+    arquivos sem documentação (ex.: testes e configuração). Retorna o hash do commit.
+    """
+    git(path, "init", "-q")
+    git(path, "config", "user.email", "bench@example.com")
+    git(path, "config", "user.name", "bench")
+    files = {
+        "src/app.py": "def main():\n    return 0\n",
+        "docs/app.md": "# App\n\nFunção `main`.\n",
+        "tests/test_app.py": "def test_main():\n    assert True\n",
+        "setup.cfg": "[metadata]\nname = app\n"
+    }
+    for name, content in files.items():
+        os.makedirs(os.path.join(path, os.path.dirname(name)), exist_ok=True)
+        with open(os.path.join(path, name), "w", encoding="utf-8") as f:
+            f.write(content)
+    git(path, "add", ".")
+    git(path, "commit", "-qm", "base")
+    for name in ("tests/test_app.py", "setup.cfg"):
+        with open(os.path.join(path, name), "a", encoding="utf-8") as f:
+            f.write("# alteração sem documentação\n")
+    git(path, "commit", "-qam", "no docs")
+    return git(path, "rev-parse", "HEAD").strip()
+
+def parse_importtime(stderr):
+    """
+    Interpreta a saída de '-X importtime' (cada módulo é listado após os que ele importa).
+
+    Retorna:
+        tuple: (tempo cumulativo em segundos de cada módulo importado,
+                lista (módulo, segundos) das importações diretas do UpdateDocs)
+    """
+    modules = {}
+    children = []
+    direct = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE_PATTERN.match(line)
+        if not match:
+            continue
+        seconds, depth, name = int(match.group(2)) / 1e6, len(match.group(3)), match.group(4)
+        modules[name] = seconds
+        if depth <= 1:
+            # Módulo do nível superior: as importações diretas listadas antes dele pertencem a ele
+            if name == "UpdateDocs":
+                direct = children
+            children = []
+        elif depth == 3:
+            children.append((name, seconds))
+    return modules, direct
+
+def run_once(repo_path, commit, work_dir):
+    # Sem traces e sem interface; o diretório de trabalho é temporário
+    env = dict(os.environ, UPDATEDOCS_TRACES="0", UPDATEDOCS_UI_MODE="none", PYTHONPATH=SRC_DIR)
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", ENTRY_POINT, work_dir, repo_path, commit],
+        cwd=work_dir, env=env, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"UpdateDocs terminou com código {result.returncode}: {result.stderr[-2000:]}")
+    return elapsed, parse_importtime(result.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.0, help="Tempo máximo (mediana, em segundos) da execução sem documentos")
+    parser.add_argument("--top", type=int, default=10, help="Quantidade de módulos mais lentos listados")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        repo_path = os.path.join(work_dir, "repo")
+        os.makedirs(repo_path)
+        commit = build_repo(repo_path)
+
+        timings = []
+        for _ in range(max(1, args.repeat)):
+            elapsed, (modules, direct) = run_once(repo_path, commit, work_dir)
+            timings.append(elapsed)
+
+    heavy = sorted(name for name in modules if name in HEAVY_MODULES or name.split(".")[0] in HEAVY_MODULES)
+    slowest = sorted(direct, key=lambda item: item[1], reverse=True)
+    median = statistics.median(timings)
+    result = {
+        "runs": len(timings),
+        "wall_seconds": {"median": round(median, 4), "min": round(min(timings), 4), "max": round(max(timings), 4)},
+        "budget_seconds": args.budget,
+        "updatedocs_import_seconds": round(modules.get("UpdateDocs", 0.0), 4),
+        "slowest_imports": [{"module": name, "seconds": round(seconds, 4)} for name, seconds in slowest[:args.top]],
+        "heavy_modules_imported": heavy,
+        "within_budget": median <= args.budget and not heavy
+    }
+    print(json.dumps(result, indent=2))
+    return 0 if result["within_budget"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,14 +2,10 @@ import React, { useState, useEffect } from 'react';
 import CodeBlock from './CodeBlock';
 
 // Configurações
-const API_URL = 'http://localhost:5000/approve_changes';
-const DOCUMENTATION_FILES = {
-  current: 'current_documentation.md',
-  continue_exec: 'continue_exec.txt',
-  alteracoes: 'alteracoes.json' 
-};
-
-const RETRY_INTERVAL = 3000;
+const API_BASE = 'http://localhost:5000';
+const ITEMS_URL = `${API_BASE}/review/items`;
+const EVENTS_URL = `${API_BASE}/review/events`;
+const DECISIONS_URL = `${API_BASE}/review/decisions`;
 
 // Error Boundary para capturar e logar erros
 class ErrorBoundary extends React.Component {
@@ -35,111 +31,109 @@ class ErrorBoundary extends React.Component {
   }
 }
 
-const aplicarAlteracoes = (textoOriginal, alteracoes) => {
-  // Aplicar as alterações no texto da mesma forma que o CodeBlock.js
-  const linhas = textoOriginal.split('\n');
-  const alteracoesOrdenadas = [...alteracoes].sort((a, b) => a.inicio - b.inicio);
-  
-  // Array com segmentos do texto final
-  let resultado = [...linhas];
-  
-  // Aplicar cada alteração na ordem inversa para não afetar os índices
-  [...alteracoesOrdenadas].reverse().forEach(alteracao => {
-    // Ajustar índices para base-0
-    const inicioAjustado = Math.max(0, alteracao.inicio - 1);
-    const fimAjustado = Math.max(0, alteracao.fim - 1);
-    
-    // Substituir o segmento pelo novo conteúdo
-    resultado.splice(inicioAjustado, fimAjustado - inicioAjustado + 1, alteracao.novo_conteudo);
-  });
-  
-  return resultado.join('\n');
-};
-
 function App() {
-  const [documentation, setDocumentation] = useState({
-    current: '',
-    alteracoes: [],
-    isLoading: true,
+  const [review, setReview] = useState({
+    items: [],
+    finished: false,
     error: null
   });
+  // Item exibido nos painéis; por padrão, o primeiro da fila
+  const [selectedId, setSelectedId] = useState(null);
 
   useEffect(() => {
-    let isMounted = true;
-    let retryTimer = null;
-
-    const fetchWithRetry = async () => {
-      try {
-        const [currentDoc, continueExec, alteracoesText] = await Promise.all([
-          fetchText(DOCUMENTATION_FILES.current),
-          fetchText(DOCUMENTATION_FILES.continue_exec),
-          fetchText(DOCUMENTATION_FILES.alteracoes).catch(err => '{"alteracoes":[]}')
-        ]);
-    
-        if (!currentDoc.trim()) {
-          throw new Error('Arquivo vazio');
-        }
-    
-        let alteracoes = [];
-        try {
-          const alteracoesObj = JSON.parse(alteracoesText);
-          alteracoes = alteracoesObj.alteracoes || [];
-        } catch (error) {
-          console.warn('Erro ao analisar alterações JSON:', error);
-        }
-    
-        if (isMounted) {
-          setDocumentation({
-            current: currentDoc,
-            alteracoes: alteracoes,
-            continueExec: parseInt(continueExec),
-            isLoading: false,
-            error: null
-          });
-        }
-      } catch (error) {
-        if (isMounted) {
-          console.log(`Tentativa falhou: ${error.message}. Tentando novamente em ${RETRY_INTERVAL/1000} segundos...`);
-          setDocumentation(prev => ({
-            ...prev,
-            isLoading: true,
-            error: `Aguardando arquivos... (${error.message})`
-          }));
-          
-          // Agenda nova tentativa
-          retryTimer = setTimeout(fetchWithRetry, RETRY_INTERVAL);
-        }
+    // Recebe as propostas por push (Server-Sent Events) em vez de consultar arquivos periodicamente
+    const events = new EventSource(EVENTS_URL);
+
+    const addItem = (item) => setReview(prev => (
+      prev.items.some(existing => existing.id === item.id)
+        ? prev
+        : { ...prev, items: [...prev.items, item], error: null }
+    ));
+
+    const removeItem = (id) => setReview(prev => ({
+      ...prev,
+      items: prev.items.filter(item => item.id !== id)
+    }));
+
+    const updateItem = (id, update) => setReview(prev => ({
+      ...prev,
+      items: prev.items.map(item => (item.id === id ? update(item) : item))
+    }));
+
+    // Eventos recebidos antes da carga inicial da fila são guardados e aplicados depois dela,
+    // na ordem de chegada; caso contrário, alterações de itens ainda não carregados seriam perdidas
+    let buffered = [];
+    const listen = (name, apply) => events.addEventListener(name, (event) => {
+      const data = JSON.parse(event.data);
+      if (buffered) {
+        buffered.push(() => apply(data));
+      } else {
+        apply(data);
       }
+    });
+    const flushBuffered = () => {
+      const pending = buffered || [];
+      buffered = null;
+      pending.forEach(apply => apply());
     };
 
-    const fetchText = async (filename) => {
-      const response = await fetch(filename);
-      if (!response.ok) throw new Error(`Arquivo não encontrado: ${filename}`);
-      return await response.text();
-    };
+    listen('item_added', addItem);
+    // Alterações chegam uma a uma enquanto o modelo ainda está gerando a proposta; o índice evita
+    // duplicar uma alteração que já veio na carga inicial
+    listen('change_added', ({ id, index, change, hunk }) => updateItem(id, item => (
+      item.alteracoes.length !== index ? item : {
+        ...item,
+        alteracoes: [...item.alteracoes, change],
+        hunks: hunk ? [...item.hunks, hunk].sort((a, b) => a.inicio - b.inicio) : item.hunks
+      }
+    )));
+    // Ao final da geração, o servidor envia as alterações validadas e o diff definitivo
+    listen('item_ready', ({ id, alteracoes, hunks, error, status }) => (
+      updateItem(id, item => ({ ...item, alteracoes, hunks, error, status }))
+    ));
+    listen('item_decided', ({ id }) => removeItem(id));
+    listen('finished', () => setReview(prev => ({ ...prev, finished: true })));
+    events.onerror = () => setReview(prev => ({ ...prev, error: 'Conexão com o servidor perdida. Reconectando...' }));
+    events.onopen = () => setReview(prev => ({ ...prev, error: null }));
 
-    fetchWithRetry();
+    // Carrega os itens que já estavam na fila antes da conexão
+    fetch(ITEMS_URL)
+      .then(response => {
+        if (!response.ok) throw new Error('Request failed');
+        return response.json();
+      })
+      .then(result => {
+        result.items.forEach(addItem);
+        setReview(prev => ({ ...prev, finished: prev.finished || result.finished }));
+      })
+      .catch(error => console.error('Erro ao carregar a fila de revisão:', error))
+      .finally(flushBuffered);
 
-    return () => {
-      isMounted = false;
-      clearTimeout(retryTimer);
-    };
+    return () => events.close();
   }, []);
 
-  const handleApproval = async (isApproved) => {
+  useEffect(() => {
+    if (review.finished && review.items.length === 0) {
+      window.close();
+    }
+  }, [review.finished, review.items.length]);
+
+  const documentation = review.items.find(item => item.id === selectedId) || review.items[0];
+  const isGenerating = documentation && documentation.status === 'generating';
+  const hasPending = review.items.some(item => item.status === 'pending');
+
+  const removeDecided = (ids) => setReview(prev => ({
+    ...prev,
+    items: prev.items.filter(item => !ids.includes(item.id))
+  }));
+
+  const handleApproval = async (id, isApproved) => {
     try {
-      // Obter o texto final com alterações aplicadas (se aprovado)
-      const finalText = isApproved 
-        ? aplicarAlteracoes(documentation.current, documentation.alteracoes)
-        : "";
-      
-      const response = await fetch(API_URL, {
+      // As alterações aprovadas são validadas e aplicadas pelo servidor
+      const response = await fetch(`${ITEMS_URL}/${id}/decision`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ 
-          Approved: isApproved,
-          Data: finalText
-        })
+        body: JSON.stringify({ Approved: isApproved })
       });
   
       if (!response.ok) throw new Error('Request failed');
@@ -147,37 +141,85 @@ function App() {
       const result = await response.json();
       console.log('Server response:', result);
       console.log(`Documentation ${isApproved ? 'approved' : 'rejected'}!`);
+      removeDecided([id]);
+    } catch (error) {
+      console.error('Approval error:', error);
+    }
+  };
+
+  // Decide todos os itens pendentes de uma vez (itens ainda em geração permanecem na fila)
+  const handleBulkApproval = async (isApproved) => {
+    try {
+      const response = await fetch(DECISIONS_URL, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ Approved: isApproved })
+      });
+
+      if (!response.ok) throw new Error('Request failed');
+
+      const result = await response.json();
+      console.log(`${result.decided.length} documentation file(s) ${isApproved ? 'approved' : 'rejected'}!`);
+      removeDecided(result.decided);
     } catch (error) {
       console.error('Approval error:', error);
-    } finally {
-      if (!documentation.continueExec) {
-        window.close();
-      }
     }
   };
 
-  if (documentation.isLoading) {
+  if (!documentation && review.error) {
+    return <div className="error">Error: {review.error}</div>;
+  }
+
+  if (!documentation) {
     return (
       <div className="loading">
         <div className="loading-spinner"></div>
-        {'Carregando documentação...'}
+        {review.finished ? 'Revisão concluída.' : 'Aguardando propostas...'}
       </div>
     );
   }
 
-  if (documentation.error) {
-    return <div className="error">Error: {documentation.error}</div>;
-  }
-
   return (
     <ErrorBoundary>
       <div className="container">
+        <div className="panel review-list">
+          <div className="custom-code-block-header">Documents ({review.items.length})</div>
+          {review.items.map(item => (
+            <div
+              key={item.id}
+              className={`review-list-item${item.id === documentation.id ? ' selected' : ''}`}
+              onClick={() => setSelectedId(item.id)}
+            >
+              <span className="review-list-path" title={item.source_file}>{item.doc_path}</span>
+              {item.status === 'generating' ? (
+                <div className="loading-spinner loading-spinner-small"></div>
+              ) : (
+                <span className="review-list-actions">
+                  <button
+                    className="btn btn-approve btn-small"
+                    title="Approve"
+                    onClick={(event) => { event.stopPropagation(); handleApproval(item.id, true); }}
+                  >
+                    ✓
+                  </button>
+                  <button
+                    className="btn btn-reject btn-small"
+                    title="Reject"
+                    onClick={(event) => { event.stopPropagation(); handleApproval(item.id, false); }}
+                  >
+                    ✕
+                  </button>
+                </span>
+              )}
+            </div>
+          ))}
+        </div>
+
         <div className="panel panel-left">
           <CodeBlock
             title="Current Documentation:"
-            code={documentation.current}
             language="markdown"
-            alteracoes={documentation.alteracoes}
+            hunks={documentation.hunks}
             tipo="atual"
           />
         </div>
@@ -185,26 +227,43 @@ function App() {
         <div className="panel panel-right">
           <CodeBlock
             title="Proposed Changes:"
-            code={documentation.current}
             language="markdown"
-            alteracoes={documentation.alteracoes}
+            hunks={documentation.hunks}
             tipo="novo"
           />
         </div>
 
         <div className="button-container">
+          {isGenerating && <div className="loading-spinner"></div>}
+          {documentation.error && <div className="error">{documentation.error}</div>}
           <button
             className="btn btn-approve"
-            onClick={() => handleApproval(true)}
+            disabled={isGenerating}
+            onClick={() => handleApproval(documentation.id, true)}
           >
             Approve
           </button>
           <button
             className="btn btn-reject"
-            onClick={() => handleApproval(false)}
+            disabled={isGenerating}
+            onClick={() => handleApproval(documentation.id, false)}
           >
             Reject
           </button>
+          <button
+            className="btn btn-approve"
+            disabled={!hasPending}
+            onClick={() => handleBulkApproval(true)}
+          >
+            Approve All
+          </button>
+          <button
+            className="btn btn-reject"
+            disabled={!hasPending}
+            onClick={() => handleBulkApproval(false)}
+          >
+            Reject All
+          </button>
         </div>
       </div>
     </ErrorBoundary>
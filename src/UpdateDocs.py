@@ -2,13 +2,29 @@
 import os
 import os.path
 import sys
-import subprocess
 import logging
+import json
+import re
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, CancelledError
+
+# Carrega as variáveis de ambiente do arquivo .env antes que os módulos leiam as suas configurações
+from dotenv import load_dotenv
+load_dotenv()
 
 # Auxiliary Functions
-from request import server_init, approve_changes
-from interface_controller import ReactManager
-from llm_chain import generate_documentation_changes
+# Os módulos pesados (LangChain, FastAPI, uvicorn) são importados apenas quando há documentos a
+# atualizar (ver 'generate_proposal' e 'process_revision'): commits sem documentação associada
+# terminam sem pagar o seu tempo de importação
+from batching import pack_entries, entry_size
+from git_access import get_revision_patches, resolve_commit, commit_files, get_current_branch
+from doc_mapping import get_doc_mapper
+from symbol_index import find_affected_docs, SYMBOL_INDEX_ENABLED
+from diff_compaction import compact_patches
+from metrics import trace, span
+from edit_engine import write_atomic, content_lines, normalize_edits, apply_edits, unified_diff
 
 # Configuração do log de erros
 log_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "errors.log")
@@ -19,105 +35,136 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-# Extensões de arquivos de código-fonte suportadas
-SOURCE_EXTENSIONS = [".java", ".py", ".js", ".ts", ".jsx", ".tsx", ".c",
-                  ".cpp", ".cs", ".html", ".rb", ".r", ".php", ".go", ".rs",
-                  ".swift", ".sql"] # Pode ser expandido para outras extensões
+# Arquivo com o último commit documentado de cada repositório (usado por --since-last)
+STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "state.json")
+
+# Número máximo de propostas geradas simultaneamente pela IA
+MAX_WORKERS = int(os.getenv("UPDATEDOCS_MAX_WORKERS", "4"))
+# Número máximo de documentos aprovados gravados simultaneamente
+WRITE_WORKERS = int(os.getenv("UPDATEDOCS_WRITE_WORKERS", "4"))
+# Tempo máximo (em segundos) de espera pela primeira proposta antes de abrir a interface
+FIRST_PROPOSAL_TIMEOUT = float(os.getenv("UPDATEDOCS_FIRST_PROPOSAL_TIMEOUT", "60"))
 
-# Caminhos dos arquivos temporários para exibir as alterações propostas
-base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-CURRENT = os.path.join(base_dir, "public", "current_documentation.md")
-ALT = os.path.join(base_dir, "public", "alteracoes.json")
-CONTINUE = os.path.join(base_dir, "public", "continue_exec.txt")
+# Códigos de saída do modo sem interface (--headless); erros de uso do argparse saem com 2
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_PARTIAL = 3  # Algum documento falhou; os demais foram processados
 
 def get_cfg():
     """
-    Obtém as configurações do arquivo de configuração.
+    Obtém as configurações da linha de comando.
+
+    Aceita um commit ('<hash>'), um intervalo de commits ('A..B') ou '--since-last', que
+    documenta todos os commits desde o último commit documentado até a revisão informada (HEAD por padrão).
+    Com '--headless', as propostas são aplicadas sem revisão e o resultado é um diff ou um commit em um branch.
+    Retorna a tupla (repo_path, revision, args).
     """
-    # Configuração inicial
-    repo_path = sys.argv[1]
-    commit_hash = sys.argv[2]
+    parser = argparse.ArgumentParser(description="Atualiza a documentação a partir das alterações de um commit.")
+    parser.add_argument("repo_path", help="Caminho do repositório")
+    parser.add_argument("revision", nargs="?", help="Hash do commit ou intervalo de commits (A..B)")
+    parser.add_argument("--since-last", action="store_true", help="Documenta os commits desde o último commit documentado")
+    parser.add_argument("--headless", action="store_true", help="Aplica as propostas sem interface nem servidor de revisão (CI)")
+    parser.add_argument("--output", choices=["diff", "branch"], default="diff",
+                        help="Modo --headless: diff unificado (padrão) ou commit em um branch")
+    parser.add_argument("--diff-file", default="-", help="Modo --headless: arquivo do diff unificado ('-' para a saída padrão)")
+    parser.add_argument("--branch", help="Modo --headless: branch do commit (padrão: updatedocs/<commit>)")
+    parser.add_argument("--summary", help="Modo --headless: arquivo do resumo em JSON (padrão: saída de erro)")
+    parser.add_argument("--model", help="Modelo utilizado nesta execução (padrão: UPDATEDOCS_MODEL)")
+    parser.add_argument("--temperature", type=float, help="Temperatura do modelo nesta execução (padrão: UPDATEDOCS_TEMPERATURE)")
+    args = parser.parse_args()
+    repo_path = args.repo_path
 
     # Verifica se o diretório do repositório existe
     if not os.path.isdir(repo_path):
         logging.error(f"Diretório do repositório não encontrado: {repo_path}")
         raise ValueError(f"Diretório do repositório não encontrado: {repo_path}")
-    
-    # Verifica se o hash do commit é válido
-    try:
-        subprocess.run(
-            ["git", "cat-file", "-t", commit_hash],
-            check=True,
-            cwd=repo_path  # Usa o diretório do repositório especificado
-        )
-    except subprocess.CalledProcessError as e:
-        logging.error(f"Hash do commit inválido: {commit_hash}")
-        raise ValueError(f"Hash do commit inválido: {commit_hash}")
-
-    return repo_path, commit_hash
-    
-def get_file_diff(repo_path, commit_hash, file_path):
+
+    if args.since_last:
+        if args.revision and ".." in args.revision:
+            raise ValueError("--since-last não aceita um intervalo de commits")
+        head = resolve_commit(repo_path, args.revision or "HEAD")
+        last = load_last_documented(repo_path)
+        revision = f"{last}..{head}" if last else head
+    elif args.revision:
+        revision = args.revision
+    else:
+        parser.error("informe o hash do commit, um intervalo (A..B) ou --since-last")
+
+    # A validade do commit (ou do intervalo) é verificada na própria extração dos patches
+    # (get_revision_patches), evitando um processo do Git apenas para validação
+
+    return repo_path, revision, args
+
+def get_head_revision(revision):
+    """
+    Retorna a revisão final de um commit ou intervalo ('A..B' ou 'A...B' -> 'B'; 'A..' -> 'HEAD').
+    """
+    return re.split(r"\.\.\.?", revision)[-1] or "HEAD"
+
+def load_state():
     """
-    Obtém o diff de um arquivo específico no commit.
+    Lê o arquivo de estado com o último commit documentado de cada repositório.
     """
     try:
-        # Usa -- para informar qual arquivo filtrar
-        result = subprocess.run(
-            ["git", "show", commit_hash, "--", file_path],
-            capture_output=True,
-            text=True,
-            check=True,
-            cwd=repo_path
-        )
-        return result.stdout
-    except subprocess.CalledProcessError as e:
-        logging.error(f"Erro ao obter o diff do arquivo {file_path}: {e.stderr}")
-        raise ValueError(f"Erro ao obter o diff do arquivo {file_path}: {e.stderr.strip()}")
-    
-def get_edited_files(repo_path, commit_hash):
+        with open(STATE_PATH, "r", encoding="utf-8") as state_file:
+            return json.load(state_file)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.error(f"Erro ao ler o arquivo de estado: {e}")
+        return {}
+
+def load_last_documented(repo_path):
+    """
+    Retorna o último commit documentado do repositório ou None.
     """
-    Obtém uma lista de arquivos editados em um commit específico usando o Git.
-    Retorna uma lista de nomes de arquivos que possuem extensões definidas em SOURCE_EXTENSIONS.
+    return load_state().get(os.path.realpath(repo_path))
+
+def save_last_documented(repo_path, revision):
+    """
+    Registra o commit final da revisão processada como o último commit documentado do repositório.
     """
+    head = get_head_revision(revision)
     try:
-        result = subprocess.run(
-            ["git", "diff-tree", "--no-commit-id", "--name-only", "-r", commit_hash],
-            capture_output=True,
-            text=True,
-            check=True,
-            cwd=repo_path  # Usa o diretório do repositório especificado
-        )
-        
-        files = result.stdout.splitlines()
-        return [file for file in files if os.path.splitext(file)[1] in SOURCE_EXTENSIONS]
+        # Evita um processo do Git quando o hook já informa o hash completo
+        if not re.fullmatch(r"[0-9a-f]{40}", head):
+            head = resolve_commit(repo_path, head)
+        state = load_state()
+        state[os.path.realpath(repo_path)] = head
+        os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+        manipulate_file(STATE_PATH, "write", contents=json.dumps(state, indent=2))
+    except (OSError, ValueError) as e:
+        logging.error(f"Erro ao registrar o último commit documentado: {e}")
+
+def get_file_diff(patches, file_path):
+    """
+    Obtém o diff de um arquivo específico a partir dos patches extraídos do commit.
+    """
+    if file_path not in patches:
+        logging.error(f"Erro ao obter o diff do arquivo {file_path}: arquivo não alterado no commit")
+        raise ValueError(f"Erro ao obter o diff do arquivo {file_path}: arquivo não alterado no commit")
+    return patches[file_path]
     
-    except subprocess.CalledProcessError as e:
-        logging.error(f"Erro ao obter os arquivos editados: {e.stderr}")
-        raise ValueError(f"Erro ao obter os arquivos editados: {e.stderr.strip()}")
+def get_edited_files(patches):
+    """
+    Obtém a lista de arquivos editados a partir dos patches extraídos do commit.
+    Quais deles possuem documentação é decidido pelas regras de mapeamento (doc_mapping).
+    """
+    return list(patches)
     
-def get_doc_path(repo_path, src_file):
+def get_doc_paths(mapper, repo_path, src_file):
     """
-    Gera e retorna o caminho do arquivo de documentação (.md) correspondente a um arquivo de código-fonte.
-    Verifica se o arquivo de entrada possui uma das extensões cadastradas e se contém a palavra "src" em seu caminho.
-    Caso essas condições sejam atendidas, substitui a extensão origem por ".md" e a pasta "src" por "docs",
-    concatenando com o caminho do repositório fornecido. Se não for possível aplicar a transformação, retorna None.
+    Retorna os caminhos completos dos arquivos de documentação correspondentes a um arquivo de código-fonte.
+    A correspondência é consultada no índice de mapeamento (ver doc_mapping), que aplica a regra padrão
+    (pasta "src" -> "docs", extensão -> ".md") ou as regras do arquivo '.updatedocs.json' do repositório.
     Parâmetros:
+        mapper (DocMapper): Índice de mapeamento da árvore do commit.
         repo_path (str): Caminho do repositório onde se encontram os arquivos.
         src_file (str): Caminho relativo do arquivo de código-fonte.
     Retorna:
-        str ou None: Caminho completo do arquivo de documentação se o arquivo for compatível; caso contrário, None.
+        list: Caminhos completos dos arquivos de documentação; lista vazia se não houver correspondência.
     """
-
-    if any(src_file.endswith(ext) for ext in SOURCE_EXTENSIONS) and "src" in src_file:
-        for ext in SOURCE_EXTENSIONS:
-            if src_file.endswith(ext):
-                doc_file_name = src_file.replace(ext, ".md").replace("src", "docs")
-                break
-        doc_path = (f'{repo_path}/{doc_file_name}')
-        if os.path.isfile(doc_path):
-            return doc_path
-        return None
-    return None
+    return [f'{repo_path}/{doc_file_name}' for doc_file_name in mapper.lookup(src_file)]
 
 def get_documentation_content(doc_path):
     """
@@ -154,6 +201,9 @@ def manipulate_file(file_paths, operation, contents=None):
         Tipo de operação: 'write', 'clear', 'delete'
     contents : str, list, None, optional
         Conteúdo(s) a ser(em) escrito(s) no(s) arquivo(s) (para operações de escrita)
+
+    As escritas são atômicas (arquivo temporário + rename, ver edit_engine.write_atomic):
+    uma interrupção nunca deixa um arquivo truncado.
     """
     try:
         # Normaliza os parâmetros para listas
@@ -170,14 +220,13 @@ def manipulate_file(file_paths, operation, contents=None):
                 os.remove(file_path)
                 continue
                 
-            with open(file_path, "w", encoding="utf-8") as file:
-                if operation == "clear":
-                    file.write("")
-                elif operation == "write":
-                    file.write(str(contents[i]) if contents[i] is not None else "ERROR")
-                else:
-                    logging.error(f"Operação inválida: {operation}")
-                    raise ValueError(f"Operação inválida: {operation}")
+            if operation == "clear":
+                write_atomic(file_path, "")
+            elif operation == "write":
+                write_atomic(file_path, str(contents[i]) if contents[i] is not None else "ERROR")
+            else:
+                logging.error(f"Operação inválida: {operation}")
+                raise ValueError(f"Operação inválida: {operation}")
                     
     except (FileNotFoundError, PermissionError) as e:
         # Captura o nome do arquivo atual
@@ -189,81 +238,486 @@ def manipulate_file(file_paths, operation, contents=None):
         logging.error(f"Erro ao manipular o arquivo {current_file}: {e}")
         raise ValueError(f"Erro ao manipular o arquivo: {e}")
     
-def verify_valid_files(repo_path, edited_files):
+def verify_valid_files(repo_path, edited_files, mapper):
     """
     Verifica os arquivos editados para identificar aqueles que possuem documentação válida.
 
     Parâmetros:
         repo_path (str): O caminho do repositório onde os arquivos estão localizados.
         edited_files (list): Lista de arquivos que foram editados.
+        mapper (DocMapper): Índice de mapeamento da árvore do commit.
 
     Retorna:
-        list: Uma lista de tuplas, onde cada tupla contém:
-              (arquivo editado, caminho do arquivo de documentação, conteúdo atual da documentação, documentação enumerada).
+        list: Uma lista de tuplas, uma por arquivo de documentação, onde cada tupla contém:
+              (arquivos editados associados, caminho do arquivo de documentação, conteúdo atual da documentação).
               
     Descrição:
-        Para cada arquivo na lista 'edited_files', a função obtém o caminho do arquivo de documentação correspondente
-        utilizando 'get_doc_path'. Se um caminho é encontrado, são extraídos o conteúdo atual e o conteúdo enumerado da
-        documentação por meio da função 'get_documentation_content'. Se ambos os conteúdos forem válidos, a tupla com os
-        dados pertinentes é adicionada à lista de arquivos com documentação válida, que é retornada ao final.
+        Para cada arquivo na lista 'edited_files', a função obtém os caminhos dos arquivos de documentação
+        correspondentes utilizando 'get_doc_paths'. Como um arquivo pode alimentar vários documentos e um documento
+        pode receber vários arquivos, os arquivos editados são agrupados por documento, de modo que cada documento
+        recebe uma única proposta. O conteúdo atual é lido uma única vez por documento com 'get_documentation_content'.
     """
-    valid_doc_files = []
+    sources_by_doc = {}
     for source_file in edited_files:
-        doc_path = get_doc_path(repo_path, source_file)
-        if doc_path:
-            current_documentation = get_documentation_content(doc_path)
-            if current_documentation:
-                valid_doc_files.append((source_file, doc_path, current_documentation))
+        for doc_path in get_doc_paths(mapper, repo_path, source_file):
+            sources_by_doc.setdefault(doc_path, []).append(source_file)
+
+    valid_doc_files = []
+    for doc_path, source_files in sources_by_doc.items():
+        current_documentation = get_documentation_content(doc_path)
+        if current_documentation:
+            valid_doc_files.append((source_files, doc_path, current_documentation))
     return valid_doc_files
 
-def main():
-    # Configuração inicial
-    repo_path, commit_hash = get_cfg()
+def verify_symbol_docs(repo_path, patches, mapper, valid_doc_files):
+    """
+    Encontra, pelo índice de símbolos (ver symbol_index), os documentos que citam funções, classes,
+    flags ou chaves de configuração alteradas na revisão, além dos documentos já mapeados.
+
+    Parâmetros:
+        repo_path (str): O caminho do repositório onde os arquivos estão localizados.
+        patches (dict): Patches da revisão.
+        mapper (DocMapper): Índice de mapeamento da árvore do commit (fornece os hashes dos blobs).
+        valid_doc_files (list): Documentos já associados por 'verify_valid_files'.
+
+    Retorna:
+        list: Tuplas no mesmo formato de 'verify_valid_files' para os documentos adicionais.
+    """
+    mapped_docs = {os.path.relpath(doc_path, repo_path).replace(os.sep, "/") for _, doc_path, _ in valid_doc_files}
+    try:
+        affected_docs = find_affected_docs(repo_path, patches, mapper.files, exclude=mapped_docs)
+    except ValueError as e:
+        logging.error(f"Erro ao consultar o índice de símbolos: {e}")
+        return []
+
+    symbol_doc_files = []
+    for doc_file_name, source_files in affected_docs:
+        doc_path = f'{repo_path}/{doc_file_name}'
+        current_documentation = get_documentation_content(doc_path)
+        if current_documentation:
+            symbol_doc_files.append((source_files, doc_path, current_documentation))
+    return symbol_doc_files
+
+def get_source_diff(patches, source_files):
+    """
+    Obtém o diff dos arquivos de origem de um documento, concatenado na ordem dos arquivos.
+    """
+    return "".join(get_file_diff(patches, source_file) for source_file in source_files)
+
+def generate_proposal(patches, source_files, current_documentation, on_change=None, priority=0):
+    """
+    Obtém o diff dos arquivos de origem e gera as alterações propostas para a documentação associada.
+    Executada pelas threads do pool de pré-processamento; erros ficam restritos ao documento.
+    'on_change' recebe cada alteração assim que o modelo a conclui (modo streaming) e 'priority'
+    ordena as requisições no agendador (ver llm_scheduler).
+    """
+    from llm_chain import generate_documentation_changes
+
+    # Obtém o diff específico dos arquivos de origem do documento
+    file_diff = get_source_diff(patches, source_files)
+
+    # Gera as alterações propostas utilizando IA
+    return generate_documentation_changes(file_diff, current_documentation, on_change, priority)
+
+def generate_batch_proposals(patches, entries, priority=0):
+    """
+    Gera as propostas de um lote de documentos pequenos em uma única requisição (ver batching).
 
-    # Inicia o servidor React
-    interface = ReactManager(os.path.dirname(os.path.abspath(__file__)))
-    interface.start_server()
+    Parâmetros:
+        patches (dict): Patches do commit retornados por 'get_commit_patches'.
+        entries (list): Tuplas (doc_key, source_files, current_documentation) dos documentos do lote.
+        priority (int): Prioridade da requisição no agendador.
 
-    # Obtém os arquivos editados no commit
-    edited_files = get_edited_files(repo_path, commit_hash)
+    Retorna:
+        list: Respostas em JSON na mesma ordem de 'entries'; None para documentos com erro.
+    """
+    from llm_chain import generate_batch_documentation_changes
 
-    # Verifica quais arquivos editados possuem documentos válidos associados
-    valid_doc_files = verify_valid_files(repo_path, edited_files)
+    return generate_batch_documentation_changes(
+        [(doc_key, get_source_diff(patches, source_files), current_documentation)
+         for doc_key, source_files, current_documentation in entries],
+        priority
+    )
 
-    server_init()
+def resolve_batch(batch, futures):
+    # Repassa o resultado de um lote aos futures de cada documento
+    try:
+        results = batch.result()
+    except Exception as e:
+        for future in futures:
+            future.set_exception(e)
+        return
+    for future, result in zip(futures, results):
+        future.set_result(result)
 
-    # Para cada arquivo editado que tenha documento associado
-    for i, (source_file, doc_path, current_documentation) in enumerate(valid_doc_files):
-        # Obtém o diff específico para o arquivo de origem
-        file_diff = get_file_diff(repo_path, commit_hash, source_file)
+def prefetch_proposals(executor, patches, valid_doc_files, item_ids, on_change, repo_path="."):
+    """
+    Submete a geração das propostas de todos os arquivos válidos ao pool de threads.
+    Pares (diff, documentação) pequenos são agrupados em uma única requisição ao modelo (ver batching);
+    os demais são gerados individualmente, em modo streaming.
 
-        # Gera as alterações propostas utilizando IA
-        changes = generate_documentation_changes(file_diff, current_documentation)
+    Parâmetros:
+        executor (ThreadPoolExecutor): Pool responsável por gerar as propostas.
+        patches (dict): Patches do commit retornados por 'get_commit_patches'.
+        valid_doc_files (list): Lista retornada por 'verify_valid_files'.
+        item_ids (list): Ids dos itens da fila de revisão, na mesma ordem de 'valid_doc_files'.
+        on_change (callable): Recebe (item_id, alteração) a cada alteração gerada em streaming;
+                              se None, as propostas são geradas sem streaming.
+        repo_path (str): Caminho do repositório; os documentos são identificados nos lotes pelo caminho relativo.
 
-        # Verifica se é o último arquivo editado
-        continueExec = 0 if i == len(valid_doc_files) - 1 else 1
+    Retorna:
+        list: Futures na mesma ordem de 'valid_doc_files', permitindo iniciar a revisão
+              assim que a primeira proposta estiver pronta. Os documentos revisados primeiro
+              têm prioridade nas requisições ao modelo.
+    """
+    sizes = [
+        entry_size("".join(patches.get(source_file, "") for source_file in source_files), current_documentation)
+        for source_files, _, current_documentation in valid_doc_files
+    ]
 
-        # Cria arquivos temporários para exibir as alterações propostas
-        manipulate_file([CURRENT, ALT, CONTINUE], "write", contents=[current_documentation, changes, str(continueExec)])
+    proposals = [None] * len(valid_doc_files)
+    for group in pack_entries(sizes):
+        priority = group[0]
+        if len(group) == 1:
+            source_files, _, current_documentation = valid_doc_files[priority]
+            proposals[priority] = executor.submit(
+                generate_proposal, patches, source_files, current_documentation,
+                (lambda change, item_id=item_ids[priority]: on_change(item_id, change)) if on_change else None, priority
+            )
+            continue
 
-        # Exibe as alterações propostas e solicita aprovação
-        approved, new_documentation = approve_changes()
+        entries = [
+            (os.path.relpath(valid_doc_files[i][1], repo_path), valid_doc_files[i][0], valid_doc_files[i][2])
+            for i in group
+        ]
+        futures = [Future() for _ in group]
+        for i, future in zip(group, futures):
+            proposals[i] = future
+        batch = executor.submit(generate_batch_proposals, patches, entries, priority)
+        batch.add_done_callback(lambda batch, futures=futures: resolve_batch(batch, futures))
+    return proposals
 
-        if approved and new_documentation:
+def parse_changes(changes):
+    """
+    Converte a resposta JSON da IA na lista de alterações exibida ao revisor.
+
+    Retorna:
+        tuple: (lista de alterações, aviso de proposta parcial ou None); lista vazia se a resposta for inválida.
+    """
+    if not changes:
+        return [], None
+    try:
+        response = json.loads(changes)
+        return response.get("alteracoes", []), response.get("aviso")
+    except (ValueError, AttributeError) as e:
+        logging.error(f"Erro ao interpretar as alterações propostas: {e}")
+        return [], None
+
+def complete_proposal(item_id, doc_path, proposal):
+    """
+    Conclui na fila de revisão o item de um documento com a proposta gerada.
+    Falhas na geração são publicadas como itens com erro, sem interromper os demais documentos;
+    propostas parciais (partes do diff não processadas) são publicadas com o aviso correspondente.
+    """
+    from request import review_queue
+
+    error = None
+    try:
+        changes = proposal.result()
+    except CancelledError:
+        # Geração descartada após uma revisão interrompida: não há mais quem revise o documento
+        return
+    except Exception as e:
+        logging.error(f"Erro ao gerar as alterações do arquivo {doc_path}: {e}")
+        changes = None
+    if changes is None:
+        error = "Erro ao gerar as alterações propostas."
+
+    alteracoes, warning = parse_changes(changes)
+    review_queue.complete(item_id, alteracoes, error or warning)
+
+def write_approved(doc_path, current_documentation, new_documentation):
+    """
+    Grava um documento aprovado, executada pelo pool de gravação assim que o revisor aprova o item.
+    Não sobrescreve um documento editado por outra pessoa durante a revisão.
+    """
+    if not new_documentation or new_documentation == current_documentation:
+        return
+    try:
+        if get_documentation_content(doc_path) != current_documentation:
+            logging.error(f"Documento alterado durante a revisão, proposta descartada: {doc_path}")
+            return
+        with span("doc_write", doc=doc_path, chars=len(new_documentation)):
             manipulate_file(doc_path, "write", contents=new_documentation)
-        
-        # Limpa os arquivos temporários
-        manipulate_file([CURRENT, ALT, CONTINUE], "clear")
+    except Exception as e:
+        # Erros ficam restritos ao documento; os demais continuam sendo gravados
+        logging.error(f"Erro ao gravar o documento {doc_path}: {e}")
+
+def run(repo_path, revision, interface=None):
+    """
+    Processa um commit (ou intervalo de commits) de um repositório: gera as propostas,
+    conduz a revisão e grava a documentação aprovada.
+    Reutilizada pelo daemon (daemon.py), que mantém o processo, o servidor e a interface ('interface')
+    ativos entre commits.
+    As etapas são registradas em um trace JSONL por commit (ver metrics).
+    Retorna EXIT_OK ou EXIT_PARTIAL se a revisão for interrompida antes de todas as decisões.
+    """
+    with trace(repo_path=os.path.realpath(repo_path), revision=revision):
+        return process_revision(repo_path, revision, interface)
+
+def collect_doc_files(repo_path, revision):
+    """
+    Obtém os patches da revisão e os documentos a atualizar: os mapeados a partir dos arquivos
+    editados e, com o índice de símbolos ativo, os que citam os símbolos alterados.
+
+    Retorna:
+        tuple: (patches, lista de tuplas (arquivos de origem, caminho do documento, conteúdo atual))
+    """
+    # Obtém, em uma única chamada ao Git, os patches de todos os arquivos do commit ou do
+    # diff líquido do intervalo (também valida a revisão antes de qualquer outra inicialização)
+    with span("git_extraction") as attributes:
+        patches = get_revision_patches(repo_path, revision)
+
+        # Remove o ruído dos patches (contexto excessivo, formatação, arquivos gerados) antes dos prompts e do cache
+        patches = compact_patches(patches)
+
+        # Obtém os arquivos editados no commit
+        edited_files = get_edited_files(patches)
+        attributes["files"] = len(edited_files)
+
+    with span("doc_mapping") as attributes:
+        # Obtém o índice de mapeamento código-fonte -> documentação da árvore final da revisão
+        mapper = get_doc_mapper(repo_path, get_head_revision(revision))
+
+        # Verifica quais arquivos editados possuem documentos válidos associados
+        valid_doc_files = verify_valid_files(repo_path, edited_files, mapper)
+        attributes["mapped_docs"] = len(valid_doc_files)
+
+    # Acrescenta os documentos que citam os símbolos alterados (READMEs, guias, páginas de API)
+    if SYMBOL_INDEX_ENABLED:
+        with span("symbol_lookup") as attributes:
+            symbol_doc_files = verify_symbol_docs(repo_path, patches, mapper, valid_doc_files)
+            attributes["symbol_docs"] = len(symbol_doc_files)
+        valid_doc_files += symbol_doc_files
+
+    return patches, valid_doc_files
+
+def process_revision(repo_path, revision, interface=None):
+    patches, valid_doc_files = collect_doc_files(repo_path, revision)
+
+    # Sem documentação associada não há o que revisar: encerra sem iniciar servidor nem interface
+    if not valid_doc_files:
+        save_last_documented(repo_path, revision)
+        return EXIT_OK
+
+    # O servidor e a interface só são carregados quando há o que revisar (o modo --headless não os utiliza)
+    from request import server_init, approve_changes, ui_build_available, review_queue, SERVER_URL
+    from interface_controller import ReactManager
+
+    with span("server_init"):
+        server_init()
+
+    # A interface só é iniciada quando a primeira proposta estiver pronta. Uma interface recebida do chamador
+    # (daemon) é mantida aberta ao final da revisão, à espera dos próximos commits
+    persistent = interface is not None
+    if not persistent:
+        interface = ReactManager(os.path.dirname(os.path.abspath(__file__)), SERVER_URL, ui_build_available())
+
+    # Cada arquivo entra na fila de revisão imediatamente; as alterações chegam por streaming
+    item_ids = [
+        review_queue.enqueue(", ".join(source_files), doc_path, current_documentation, [], status="generating")
+        for source_files, doc_path, current_documentation in valid_doc_files
+    ]
+    first_ready = threading.Event()
+
+    # O evento é sinalizado mesmo se o tratamento falhar, para que a interface não deixe de ser aberta
+    def on_change(item_id, change):
+        try:
+            review_queue.append_change(item_id, change)
+        finally:
+            first_ready.set()
+
+    def on_done(item_id, doc_path, proposal):
+        try:
+            complete_proposal(item_id, doc_path, proposal)
+        except Exception as e:
+            logging.error(f"Erro ao concluir a proposta do arquivo {doc_path}: {e}")
+            review_queue.complete(item_id, [], "Erro ao processar a proposta gerada.")
+        finally:
+            first_ready.set()
 
-    # Deleta os arquivos temporários
-    manipulate_file([CURRENT, ALT, CONTINUE], "delete")
+    with ThreadPoolExecutor(max_workers=max(1, MAX_WORKERS)) as executor:
+        # Gera as propostas de todos os arquivos em paralelo enquanto o revisor trabalha
+        proposals = prefetch_proposals(executor, patches, valid_doc_files, item_ids, on_change, repo_path)
+
+        for item_id, (source_files, doc_path, _), proposal in zip(item_ids, valid_doc_files, proposals):
+            proposal.add_done_callback(lambda future, item_id=item_id, doc_path=doc_path: on_done(item_id, doc_path, future))
+
+        # A interface é aberta quando a primeira alteração (ou proposta) estiver disponível ou, se a geração
+        # demorar, após FIRST_PROPOSAL_TIMEOUT segundos (os itens aparecem como "em geração")
+        if not first_ready.wait(FIRST_PROPOSAL_TIMEOUT):
+            logging.error(f"Nenhuma proposta pronta após {FIRST_PROPOSAL_TIMEOUT:g}s; abrindo a interface de revisão.")
+        # Uma interface já conectada recebe os novos itens pelo fluxo de eventos
+        if not (persistent and review_queue.has_subscribers()):
+            interface.start_server()
+
+        # Grava cada documento assim que é aprovado, em qualquer ordem; aprovações em massa
+        # ('/review/decisions') são gravadas em paralelo pelo pool de gravação
+        documents = {item_id: (doc_path, current_documentation)
+                     for item_id, (_, doc_path, current_documentation) in zip(item_ids, valid_doc_files)}
+        with ThreadPoolExecutor(max_workers=max(1, WRITE_WORKERS)) as writer:
+            with span("review_wait", docs=len(item_ids)) as attributes:
+                attributes.update(approved=0, decided=0)
+                # As alterações aprovadas são validadas e aplicadas pelo servidor (ver edit_engine)
+                for item_id, approved, new_documentation in approve_changes(item_ids):
+                    attributes["decided"] += 1
+                    if approved:
+                        attributes["approved"] += 1
+                        writer.submit(write_approved, *documents[item_id], new_documentation)
+
+        # Revisão interrompida (Ctrl+C): as propostas ainda não geradas são descartadas, em vez de aguardadas
+        # na saída do bloco, para não gerar chamadas ao modelo para documentos que ninguém revisará
+        if attributes["decided"] < len(item_ids):
+            executor.shutdown(wait=False, cancel_futures=True)
+            from llm_chain import cancel_pending_requests
+            cancel_pending_requests()
+
+    # Informa à interface que não há mais propostas (a interface persistente aguarda o próximo commit)
+    if not persistent:
+        review_queue.finish()
+
+    # Uma revisão interrompida (Ctrl+C) antes de todas as decisões continua pendente para o próximo --since-last
+    status = EXIT_OK if attributes["decided"] == len(item_ids) else EXIT_PARTIAL
+    if status == EXIT_OK:
+        save_last_documented(repo_path, revision)
+    else:
+        logging.error(f"Revisão interrompida: {len(item_ids) - attributes['decided']} documento(s) sem decisão.")
 
     # Finaliza o servidor React
-    interface.stop_server()
+    if not persistent:
+        interface.stop_server()
+    return status
+
+def apply_proposal(doc_path, current_documentation, proposal):
+    """
+    Valida e aplica, sem revisão, a proposta gerada para um documento (modo --headless).
+
+    Retorna:
+        tuple: (nova documentação ou None em caso de falha, lista de problemas encontrados,
+                aviso de proposta parcial ou None)
+    """
+    try:
+        changes = proposal.result()
+    except Exception as e:
+        logging.error(f"Erro ao gerar as alterações do arquivo {doc_path}: {e}")
+        changes = None
+    if changes is None:
+        return None, ["Erro ao gerar as alterações propostas."], None
+
+    alteracoes, warning = parse_changes(changes)
+    edits, problems = normalize_edits(alteracoes, len(content_lines(current_documentation)))
+    if problems:
+        logging.error(f"Alterações inválidas descartadas em {doc_path}: {'; '.join(problems)}")
+    return apply_edits(current_documentation, edits), problems, warning
+
+def run_headless(repo_path, revision, output="diff", diff_file="-", branch=None):
+    """
+    Processa uma revisão sem interface, servidor de revisão nem Node.js (ex.: em CI).
+    As propostas de todos os documentos são geradas em paralelo e aplicadas após validação; o resultado é
+    um diff unificado ('output="diff"', gravado em 'diff_file') ou um commit em 'branch' ('output="branch"'),
+    criado sem alterar a árvore de trabalho.
+
+    Retorna:
+        dict: Resumo da execução ("changed", "unchanged", "failed", "partial", "invalid_edits", "commit", ...).
+    """
+    started = time.perf_counter()
+    with trace(repo_path=os.path.realpath(repo_path), revision=revision, mode="headless"):
+        patches, valid_doc_files = collect_doc_files(repo_path, revision)
+        summary = {"revision": revision, "output": output, "docs": len(valid_doc_files),
+                   "changed": [], "unchanged": [], "failed": [], "partial": [], "invalid_edits": 0}
+
+        documents = {}
+        with ThreadPoolExecutor(max_workers=max(1, MAX_WORKERS)) as executor:
+            proposals = prefetch_proposals(executor, patches, valid_doc_files, list(range(len(valid_doc_files))), None, repo_path)
+            for (_, doc_path, current_documentation), proposal in zip(valid_doc_files, proposals):
+                relative_path = os.path.relpath(doc_path, repo_path).replace(os.sep, "/")
+                new_documentation, problems, warning = apply_proposal(doc_path, current_documentation, proposal)
+                if new_documentation is None:
+                    summary["failed"].append({"doc": relative_path, "error": problems[0]})
+                    continue
+                if warning:
+                    summary["partial"].append({"doc": relative_path, "warning": warning})
+                summary["invalid_edits"] += len(problems)
+                if new_documentation == current_documentation:
+                    summary["unchanged"].append(relative_path)
+                else:
+                    summary["changed"].append(relative_path)
+                    documents[relative_path] = (current_documentation, new_documentation)
+
+        with span("doc_output", output=output, docs=len(documents)):
+            if output == "branch":
+                if documents:
+                    head = resolve_commit(repo_path, get_head_revision(revision))
+                    branch = branch or f"updatedocs/{head[:12]}"
+                    if branch == get_current_branch(repo_path):
+                        raise ValueError(f"O branch {branch} está em uso na árvore de trabalho")
+                    # Os documentos foram lidos da árvore de trabalho: o commit é criado sobre o HEAD atual
+                    summary["commit"] = commit_files(
+                        repo_path, resolve_commit(repo_path, "HEAD"),
+                        {path: new for path, (_, new) in documents.items()},
+                        f"Atualiza a documentação ({revision})", branch
+                    )
+                    summary["branch"] = branch
+            else:
+                patch = "".join(unified_diff(path, old, new) for path, (old, new) in sorted(documents.items()))
+                if diff_file == "-":
+                    sys.stdout.write(patch)
+                    sys.stdout.flush()
+                else:
+                    with open(diff_file, "w", encoding="utf-8") as patch_file:
+                        patch_file.write(patch)
+
+        # Revisões com falhas ou propostas parciais continuam pendentes para o próximo --since-last
+        if not summary["failed"] and not summary["partial"]:
+            save_last_documented(repo_path, revision)
+
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+def write_summary(summary, path=None):
+    # Resumo em JSON para o CI: em um arquivo ou na saída de erro (a saída padrão pode conter o diff)
+    text = json.dumps(summary, indent=2, ensure_ascii=False) + "\n"
+    if path:
+        with open(path, "w", encoding="utf-8") as summary_file:
+            summary_file.write(text)
+    else:
+        sys.stderr.write(text)
+
+def main():
+    with trace():
+        # Configuração inicial
+        with span("config"):
+            repo_path, revision, args = get_cfg()
+            # O LangChain só é importado quando o modelo é alterado pela linha de comando
+            if args.model or args.temperature is not None:
+                from llm_chain import configure_model
+                configure_model(args.model, args.temperature)
+
+        if not args.headless:
+            return run(repo_path, revision)
+
+        try:
+            summary = run_headless(repo_path, revision, args.output, args.diff_file, args.branch)
+        except (OSError, ValueError) as e:
+            logging.error(f"Erro ao executar o modo --headless: {e}")
+            write_summary({"revision": revision, "output": args.output, "error": str(e)}, args.summary)
+            return EXIT_ERROR
+        write_summary(summary, args.summary)
+        return EXIT_PARTIAL if summary["failed"] or summary["partial"] else EXIT_OK
 
 if __name__ == "__main__":
     try:
-        main()
+        sys.exit(main())
     except Exception as e:
         logging.error(f"Erro ao executar o script: {e}")
         sys.exit(1)
@@ -0,0 +1,103 @@
+# Standard libraries
+import logging
+import os
+import re
+
+# Auxiliary Functions
+from chunking import estimate_tokens
+
+# Agrupamento de documentos pequenos em uma única requisição ao modelo.
+# Orçamento estimado de tokens de cada requisição em lote (0 desativa o agrupamento), tamanho máximo
+# de um par (diff, documentação) para entrar em um lote e quantidade máxima de documentos por lote
+BATCH_TOKEN_BUDGET = int(os.getenv("UPDATEDOCS_BATCH_TOKEN_BUDGET", "8000"))
+BATCH_ITEM_MAX_TOKENS = int(os.getenv("UPDATEDOCS_BATCH_ITEM_MAX_TOKENS", "2000"))
+BATCH_MAX_DOCS = int(os.getenv("UPDATEDOCS_BATCH_MAX_DOCS", "8"))
+
+# Delimitadores de cada documento no texto enviado ao modelo
+DOCUMENT_START = "=== Documento: {key} ==="
+DOCUMENT_END = "=== Fim do documento: {key} ==="
+DOCUMENT_PATTERN = re.compile(
+    r"^=== Documento: (?P<key>.+?) ===\nDiff do commit:\n(?P<diff>.*?)\n\nDocumentação existente:\n(?P<doc>.*?)\n=== Fim do documento: (?P=key) ===$",
+    re.MULTILINE | re.DOTALL
+)
+
+def pack_entries(sizes, token_budget=BATCH_TOKEN_BUDGET, item_max_tokens=BATCH_ITEM_MAX_TOKENS, max_docs=BATCH_MAX_DOCS):
+    """
+    Agrupa os pares (diff, documentação) pequenos em lotes, respeitando a ordem original.
+
+    Parâmetros:
+        sizes (list): Tamanho estimado (em tokens) de cada par.
+        token_budget (int): Soma máxima dos tamanhos de um lote; 0 desativa o agrupamento.
+        item_max_tokens (int): Pares maiores que este limite são sempre enviados individualmente.
+        max_docs (int): Quantidade máxima de documentos em um lote.
+
+    Retorna:
+        list: Grupos de índices ordenados pelo primeiro índice; grupos de um único índice seguem o caminho por arquivo.
+    """
+    groups = []
+    current = []
+    used = 0
+    for i, tokens in enumerate(sizes):
+        if token_budget <= 0 or max_docs <= 1 or tokens > min(item_max_tokens, token_budget):
+            groups.append([i])
+            continue
+        if current and (used + tokens > token_budget or len(current) >= max_docs):
+            groups.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += tokens
+    if current:
+        groups.append(current)
+    return sorted(groups, key=lambda group: group[0])
+
+def entry_size(commit_diff, documentation_content):
+    # Tamanho estimado de um par (diff, documentação) usado no agrupamento
+    return estimate_tokens(commit_diff) + estimate_tokens(documentation_content)
+
+def build_batch_documents(entries):
+    """
+    Monta o texto de um lote a partir das tuplas (chave, diff, documentação enumerada).
+    Cada documento é delimitado por marcadores com a sua chave (caminho relativo no repositório).
+    """
+    return "\n\n".join(
+        f"{DOCUMENT_START.format(key=key)}\nDiff do commit:\n{commit_diff}\n\nDocumentação existente:\n{documentation}\n{DOCUMENT_END.format(key=key)}"
+        for key, commit_diff, documentation in entries
+    )
+
+def split_batch_documents(documents):
+    """
+    Operação inversa de 'build_batch_documents': retorna as tuplas (chave, diff, documentação enumerada).
+    """
+    return [(match.group("key"), match.group("diff"), match.group("doc")) for match in DOCUMENT_PATTERN.finditer(documents)]
+
+def split_batch_response(response, keys):
+    """
+    Separa a resposta de um lote ({"documentos": {chave: {"alteracoes": [...]}}}) por documento.
+
+    Parâmetros:
+        response: Resposta do modelo já interpretada como JSON.
+        keys (list): Chaves dos documentos enviados no lote.
+
+    Retorna:
+        dict: {chave: {"alteracoes": [...]}} apenas para os documentos com resposta bem formada.
+              Documentos ausentes ou malformados devem ser processados individualmente.
+    """
+    documents = response.get("documentos") if isinstance(response, dict) else None
+    if not isinstance(documents, dict):
+        logging.error("Resposta em lote malformada: campo 'documentos' ausente.")
+        return {}
+
+    answered = {}
+    for key in keys:
+        entry = documents.get(key)
+        # Aceita tanto {"alteracoes": [...]} quanto a lista de alterações diretamente
+        changes = entry.get("alteracoes") if isinstance(entry, dict) else entry
+        if not isinstance(changes, list) or not all(isinstance(change, dict) for change in changes):
+            logging.error(f"Resposta em lote sem alterações válidas para o documento: {key}")
+            continue
+        answered[key] = {"alteracoes": changes}
+
+    unknown = set(documents) - set(keys)
+    if unknown:
+        logging.error(f"Resposta em lote com documentos não solicitados: {', '.join(sorted(unknown))}")
+    return answered
@@ -0,0 +1,164 @@
+# Standard libraries
+import logging
+import os
+
+# Auxiliary Functions
+from doc_sections import Section, get_section_index, select_sections, enumerate_sections
+from edit_engine import content_lines
+
+# Limites do modo em partes (map-reduce) para diffs e documentos grandes
+CHUNK_MAX_CHARS = int(os.getenv("UPDATEDOCS_CHUNK_MAX_CHARS", "30000"))
+CHUNK_CONCURRENCY = int(os.getenv("UPDATEDOCS_CHUNK_CONCURRENCY", "4"))
+CHUNK_TOKEN_BUDGET = int(os.getenv("UPDATEDOCS_CHUNK_TOKEN_BUDGET", "400000"))
+
+def estimate_tokens(text):
+    """
+    Estimativa simples da quantidade de tokens de um texto (aproximadamente 4 caracteres por token).
+    """
+    return len(text) // 4 + 1
+
+def split_lines(header, lines, max_chars):
+    """
+    Divide um trecho de diff em partes de até 'max_chars' caracteres, repetindo o cabeçalho em cada uma.
+    """
+    parts = []
+    current = []
+    size = len(header)
+    for line in lines:
+        if current and size + len(line) + 1 > max_chars:
+            parts.append(header + "\n".join(current) + "\n")
+            current = []
+            size = len(header)
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        parts.append(header + "\n".join(current) + "\n")
+    return parts
+
+def split_diff(commit_diff, max_chars=CHUNK_MAX_CHARS):
+    """
+    Divide um diff em partes de até 'max_chars' caracteres, respeitando os limites de arquivo e de hunk.
+    Cada parte carrega o cabeçalho do arquivo ('diff --git', '---', '+++') a que seus hunks pertencem.
+    Hunks maiores que o limite são divididos por linhas.
+    """
+    # Separa os hunks, cada um acompanhado do cabeçalho do seu arquivo
+    hunks = []
+    header = []
+    hunk = None
+    for line in content_lines(commit_diff):
+        if line.startswith("diff --git "):
+            if hunk is not None:
+                hunks.append(("\n".join(header) + "\n", hunk))
+            header = [line]
+            hunk = None
+        elif line.startswith("@@"):
+            if hunk is not None:
+                hunks.append(("\n".join(header) + "\n", hunk))
+            hunk = [line]
+        elif hunk is not None:
+            hunk.append(line)
+        else:
+            header.append(line)
+    if hunk is not None:
+        hunks.append(("\n".join(header) + "\n", hunk))
+    elif header:
+        hunks.append(("", header))
+
+    # Agrupa hunks consecutivos até o limite de caracteres
+    chunks = []
+    current = ""
+    current_header = None
+    for hunk_header, hunk_lines in hunks:
+        text = "\n".join(hunk_lines) + "\n"
+        if len(hunk_header) + len(text) > max_chars:
+            if current:
+                chunks.append(current)
+                current, current_header = "", None
+            chunks.extend(split_lines(hunk_header, hunk_lines, max_chars))
+            continue
+        addition = text if hunk_header == current_header else hunk_header + text
+        if current and len(current) + len(addition) > max_chars:
+            chunks.append(current)
+            current, current_header = "", None
+            addition = hunk_header + text
+        current += addition
+        current_header = hunk_header
+    if current:
+        chunks.append(current)
+    return chunks
+
+def split_documentation(documentation, max_chars=CHUNK_MAX_CHARS):
+    """
+    Retorna as seções do documento, dividindo as maiores que 'max_chars' em janelas de linhas.
+    """
+    lines = content_lines(documentation)
+    pieces = []
+    for section in get_section_index(documentation):
+        start = section.start
+        size = 0
+        for number in range(section.start, section.end + 1):
+            length = len(lines[number - 1]) + 1
+            if size and size + length > max_chars:
+                pieces.append(Section(section.title, section.level, start, number - 1))
+                start, size = number, 0
+            size += length
+        pieces.append(Section(section.title, section.level, start, section.end))
+    return pieces
+
+def build_chunk_inputs(commit_diff, documentation, max_chars=CHUNK_MAX_CHARS, token_budget=CHUNK_TOKEN_BUDGET):
+    """
+    Monta as entradas (diff, documentação enumerada) de cada parte.
+    Cada parte do diff é acompanhada das seções da documentação mais relevantes para ela.
+    Partes que excederiam o orçamento total de tokens são descartadas e registradas no log.
+
+    Retorna:
+        tuple: (lista de entradas, quantidade de partes do diff descartadas)
+    """
+    pieces = split_documentation(documentation, max_chars)
+    inputs = []
+    used = 0
+    diff_chunks = split_diff(commit_diff, max_chars)
+    for i, chunk in enumerate(diff_chunks):
+        sections = select_sections(documentation, chunk, budget=max_chars, sections=pieces)
+        documentation_part = enumerate_sections(documentation, sections)
+        tokens = estimate_tokens(chunk) + estimate_tokens(documentation_part)
+        if used + tokens > token_budget:
+            logging.error(f"Orçamento de tokens excedido: {len(diff_chunks) - i} parte(s) do diff não serão processadas.")
+            return inputs, len(diff_chunks) - i
+        inputs.append((chunk, documentation_part))
+        used += tokens
+    return inputs, 0
+
+def merge_changes(responses):
+    """
+    Combina as listas 'alteracoes' retornadas por cada parte em uma única lista ordenada.
+
+    Alterações com intervalos inválidos são descartadas. Em caso de sobreposição, a resolução é
+    determinística: as alterações são ordenadas por (inicio, fim, parte, conteúdo) e prevalece a
+    primeira; as seguintes que se sobrepõem a ela são descartadas e registradas no log.
+    """
+    candidates = []
+    for position, response in enumerate(responses):
+        if not isinstance(response, dict):
+            continue
+        for change in response.get("alteracoes", []) or []:
+            try:
+                inicio, fim = int(change["inicio"]), int(change["fim"])
+                novo_conteudo = str(change.get("novo_conteudo", ""))
+            except (KeyError, TypeError, ValueError):
+                logging.error(f"Alteração inválida descartada: {change}")
+                continue
+            if inicio < 1 or fim < inicio - 1:
+                logging.error(f"Alteração com intervalo inválido descartada: {inicio}-{fim}")
+                continue
+            candidates.append((inicio, fim, position, novo_conteudo))
+
+    merged = []
+    last_end = 0
+    for inicio, fim, position, novo_conteudo in sorted(candidates):
+        if merged and inicio <= last_end:
+            logging.error(f"Alteração sobreposta descartada: {inicio}-{fim} (parte {position + 1})")
+            continue
+        merged.append({"inicio": inicio, "fim": fim, "novo_conteudo": novo_conteudo})
+        last_end = max(last_end, fim)
+    return {"alteracoes": merged}
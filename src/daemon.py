@@ -0,0 +1,162 @@
+# Standard libraries
+import json
+import logging
+import os
+import socket
+import socketserver
+import sys
+import threading
+from collections import deque
+
+# Auxiliary Functions
+from UpdateDocs import run
+from request import server_init, ui_build_available, SERVER_URL
+from interface_controller import ReactManager
+from llm_chain import get_scheduler
+from hook_client import SOCKET_PATH
+from edit_engine import write_atomic
+
+# Arquivo com os jobs pendentes, preservados entre reinicializações do daemon
+JOBS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "daemon_jobs.json")
+
+class JobQueue:
+    """
+    Fila persistente de jobs (repo_path, revision) processados em ordem de chegada.
+    Jobs repetidos (pendentes ou em execução) são ignorados. Um job só é removido do arquivo
+    após ser concluído, de modo que jobs interrompidos são retomados quando o daemon reinicia.
+    """
+    def __init__(self, path=JOBS_PATH):
+        self.path = path
+        self.jobs = deque()
+        self.running = None
+        self.condition = threading.Condition()
+        for job in self.load():
+            self.put(*job)
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as jobs_file:
+                return [tuple(job) for job in json.load(jobs_file)]
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            logging.error(f"Erro ao ler os jobs pendentes do daemon: {e}")
+            return []
+
+    def persist(self):
+        jobs = ([list(self.running)] if self.running else []) + [list(job) for job in self.jobs]
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            write_atomic(self.path, json.dumps(jobs))
+        except OSError as e:
+            logging.error(f"Erro ao gravar os jobs pendentes do daemon: {e}")
+
+    def put(self, repo_path, revision):
+        """
+        Adiciona um job à fila. Retorna False se o mesmo job já estiver pendente ou em execução.
+        """
+        job = (os.path.realpath(repo_path), revision)
+        with self.condition:
+            if job == self.running or job in self.jobs:
+                return False
+            self.jobs.append(job)
+            self.persist()
+            self.condition.notify()
+            return True
+
+    def get(self):
+        """
+        Bloqueia até haver um job e o marca como em execução.
+        """
+        with self.condition:
+            while not self.jobs:
+                self.condition.wait()
+            self.running = self.jobs.popleft()
+            return self.running
+
+    def done(self):
+        with self.condition:
+            self.running = None
+            self.persist()
+
+class HookHandler(socketserver.StreamRequestHandler):
+    # Recebe uma linha JSON {"repo_path": ..., "revision": ...} e responde imediatamente
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8"))
+            queued = self.server.jobs.put(request["repo_path"], request["revision"])
+            response = {"status": "queued" if queued else "duplicate"}
+        except (ValueError, KeyError, TypeError) as e:
+            logging.error(f"Requisição inválida recebida pelo daemon: {e}")
+            response = {"status": "invalid"}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, jobs):
+        self.jobs = jobs
+        super().__init__(socket_path, HookHandler)
+
+def worker(jobs, interface):
+    # Processa um job por vez, pois a revisão é feita em uma única interface, mantida aberta entre os jobs
+    while True:
+        repo_path, revision = jobs.get()
+        try:
+            run(repo_path, revision, interface)
+        except Exception as e:
+            logging.error(f"Erro ao processar {revision} em {repo_path}: {e}")
+        finally:
+            jobs.done()
+
+def remove_stale_socket(socket_path):
+    """
+    Remove um socket deixado por uma execução anterior, desde que nenhum daemon esteja respondendo nele.
+    Lança RuntimeError se outro daemon estiver em execução no mesmo caminho.
+    """
+    if not os.path.exists(socket_path):
+        return
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            probe.connect(socket_path)
+    except ConnectionRefusedError:
+        os.remove(socket_path)
+        return
+    raise RuntimeError(f"Já existe um daemon em execução em {socket_path}")
+
+def main():
+    os.makedirs(os.path.dirname(SOCKET_PATH), exist_ok=True)
+    remove_stale_socket(SOCKET_PATH)
+
+    # Mantém o cliente do modelo, o servidor de revisão e a interface ativos entre commits
+    get_scheduler()
+    server_init()
+    interface = ReactManager(os.path.dirname(os.path.abspath(__file__)), SERVER_URL, ui_build_available())
+
+    # O socket aceita jobs de qualquer repositório: apenas o dono do processo pode se conectar.
+    # A máscara evita a janela entre a criação do socket e o chmod
+    jobs = JobQueue()
+    previous_umask = os.umask(0o177)
+    try:
+        server = DaemonServer(SOCKET_PATH, jobs)
+    finally:
+        os.umask(previous_umask)
+    os.chmod(SOCKET_PATH, 0o600)
+    threading.Thread(target=worker, args=(jobs, interface), daemon=True).start()
+
+    with server:
+        print(f"Daemon do UpdateDocs aguardando commits em {SOCKET_PATH}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nInterruption received, closing...")
+        finally:
+            os.remove(SOCKET_PATH)
+            interface.stop_server()
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        logging.error(f"Erro ao executar o daemon: {e}")
+        sys.exit(1)
@@ -0,0 +1,209 @@
+# Standard libraries
+import fnmatch
+import os
+import re
+
+# Auxiliary Functions
+from chunking import estimate_tokens
+from edit_engine import content_lines
+from symbol_index import DEFINITION_PATTERN
+from metrics import registry, span
+
+# Compactação dos patches antes de montar os prompts (0 desativa)
+DIFF_COMPACTION_ENABLED = os.getenv("UPDATEDOCS_DIFF_COMPACTION", "1") != "0"
+# Linhas de contexto mantidas ao redor de cada alteração
+DIFF_CONTEXT_LINES = int(os.getenv("UPDATEDOCS_DIFF_CONTEXT", "1"))
+# Hunks com mais linhas alteradas que o limite são resumidos
+DIFF_HUNK_MAX_LINES = int(os.getenv("UPDATEDOCS_DIFF_HUNK_MAX_LINES", "120"))
+
+# Arquivos gerados ou de travamento de dependências: o patch é substituído por um resumo
+GENERATED_PATTERNS = (
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "Pipfile.lock", "Cargo.lock",
+    "Gemfile.lock", "composer.lock", "go.sum", "uv.lock", "*.min.js", "*.min.css", "*.map",
+    "*_pb2.py", "*.pb.go", "*.generated.*"
+)
+
+# Arquivos em que a indentação tem significado: alterações apenas de indentação nunca são descartadas
+INDENTATION_SENSITIVE_PATTERNS = (
+    "*.py", "*.pyi", "*.pyx", "*.yaml", "*.yml", "*.md", "*.markdown", "*.rst", "*.coffee", "*.haml",
+    "*.pug", "*.jade", "*.sass", "*.styl", "*.nim", "*.mk", "Makefile", "GNUmakefile", "makefile"
+)
+
+HUNK_HEADER_PATTERN = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@(.*)$")
+# Linhas do cabeçalho do arquivo sem valor semântico para o modelo
+DROPPED_HEADER_PREFIXES = ("index ", "old mode ", "new mode ", "similarity index ", "dissimilarity index ")
+
+def is_generated(path):
+    """
+    Indica se o arquivo é gerado ou de travamento de dependências (ex.: package-lock.json, *.min.js).
+    """
+    name = path.rsplit("/", 1)[-1]
+    return any(fnmatch.fnmatch(name, pattern) for pattern in GENERATED_PATTERNS)
+
+def is_indentation_sensitive(path):
+    """
+    Indica se a indentação do arquivo tem significado (ex.: Python, YAML, Makefile, Markdown).
+    """
+    name = path.rsplit("/", 1)[-1]
+    return any(fnmatch.fnmatch(name, pattern) for pattern in INDENTATION_SENSITIVE_PATTERNS)
+
+def parse_hunk(header, lines):
+    """
+    Associa a cada linha do hunk os números das linhas antiga e nova correspondentes.
+
+    Retorna:
+        tuple: (texto após o segundo '@@', lista de tuplas (linha, número antigo, número novo))
+    """
+    match = HUNK_HEADER_PATTERN.match(header)
+    old_number, new_number = int(match.group(1)), int(match.group(3))
+    # Hunks sem linhas em um dos lados (ex.: '-0,0') apontam para a linha anterior
+    if match.group(2) == "0":
+        old_number += 1
+    if match.group(4) == "0":
+        new_number += 1
+    entries = []
+    for line in lines:
+        entries.append((line, old_number, new_number))
+        if line.startswith("\\"):
+            continue
+        if line[:1] in (" ", "-", ""):
+            old_number += 1
+        if line[:1] in (" ", "+", ""):
+            new_number += 1
+    return match.group(5), entries
+
+def is_formatting_only(entries, keep_indentation=True):
+    """
+    Indica se as alterações de um trecho mudam apenas espaços no fim das linhas e finais de linha ('\r\n').
+    Com 'keep_indentation=False', alterações apenas de indentação também são consideradas formatação.
+    As linhas são comparadas uma a uma: espaços internos (ex.: em strings) e quebras de linha são preservados.
+    """
+    def normalize(line):
+        return line[1:].rstrip() if keep_indentation else line[1:].strip()
+
+    removed = [normalize(line) for line, _, _ in entries if line.startswith("-")]
+    added = [normalize(line) for line, _, _ in entries if line.startswith("+")]
+    return removed == added
+
+def summarize_changes(entries, max_lines):
+    """
+    Resume um trecho com mais de 'max_lines' linhas alteradas: mantém as primeiras linhas alteradas,
+    as definições (funções, classes) do restante e uma linha com a quantidade de linhas omitidas.
+    """
+    changed = [i for i, (line, _, _) in enumerate(entries) if line[:1] in ("+", "-")]
+    if len(changed) <= max_lines:
+        return [line for line, _, _ in entries]
+
+    keep = set(changed[:max_lines // 2])
+    omitted = {"+": 0, "-": 0}
+    lines = []
+    for i, (line, _, _) in enumerate(entries):
+        if line[:1] not in ("+", "-") or i in keep or DEFINITION_PATTERN.search(line):
+            lines.append(line)
+            continue
+        if not any(omitted.values()):
+            lines.append(None)  # Posição do resumo
+        omitted[line[0]] += 1
+    summary = f"... [{omitted['+'] + omitted['-']} linha(s) omitida(s): {omitted['+']} adicionada(s), {omitted['-']} removida(s)]"
+    return [summary if line is None else line for line in lines]
+
+def compact_hunk(header, lines, context=DIFF_CONTEXT_LINES, max_lines=DIFF_HUNK_MAX_LINES, keep_indentation=True):
+    """
+    Reduz o contexto de um hunk a 'context' linhas, dividindo-o nos trechos alterados, descarta os trechos
+    que só alteram formatação (ver 'is_formatting_only') e resume os trechos muito grandes.
+
+    Retorna:
+        list: Linhas dos hunks resultantes, com cabeçalhos '@@' recalculados (vazia se nada restar).
+    """
+    section, entries = parse_hunk(header, lines)
+    changed = [i for i, (line, _, _) in enumerate(entries) if line[:1] in ("+", "-")]
+
+    # Agrupa as alterações separadas por até 2 * context linhas inalteradas
+    groups = []
+    for i in changed:
+        if groups and i - groups[-1][1] <= 2 * context + 1:
+            groups[-1][1] = i
+        else:
+            groups.append([i, i])
+
+    result = []
+    for first, last in groups:
+        start = max(0, first - context)
+        end = min(len(entries), last + context + 1)
+        # O marcador '\ No newline at end of file' acompanha a linha anterior
+        while end < len(entries) and entries[end][0].startswith("\\"):
+            end += 1
+        part = entries[start:end]
+        if is_formatting_only(part, keep_indentation):
+            continue
+        old_count = sum(1 for line, _, _ in part if line[:1] in (" ", "-", ""))
+        new_count = sum(1 for line, _, _ in part if line[:1] in (" ", "+", ""))
+        old_start = part[0][1] if old_count else part[0][1] - 1
+        new_start = part[0][2] if new_count else part[0][2] - 1
+        result.append(f"@@ -{old_start},{old_count} +{new_start},{new_count} @@{section}")
+        result.extend(summarize_changes(part, max_lines))
+    return result
+
+def compact_patch(path, patch, context=DIFF_CONTEXT_LINES, max_lines=DIFF_HUNK_MAX_LINES):
+    """
+    Compacta o patch de um arquivo: remove as linhas 'index' e de modo do cabeçalho, reduz o contexto,
+    descarta os hunks que só alteram formatação e resume hunks muito grandes e arquivos gerados.
+    As alterações semânticas (linhas adicionadas e removidas) são preservadas.
+
+    Retorna:
+        str: Patch compactado. Se todas as alterações forem de formatação, o cabeçalho do arquivo
+             é mantido com uma nota, de modo que o arquivo nunca desaparece da revisão.
+    """
+    header = []
+    hunks = []
+    for line in content_lines(patch):
+        if line.startswith("@@"):
+            hunks.append([line])
+        elif hunks:
+            hunks[-1].append(line)
+        elif not line.startswith(DROPPED_HEADER_PREFIXES):
+            header.append(line)
+
+    if is_generated(path):
+        added = sum(1 for hunk in hunks for line in hunk[1:] if line.startswith("+"))
+        removed = sum(1 for hunk in hunks for line in hunk[1:] if line.startswith("-"))
+        header.append(f"... [arquivo gerado: {added} linha(s) adicionada(s) e {removed} removida(s) omitidas]")
+        return "\n".join(header) + "\n"
+
+    # Patches sem hunks (ex.: arquivos binários, renomeações puras) mantêm apenas o cabeçalho
+    if not hunks:
+        return "\n".join(header) + "\n"
+
+    keep_indentation = is_indentation_sensitive(path)
+    lines = []
+    for hunk in hunks:
+        lines.extend(compact_hunk(hunk[0], hunk[1:], context, max_lines, keep_indentation))
+    if not lines:
+        changed = sum(1 for hunk in hunks for line in hunk[1:] if line[:1] in ("+", "-"))
+        header.append(f"... [{changed} linha(s) com alterações apenas de formatação (espaços, finais de linha) omitidas]")
+    return "\n".join(header + lines) + "\n"
+
+def compact_patches(patches, context=DIFF_CONTEXT_LINES, max_lines=DIFF_HUNK_MAX_LINES):
+    """
+    Compacta os patches da revisão antes da montagem dos prompts e do cálculo das chaves do cache.
+    A redução estimada de tokens de cada arquivo é registrada no trace (span "diff_compaction")
+    e nos contadores de '/metrics'.
+
+    Parâmetros:
+        patches (dict): Patches retornados por 'get_revision_patches'.
+
+    Retorna:
+        dict: Patches compactados, na mesma ordem e com os mesmos arquivos.
+    """
+    if not DIFF_COMPACTION_ENABLED:
+        return patches
+    compacted = {}
+    for path, patch in patches.items():
+        with span("diff_compaction", file=path) as attributes:
+            result = compacted[path] = compact_patch(path, patch, context, max_lines)
+            tokens_before, tokens_after = estimate_tokens(patch), estimate_tokens(result)
+            attributes.update(tokens_before=tokens_before, tokens_after=tokens_after,
+                              saved_pct=round((tokens_before - tokens_after) / tokens_before * 100, 1))
+        registry.inc("updatedocs_diff_tokens_total", tokens_before, stage="raw")
+        registry.inc("updatedocs_diff_tokens_total", tokens_after, stage="compacted")
+    return compacted
@@ -0,0 +1,214 @@
+# Standard libraries
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import re
+import threading
+from collections import OrderedDict
+
+# Auxiliary Functions
+from git_access import get_tree_hash, list_tree
+from edit_engine import write_atomic
+
+# Extensões de arquivos de código-fonte suportadas pela regra padrão
+SOURCE_EXTENSIONS = [".java", ".py", ".js", ".ts", ".jsx", ".tsx", ".c",
+                  ".cpp", ".cs", ".html", ".rb", ".r", ".php", ".go", ".rs",
+                  ".swift", ".sql"] # Pode ser expandido para outras extensões
+
+# Arquivo de configuração opcional, na raiz do repositório documentado
+CONFIG_FILE = ".updatedocs.json"
+
+# Diretório do cache dos índices, um arquivo por árvore (tree) do Git
+INDEX_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "doc_index")
+# Versão do formato do índice em cache (faz parte da chave, invalidando índices de versões anteriores)
+INDEX_VERSION = 2
+# Índices mantidos em memória (ex.: no daemon) e em disco; os menos usados recentemente são removidos
+MAPPER_CACHE_MAX_ENTRIES = 8
+INDEX_CACHE_MAX_FILES = int(os.getenv("UPDATEDOCS_INDEX_CACHE_MAX_FILES", "50"))
+
+# Regra padrão: a primeira pasta "src" do caminho é trocada por "docs" e a extensão por ".md"
+# (ex.: src/utils/Helper.py -> docs/utils/Helper.md; pkg/src/resources/a.py -> pkg/docs/resources/a.md)
+DEFAULT_RULES = [{
+    "regex": r"^(?P<prefix>(?:[^/]+/)*?)src/(?P<rest>.+)(?:"
+             + "|".join(re.escape(ext) for ext in SOURCE_EXTENSIONS) + r")$",
+    "docs": ["{prefix}docs/{rest}.md"]
+}]
+
+class MappingRule:
+    """
+    Regra de mapeamento de arquivos de código-fonte para arquivos de documentação.
+
+    A regra é definida por um padrão 'glob' ou 'regex' (aplicado ao caminho relativo à raiz
+    do repositório) e por uma lista de modelos 'docs'. Os modelos aceitam os campos {path}, {dir},
+    {name}, {stem} e {ext} do arquivo de origem e, em regras 'regex', os grupos nomeados do padrão.
+    """
+    def __init__(self, definition):
+        if "regex" in definition:
+            self.pattern = re.compile(definition["regex"])
+        elif "glob" in definition:
+            self.pattern = re.compile(fnmatch.translate(definition["glob"]))
+        else:
+            raise ValueError(f"Regra de mapeamento sem 'glob' ou 'regex': {definition}")
+        self.templates = definition.get("docs") or []
+        if isinstance(self.templates, str):
+            self.templates = [self.templates]
+
+    def apply(self, path):
+        """
+        Retorna os caminhos de documentação candidatos para o arquivo ou uma lista vazia se a regra não se aplica.
+        """
+        match = self.pattern.match(path)
+        if not match:
+            return []
+        directory, name = posixpath.split(path)
+        stem, ext = posixpath.splitext(name)
+        fields = {"path": path, "dir": directory, "name": name, "stem": stem, "ext": ext}
+        fields.update({key: value or "" for key, value in match.groupdict().items()})
+        candidates = []
+        for template in self.templates:
+            try:
+                candidates.append(posixpath.normpath(template.format(**fields)).lstrip("/"))
+            except (KeyError, IndexError) as e:
+                logging.error(f"Modelo de documentação inválido '{template}': {e}")
+        return candidates
+
+def load_rules(repo_path):
+    """
+    Carrega as regras de mapeamento do arquivo '.updatedocs.json' do repositório.
+    Sem o arquivo (ou sem a chave "mappings"), utiliza a regra padrão.
+
+    Exemplo de configuração:
+        {"mappings": [
+            {"glob": "lib/*.py", "docs": ["docs/api/{stem}.md", "README.md"]},
+            {"regex": "^services/(?P<service>[^/]+)/.*\\\\.go$", "docs": ["docs/services/{service}.md"]}
+        ]}
+    """
+    definitions = DEFAULT_RULES
+    config_path = os.path.join(repo_path, CONFIG_FILE)
+    if os.path.isfile(config_path):
+        try:
+            with open(config_path, "r", encoding="utf-8") as config_file:
+                definitions = json.load(config_file).get("mappings", DEFAULT_RULES)
+        except (OSError, ValueError) as e:
+            logging.error(f"Erro ao ler o arquivo de configuração {config_path}: {e}")
+    return definitions
+
+class DocMapper:
+    """
+    Índice de mapeamento código-fonte -> documentação de uma árvore do repositório.
+    Construído a partir de uma única listagem do Git e consultado em O(1) por arquivo.
+    Um arquivo de código-fonte pode alimentar vários documentos.
+    'files' associa cada arquivo da árvore ao hash do seu blob. Com 'repo_path', os documentos que existem
+    apenas na árvore de trabalho (ex.: ainda não versionados) também são considerados na consulta.
+    """
+    def __init__(self, definitions, files, index=None, repo_path=None):
+        self.rules = [MappingRule(definition) for definition in definitions]
+        self.files = files if isinstance(files, dict) else dict.fromkeys(files)
+        self.repo_path = repo_path
+        self.index = index
+        if self.index is None:
+            self.index = {}
+            for path in self.files:
+                docs = self.resolve(path)
+                if docs:
+                    self.index[path] = docs
+
+    def candidates(self, path):
+        # Aplica todas as regras e retorna os documentos gerados, sem repetições
+        docs = []
+        for rule in self.rules:
+            for doc in rule.apply(path):
+                if doc != path and doc not in docs:
+                    docs.append(doc)
+        return docs
+
+    def resolve(self, path):
+        # Mantém apenas os documentos existentes na árvore
+        return [doc for doc in self.candidates(path) if doc in self.files]
+
+    def lookup(self, path):
+        """
+        Retorna os documentos (caminhos relativos) associados ao arquivo de código-fonte.
+        Arquivos fora da árvore (ex.: removidos no commit) são resolvidos sob demanda, assim como
+        os documentos presentes apenas na árvore de trabalho.
+        """
+        if path in self.index:
+            docs = list(self.index[path])
+        else:
+            docs = [] if path in self.files else self.resolve(path)
+        if self.repo_path:
+            docs += [doc for doc in self.candidates(path)
+                     if doc not in self.files and os.path.isfile(os.path.join(self.repo_path, doc))]
+        return docs
+
+mapper_cache = OrderedDict()
+mapper_lock = threading.Lock()
+
+def prune_index_cache(max_files=INDEX_CACHE_MAX_FILES):
+    """
+    Remove do diretório de cache os índices menos usados recentemente (pela data de modificação,
+    atualizada a cada leitura) até restarem 'max_files' arquivos.
+    """
+    try:
+        entries = [entry for entry in os.scandir(INDEX_CACHE_DIR) if entry.name.endswith(".json")]
+    except FileNotFoundError:
+        return
+    if len(entries) <= max_files:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in entries[:len(entries) - max_files]:
+        try:
+            os.remove(entry.path)
+        except OSError as e:
+            logging.error(f"Erro ao remover o índice de mapeamento em cache {entry.path}: {e}")
+
+def get_doc_mapper(repo_path, revision="HEAD"):
+    """
+    Retorna o índice de mapeamento da árvore de 'revision', reaproveitando o índice em memória
+    ou em disco quando a árvore e as regras não mudaram.
+    Os dois caches são limitados (MAPPER_CACHE_MAX_ENTRIES e INDEX_CACHE_MAX_FILES).
+    """
+    definitions = load_rules(repo_path)
+    rules_hash = hashlib.sha256(json.dumps(definitions, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    tree_hash = get_tree_hash(repo_path, revision)
+    key = f"{tree_hash}-{rules_hash}-v{INDEX_VERSION}"
+
+    # Em memória, o índice também depende do repositório (documentos presentes apenas na árvore de trabalho)
+    memory_key = (os.path.realpath(repo_path), key)
+    with mapper_lock:
+        if memory_key in mapper_cache:
+            mapper_cache.move_to_end(memory_key)
+            return mapper_cache[memory_key]
+
+    cache_path = os.path.join(INDEX_CACHE_DIR, f"{key}.json")
+    mapper = None
+    try:
+        with open(cache_path, "r", encoding="utf-8") as cache_file:
+            cached = json.load(cache_file)
+        mapper = DocMapper(definitions, cached["files"], cached["index"], repo_path)
+        os.utime(cache_path)  # Marca o índice como usado recentemente
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError) as e:
+        logging.error(f"Erro ao ler o índice de mapeamento em cache: {e}")
+
+    if mapper is None:
+        files = list_tree(repo_path, tree_hash)
+        mapper = DocMapper(definitions, files, repo_path=repo_path)
+        try:
+            os.makedirs(INDEX_CACHE_DIR, exist_ok=True)
+            # Gravação atômica: execuções simultâneas (ex.: daemon e hook) nunca leem um índice truncado
+            write_atomic(cache_path, json.dumps({"files": files, "index": mapper.index}))
+        except OSError as e:
+            logging.error(f"Erro ao gravar o índice de mapeamento em cache: {e}")
+        prune_index_cache()
+
+    with mapper_lock:
+        mapper_cache[memory_key] = mapper
+        mapper_cache.move_to_end(memory_key)
+        while len(mapper_cache) > MAPPER_CACHE_MAX_ENTRIES:
+            mapper_cache.popitem(last=False)
+    return mapper
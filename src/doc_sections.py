@@ -0,0 +1,156 @@
+# Standard libraries
+import hashlib
+import re
+import threading
+from collections import OrderedDict, namedtuple
+
+# Auxiliary Functions
+from edit_engine import content_lines
+
+# Documentos acima deste tamanho (em caracteres) têm apenas as seções relevantes enviadas ao modelo
+SECTION_SELECTION_THRESHOLD = 20000
+# Tamanho máximo aproximado do trecho selecionado
+SECTION_BUDGET = 20000
+# Quantidade de índices mantidos em memória
+INDEX_CACHE_SIZE = 256
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]{2,}")
+CAMEL_CASE_PATTERN = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+# Seção do documento; 'start' e 'end' são números de linha (base 1, inclusivos)
+Section = namedtuple("Section", ["title", "level", "start", "end"])
+
+index_cache = OrderedDict()
+index_lock = threading.Lock()
+
+def parse_sections(lines):
+    """
+    Constrói a lista de seções de um documento Markdown a partir dos cabeçalhos ATX ('#').
+    Cabeçalhos dentro de blocos de código são ignorados. O texto anterior ao primeiro
+    cabeçalho forma uma seção de nível 0 e cada seção termina antes do próximo cabeçalho.
+    """
+    headings = []
+    in_fence = False
+    for number, line in enumerate(lines, start=1):
+        if FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+        match = HEADING_PATTERN.match(line)
+        if match:
+            headings.append((number, len(match.group(1)), match.group(2)))
+
+    sections = []
+    if not headings or headings[0][0] > 1:
+        first = headings[0][0] - 1 if headings else len(lines)
+        if first >= 1:
+            sections.append(Section("", 0, 1, first))
+    for i, (number, level, title) in enumerate(headings):
+        end = headings[i + 1][0] - 1 if i + 1 < len(headings) else len(lines)
+        sections.append(Section(title, level, number, end))
+    return sections
+
+def get_section_index(documentation):
+    """
+    Retorna o índice de seções do documento, reaproveitando o índice já calculado
+    para o mesmo conteúdo (identificado pelo seu hash).
+    """
+    key = hashlib.sha256(documentation.encode("utf-8")).hexdigest()
+    with index_lock:
+        if key in index_cache:
+            index_cache.move_to_end(key)
+            return index_cache[key]
+
+    sections = parse_sections(content_lines(documentation))
+
+    with index_lock:
+        index_cache[key] = sections
+        if len(index_cache) > INDEX_CACHE_SIZE:
+            index_cache.popitem(last=False)
+    return sections
+
+def tokenize(text):
+    """
+    Extrai os termos de um texto em minúsculas, separando também partes de snake_case e camelCase.
+    """
+    terms = set()
+    for identifier in IDENTIFIER_PATTERN.findall(text):
+        terms.add(identifier.lower())
+        for part in re.split(r"_+", CAMEL_CASE_PATTERN.sub("_", identifier)):
+            if len(part) > 2:
+                terms.add(part.lower())
+    return terms
+
+def diff_terms(commit_diff):
+    """
+    Extrai os termos relevantes de um diff: caminhos dos arquivos e identificadores das linhas alteradas.
+    """
+    terms = set()
+    for line in content_lines(commit_diff):
+        if line.startswith(("+++ ", "--- ", "diff --git ")):
+            terms |= tokenize(line.replace("/", " ").replace(".", " "))
+        elif line.startswith(("+", "-")):
+            terms |= tokenize(line[1:])
+        elif line.startswith("@@"):
+            # O contexto do cabeçalho do hunk costuma conter a função alterada
+            terms |= tokenize(line.split("@@")[-1])
+    return terms
+
+def rank_sections(sections, lines, terms):
+    """
+    Ordena as seções pela relevância em relação aos termos do diff.
+    A pontuação conta os termos em comum, com peso maior para termos presentes no título.
+    """
+    scored = []
+    for position, section in enumerate(sections):
+        body = tokenize("\n".join(lines[section.start - 1:section.end]))
+        title = tokenize(section.title)
+        score = len(body & terms) + 3 * len(title & terms)
+        scored.append((-score, position, section))
+    scored.sort()
+    return [(section, -score) for score, _, section in scored]
+
+def select_sections(documentation, commit_diff, budget=SECTION_BUDGET, sections=None):
+    """
+    Seleciona as seções mais relevantes do documento para o diff, respeitando o limite de caracteres.
+    Por padrão utiliza o índice de seções do documento; 'sections' permite informar outra divisão.
+
+    Retorna:
+        list: Seções selecionadas, em ordem de aparição no documento.
+    """
+    lines = content_lines(documentation)
+    if sections is None:
+        sections = get_section_index(documentation)
+    terms = diff_terms(commit_diff)
+
+    selected = []
+    used = 0
+    for section, score in rank_sections(sections, lines, terms):
+        size = sum(len(line) + 1 for line in lines[section.start - 1:section.end])
+        # A seção mais relevante é sempre incluída; as demais apenas se houver relação e espaço
+        if selected and (score == 0 or used + size > budget):
+            continue
+        selected.append(section)
+        used += size
+    return sorted(selected, key=lambda section: section.start)
+
+def enumerate_sections(documentation, sections):
+    """
+    Enumera apenas as linhas das seções informadas, preservando a numeração original do documento,
+    para que os intervalos 'inicio'/'fim' retornados pela IA continuem válidos no arquivo completo.
+    Trechos omitidos são indicados por '...'.
+    """
+    lines = content_lines(documentation)
+    output = []
+    next_line = 1
+    for section in sections:
+        if section.start > next_line:
+            output.append("...")
+        output.extend(f"{number}: {lines[number - 1]}" for number in range(section.start, section.end + 1))
+        next_line = section.end + 1
+    if next_line <= len(lines):
+        output.append("...")
+    return "\n".join(output)
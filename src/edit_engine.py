@@ -0,0 +1,170 @@
+# Standard libraries
+import difflib
+import logging
+import os
+import tempfile
+
+# Linhas de contexto exibidas ao redor de cada alteração na interface
+DIFF_CONTEXT_LINES = 3
+
+class EditError(ValueError):
+    pass
+
+def split_lines(text):
+    # Mesma divisão usada pela interface: um texto terminado em '\n' tem uma última linha vazia.
+    # Apenas '\n' separa as linhas: '\r', '\x0c' e '\u2028' fazem parte do conteúdo (ao contrário de str.splitlines)
+    return text.split("\n")
+
+def content_lines(text):
+    """
+    Linhas de 'split_lines' sem a linha vazia que segue a quebra final. Usada na numeração exibida ao modelo,
+    no índice de seções e na divisão de diffs, de modo que os números de linha coincidem com os aplicados.
+    """
+    lines = split_lines(text)
+    if lines[-1] == "":
+        lines.pop()
+    return lines
+
+def validate_edit(change, line_count):
+    """
+    Valida uma alteração {"inicio", "fim", "novo_conteudo"} contra um documento com 'line_count' linhas.
+    'inicio' e 'fim' são inclusivos e começam em 1; 'fim' = 'inicio' - 1 indica uma inserção antes de 'inicio'.
+    Lança EditError se a alteração for inválida e retorna a tupla normalizada (inicio, fim, novo_conteudo).
+    """
+    try:
+        start, end, content = change["inicio"], change["fim"], change["novo_conteudo"]
+    except (KeyError, TypeError):
+        raise EditError(f"Alteração incompleta: {change}")
+    if isinstance(start, bool) or isinstance(end, bool) or not isinstance(start, int) or not isinstance(end, int):
+        raise EditError(f"Linhas não inteiras na alteração: {start}-{end}")
+    if not isinstance(content, str):
+        raise EditError(f"Conteúdo inválido na alteração {start}-{end}")
+    if start < 1 or start > line_count + 1:
+        raise EditError(f"Linha inicial fora do documento ({line_count} linhas): {start}")
+    if end < start - 1 or end > line_count:
+        raise EditError(f"Linha final inválida para a alteração iniciada em {start}: {end}")
+    return start, end, content
+
+def normalize_edits(alteracoes, line_count):
+    """
+    Valida as alterações e as ordena por posição, descartando as inválidas e as que se sobrepõem
+    a uma alteração anterior (a primeira alteração de cada trecho é mantida).
+
+    Retorna:
+        tuple: (lista de tuplas (inicio, fim, novo_conteudo) ordenadas, lista de mensagens dos problemas encontrados)
+    """
+    edits = []
+    problems = []
+    for change in alteracoes or []:
+        try:
+            edits.append(validate_edit(change, line_count))
+        except EditError as e:
+            problems.append(str(e))
+
+    # Inserções (fim < inicio) vêm antes de substituições que começam na mesma linha
+    edits.sort(key=lambda edit: (edit[0], edit[1]))
+    accepted = []
+    last_end = 0
+    for start, end, content in edits:
+        if start <= last_end:
+            problems.append(f"Alteração {start}-{end} sobreposta a uma alteração anterior")
+            continue
+        accepted.append((start, end, content))
+        last_end = max(last_end, end)
+    return accepted, problems
+
+def apply_edits(text, edits):
+    """
+    Aplica alterações já normalizadas ('normalize_edits') em uma única passagem sobre as linhas do documento.
+    O custo é linear no tamanho do documento e das alterações.
+    """
+    lines = split_lines(text)
+    result = []
+    position = 0
+    for start, end, content in edits:
+        result.extend(lines[position:start - 1])
+        result.append(content)
+        position = max(position, end)
+    result.extend(lines[position:])
+    return "\n".join(result)
+
+def compute_hunks(text, edits, context=DIFF_CONTEXT_LINES):
+    """
+    Gera um diff compacto das alterações para a interface, sem enviar o documento inteiro.
+
+    Retorna:
+        list: Um dicionário por alteração com "inicio", "fim", "contexto_antes" (linhas anteriores, a partir
+              de "linha_contexto"), "removidas", "novo_conteudo" e "contexto_depois". Linhas de contexto
+              nunca se repetem entre alterações vizinhas.
+    """
+    lines = content_lines(text)
+    hunks = []
+    shown = 0  # Última linha (base 1) já exibida
+    for i, (start, end, content) in enumerate(edits):
+        context_start = max(shown + 1, start - context)
+        next_start = edits[i + 1][0] if i + 1 < len(edits) else len(lines) + 1
+        context_end = min(max(end, start - 1) + context, next_start - 1, len(lines))
+        hunks.append({
+            "inicio": start,
+            "fim": end,
+            "linha_contexto": context_start,
+            "contexto_antes": lines[context_start - 1:start - 1],
+            "removidas": lines[start - 1:end],
+            "novo_conteudo": content,
+            "contexto_depois": lines[max(end, start - 1):context_end]
+        })
+        shown = max(shown, context_end)
+    return hunks
+
+def unified_diff(path, old, new, context=DIFF_CONTEXT_LINES):
+    """
+    Gera o diff unificado entre duas versões de um arquivo, no formato do 'git diff' (aplicável com 'git apply').
+    Retorna uma string vazia se as versões forem iguais.
+    """
+    def with_ends(text):
+        # Linhas com a quebra '\n' preservada, divididas como em 'split_lines'
+        lines = split_lines(text)
+        return [line + "\n" for line in lines[:-1]] + ([lines[-1]] if lines[-1] else [])
+
+    lines = []
+    for line in difflib.unified_diff(with_ends(old), with_ends(new), f"a/{path}", f"b/{path}", n=context):
+        # Linhas sem quebra final recebem o marcador usado pelo Git
+        lines.append(line if line.endswith("\n") else f"{line}\n\\ No newline at end of file\n")
+    if not lines:
+        return ""
+    return f"diff --git a/{path} b/{path}\n" + "".join(lines)
+
+def write_atomic(path, contents):
+    """
+    Grava o arquivo de forma atômica: o conteúdo é escrito em um arquivo temporário no mesmo diretório,
+    sincronizado com o disco e renomeado sobre o original. Uma interrupção nunca deixa o arquivo truncado.
+    As permissões do arquivo original são preservadas.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=".updatedocs-", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "w", encoding="utf-8") as temp_file:
+            temp_file.write(contents)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        try:
+            os.chmod(temp_path, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            # Arquivo novo: permissões usuais em vez das permissões restritas do arquivo temporário
+            os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    # Sincroniza o diretório para persistir a renomeação (indisponível no Windows)
+    if hasattr(os, "O_DIRECTORY"):
+        try:
+            directory_descriptor = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(directory_descriptor)
+            finally:
+                os.close(directory_descriptor)
+        except OSError as e:
+            logging.error(f"Erro ao sincronizar o diretório {directory}: {e}")
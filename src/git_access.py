@@ -0,0 +1,294 @@
+# Standard libraries
+import codecs
+import logging
+import os
+import subprocess
+import tempfile
+
+# Opções comuns a todas as chamadas do Git que produzem patches:
+# caminhos sem escape de caracteres não ASCII, sem cores, sem ferramentas externas de diff e com os
+# prefixos 'a/' e 'b/' explícitos (independentes de diff.noprefix e diff.mnemonicPrefix)
+GIT_BASE_CMD = ["git", "-c", "core.quotePath=false"]
+PATCH_OPTIONS = ["--patch", "-M", "--no-color", "--no-ext-diff", "--src-prefix=a/", "--dst-prefix=b/"]
+
+def read_blobs(repo_path, object_hashes):
+    """
+    Lê o conteúdo de vários blobs com um único processo 'git cat-file --batch'.
+
+    Retorna:
+        dict: Hash de cada blob associado ao seu conteúdo em texto (UTF-8); blobs ausentes são omitidos.
+    """
+    object_hashes = list(dict.fromkeys(object_hashes))
+    if not object_hashes:
+        return {}
+    try:
+        result = subprocess.run(
+            GIT_BASE_CMD + ["cat-file", "--batch"],
+            input="\n".join(object_hashes).encode("utf-8") + b"\n",
+            capture_output=True,
+            check=True,
+            cwd=repo_path
+        )
+    except subprocess.CalledProcessError as e:
+        logging.error(f"Erro ao executar git cat-file --batch: {e.stderr}")
+        raise ValueError(f"Erro ao executar git cat-file --batch: {e.stderr.decode('utf-8', errors='replace').strip()}")
+
+    # Formato da saída: "<hash> <tipo> <tamanho>\n<conteúdo>\n" ou "<hash> missing\n"
+    contents = {}
+    output = result.stdout
+    position = 0
+    while position < len(output):
+        header_end = output.index(b"\n", position)
+        header = output[position:header_end].decode("utf-8", errors="replace").split(" ")
+        position = header_end + 1
+        if len(header) < 3:
+            continue
+        size = int(header[2])
+        contents[header[0]] = output[position:position + size].decode("utf-8", errors="replace")
+        position += size + 1
+    return contents
+
+def run_git(repo_path, args, input_text=None, env=None):
+    """
+    Executa um comando do Git no repositório informado e retorna a saída padrão.
+    'input_text' é enviado à entrada padrão e 'env' substitui as variáveis de ambiente do processo.
+    Lança ValueError com a mensagem de erro do Git em caso de falha.
+    A saída é decodificada sem o modo texto do subprocess, que converteria '\r' e '\r\n' em '\n'.
+    """
+    try:
+        result = subprocess.run(
+            GIT_BASE_CMD + args,
+            input=input_text.encode("utf-8") if input_text is not None else None,
+            env=env,
+            capture_output=True,
+            check=True,
+            cwd=repo_path
+        )
+        return result.stdout.decode("utf-8", errors="replace")
+    except subprocess.CalledProcessError as e:
+        stderr = e.stderr.decode("utf-8", errors="replace")
+        logging.error(f"Erro ao executar git {' '.join(args)}: {stderr}")
+        raise ValueError(f"Erro ao executar git {' '.join(args)}: {stderr.strip()}")
+
+def unquote_path(path):
+    """
+    Remove as aspas e os escapes no estilo C que o Git aplica a caminhos com caracteres especiais.
+    """
+    path = path.rstrip("\t")
+    if len(path) >= 2 and path.startswith('"') and path.endswith('"'):
+        raw = codecs.escape_decode(path[1:-1].encode("utf-8"))[0]
+        return raw.decode("utf-8", errors="replace")
+    return path
+
+def path_from_header(header):
+    """
+    Extrai o caminho do cabeçalho 'diff --git a/<caminho> b/<caminho>'.
+    Usado apenas quando o bloco não possui linhas '---'/'+++' nem 'rename to' (ex.: arquivos binários),
+    caso em que os dois lados do cabeçalho são idênticos.
+    """
+    rest = header[len("diff --git "):]
+    if rest.startswith('"'):
+        # Caminhos entre aspas: o lado "b/..." é o último campo entre aspas
+        return unquote_path(rest[rest.rindex(' "') + 1:])[2:]
+    # "a/P b/P" possui tamanho 2 * len(P) + 5
+    size = (len(rest) - 5) // 2
+    return rest[2:2 + size]
+
+def block_path(lines):
+    """
+    Determina o caminho de um bloco de patch.
+    Para renomeações e alterações usa o caminho novo; para exclusões, o caminho removido.
+    """
+    old_path = new_path = None
+    for line in lines[1:]:
+        if line.startswith("@@"):
+            break
+        if line.startswith("rename to "):
+            return unquote_path(line[len("rename to "):])
+        if line.startswith("--- "):
+            old_path = unquote_path(line[4:])
+        elif line.startswith("+++ "):
+            new_path = unquote_path(line[4:])
+
+    if new_path and new_path != "/dev/null":
+        return new_path[2:]
+    if old_path and old_path != "/dev/null":
+        return old_path[2:]
+    return path_from_header(lines[0])
+
+def parse_patches(output):
+    """
+    Converte a saída de 'git show'/'git diff' em um dicionário {caminho: patch}.
+
+    Parâmetros:
+        output (str): Saída completa do Git contendo um ou mais blocos 'diff --git'.
+
+    Retorna:
+        dict: Caminho de cada arquivo alterado associado ao seu patch, na ordem em que aparecem.
+              Qualquer texto anterior ao primeiro bloco (ex.: cabeçalho do commit) é descartado.
+    """
+    patches = {}
+    block = []
+
+    def flush():
+        if block:
+            patches[block_path(block)] = "\n".join(block) + "\n"
+
+    # Apenas '\n' separa as linhas: '\r', '\x0c' e '\u2028' podem fazer parte do conteúdo do arquivo
+    lines = output.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    for line in lines:
+        if line.startswith("diff --git "):
+            flush()
+            block = [line]
+        elif block:
+            block.append(line)
+    flush()
+
+    return patches
+
+def get_commit_patches(repo_path, commit_hash):
+    """
+    Obtém, em uma única chamada ao Git, os patches de todos os arquivos alterados em um commit.
+
+    Commits de merge são comparados com o primeiro pai, commits iniciais com a árvore vazia
+    e renomeações são detectadas (o patch fica associado ao caminho novo).
+    Lança ValueError se o commit for inválido.
+    """
+    output = run_git(repo_path, [
+        "show",
+        "--format=",
+        "--diff-merges=first-parent",
+        *PATCH_OPTIONS,
+        f"{commit_hash}^{{commit}}",
+        "--"
+    ])
+    return parse_patches(output)
+
+def get_range_patches(repo_path, revision_range):
+    """
+    Obtém, em uma única chamada ao Git, o diff líquido de um intervalo de commits ('A..B'),
+    com um patch por arquivo independentemente de quantos commits o alteraram.
+    Lança ValueError se o intervalo for inválido.
+    """
+    output = run_git(repo_path, ["diff", *PATCH_OPTIONS, revision_range, "--"])
+    return parse_patches(output)
+
+def get_revision_patches(repo_path, revision):
+    """
+    Obtém os patches de um commit ('<hash>') ou de um intervalo de commits ('A..B').
+    """
+    if ".." in revision:
+        return get_range_patches(repo_path, revision)
+    return get_commit_patches(repo_path, revision)
+
+def resolve_commit(repo_path, revision):
+    """
+    Retorna o hash completo do commit referenciado por 'revision' (ex.: 'HEAD').
+    """
+    return run_git(repo_path, ["rev-parse", "--verify", f"{revision}^{{commit}}"]).strip()
+
+def get_tree_hash(repo_path, revision):
+    """
+    Retorna o hash da árvore (tree) do commit referenciado por 'revision'.
+    """
+    return run_git(repo_path, ["rev-parse", "--verify", f"{revision}^{{tree}}"]).strip()
+
+def list_tree(repo_path, revision):
+    """
+    Lista, em uma única chamada ao Git, todos os arquivos da árvore de um commit.
+
+    Retorna:
+        dict: Caminho de cada arquivo associado ao hash do seu blob.
+    """
+    output = run_git(repo_path, ["ls-tree", "-r", "-z", "--full-tree", revision])
+    files = {}
+    for entry in output.split("\0"):
+        if not entry:
+            continue
+        info, path = entry.split("\t", 1)
+        _, object_type, object_hash = info.split(" ")
+        if object_type == "blob":
+            files[path] = object_hash
+    return files
+
+def write_blobs(repo_path, contents):
+    """
+    Grava vários textos como blobs no banco de objetos do repositório com um único processo
+    'git hash-object --stdin-paths'. Retorna os hashes na mesma ordem de 'contents'.
+    """
+    if not contents:
+        return []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = []
+        for i, text in enumerate(contents):
+            path = os.path.join(temp_dir, str(i))
+            with open(path, "w", encoding="utf-8", newline="") as blob_file:
+                blob_file.write(text)
+            paths.append(path)
+        output = run_git(repo_path, ["hash-object", "-w", "--no-filters", "--stdin-paths"], input_text="\n".join(paths) + "\n")
+    return output.split()
+
+def get_current_branch(repo_path):
+    """
+    Retorna o nome do branch atual do repositório ou None (HEAD destacado).
+    """
+    try:
+        return run_git(repo_path, ["symbolic-ref", "-q", "--short", "HEAD"]).strip() or None
+    except ValueError:
+        return None
+
+def get_ref(repo_path, ref):
+    """
+    Retorna o hash apontado pela referência completa 'ref' (ex.: 'refs/heads/main') ou None se ela não existir.
+    """
+    for line in run_git(repo_path, ["for-each-ref", "--format=%(objectname) %(refname)", ref]).split("\n"):
+        if line.endswith(f" {ref}"):
+            return line.split(" ", 1)[0]
+    return None
+
+def commit_files(repo_path, parent, files, message, branch):
+    """
+    Cria um commit sobre 'parent' com o novo conteúdo dos arquivos informados e aponta o branch para ele,
+    usando apenas comandos de baixo nível do Git: a árvore de trabalho e o índice do repositório não são alterados.
+
+    Parâmetros:
+        repo_path (str): Caminho do repositório.
+        parent (str): Hash do commit de origem.
+        files (dict): Caminho relativo de cada arquivo associado ao seu novo conteúdo.
+        message (str): Mensagem do commit.
+        branch (str): Nome do branch criado com o commit. Um branch existente só é atualizado se apontar
+                      para 'parent'; caso contrário é lançado ValueError e o branch não é alterado.
+
+    Retorna:
+        str: Hash do commit criado.
+    """
+    ref = f"refs/heads/{branch}"
+    current = get_ref(repo_path, ref)
+    if current is not None and current != parent:
+        logging.error(f"O branch {branch} já existe e não aponta para o commit de origem {parent}")
+        raise ValueError(f"O branch {branch} já existe e não aponta para o commit de origem {parent}")
+    paths = sorted(files)
+
+    # Mantém o modo (ex.: executável) dos arquivos existentes; arquivos novos usam 100644
+    modes = {}
+    for entry in run_git(repo_path, ["ls-tree", "-z", "--full-tree", parent, "--", *paths]).split("\0"):
+        if entry:
+            info, path = entry.split("\t", 1)
+            modes[path] = info.split(" ")[0]
+    blobs = write_blobs(repo_path, [files[path] for path in paths])
+
+    # Índice temporário: a árvore do commit de origem com os arquivos substituídos
+    with tempfile.TemporaryDirectory() as temp_dir:
+        env = dict(os.environ, GIT_INDEX_FILE=os.path.join(temp_dir, "index"))
+        run_git(repo_path, ["read-tree", parent], env=env)
+        index_info = "".join(f"{modes.get(path, '100644')} {blob}\t{path}\0" for path, blob in zip(paths, blobs))
+        run_git(repo_path, ["update-index", "-z", "--index-info"], input_text=index_info, env=env)
+        tree = run_git(repo_path, ["write-tree"], env=env).strip()
+
+    commit = run_git(repo_path, ["commit-tree", tree, "-p", parent, "-m", message]).strip()
+    # O valor antigo esperado (zeros se o branch não deve existir) impede sobrescrever um branch
+    # criado ou movido por outro processo desde a verificação acima
+    run_git(repo_path, ["update-ref", "-m", "UpdateDocs", ref, commit, current or "0" * len(parent)])
+    return commit
@@ -0,0 +1,44 @@
+"""
+Cliente do hook post-commit: envia (repo_path, revision) ao daemon do UpdateDocs e encerra.
+Importa apenas bibliotecas padrão leves para retornar em poucos milissegundos.
+
+Uso:
+    python src/hook_client.py <repo_path> <revision>
+"""
+# Standard libraries
+import json
+import os
+import socket
+import sys
+
+# Socket Unix do daemon (compartilhado com daemon.py)
+SOCKET_PATH = os.getenv(
+    "UPDATEDOCS_SOCKET",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "daemon.sock")
+)
+CLIENT_TIMEOUT = 2  # Em segundos
+
+def enqueue(repo_path, revision, socket_path=SOCKET_PATH):
+    """
+    Envia um job ao daemon e retorna a resposta (ex.: {"status": "queued"}).
+    Lança OSError se o daemon não estiver em execução.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(CLIENT_TIMEOUT)
+        client.connect(socket_path)
+        client.sendall(json.dumps({"repo_path": os.path.abspath(repo_path), "revision": revision}).encode("utf-8") + b"\n")
+        return json.loads(client.makefile("r", encoding="utf-8").readline() or "{}")
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__.strip(), file=sys.stderr)
+        sys.exit(2)
+    try:
+        response = enqueue(sys.argv[1], sys.argv[2])
+    except (OSError, ValueError) as e:
+        print(f"UpdateDocs: daemon indisponível em {SOCKET_PATH}: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"UpdateDocs: {response.get('status', 'erro')}")
+
+if __name__ == "__main__":
+    main()
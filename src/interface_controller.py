@@ -2,20 +2,47 @@ import subprocess
 import signal
 import os
 import logging
+import webbrowser
 
+log_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "errors.log")
+os.makedirs(os.path.dirname(log_path), exist_ok=True)
 logging.basicConfig(
-    filename=r'logs\errors.log', 
+    filename=log_path,
     level=logging.ERROR,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Modo da interface: "production" (build servido pelo FastAPI), "development" (npm start),
+# "none" (nenhuma interface é aberta; a revisão é feita pela API) ou "auto" (production quando o build existir)
+UI_MODE = os.getenv("UPDATEDOCS_UI_MODE", "auto")
+
 class ReactManager:
-    def __init__(self, project_path):
+    def __init__(self, project_path, ui_url=None, build_available=False, mode=UI_MODE):
         self.project_path = project_path
+        self.ui_url = ui_url
         self.process = None
+        if mode == "auto":
+            mode = "production" if build_available else "development"
+        self.mode = mode
 
     def start_server(self):
-        """Inicia o servidor React"""
+        """Inicia a interface React"""
+        if self.mode == "none":
+            return
+
+        if self.mode == "production":
+            # O build já é servido pelo FastAPI: basta abrir o navegador, sem processo Node
+            try:
+                webbrowser.open(self.ui_url)
+                print("Interface disponível em:", self.ui_url)
+            except Exception as e:
+                logging.error("Erro ao abrir a interface", exc_info=True)
+            return
+
+        # Servidor de desenvolvimento já em execução (ex.: mantido pelo daemon entre commits)
+        if self.process and self.process.poll() is None:
+            return
+
         try:
             self.process = subprocess.Popen(
                 ["npm", "start"],
@@ -2,6 +2,7 @@
 import logging
 import json
 import os
+import threading
 
 # Carrega as variáveis de ambiente do arquivo .env
 from dotenv import load_dotenv
@@ -9,9 +10,18 @@ load_dotenv()
 
 # LangChain libraries
 from langchain_google_genai import GoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.messages import HumanMessage, AIMessage
+
+# Auxiliary Functions
+from proposal_cache import cache, make_key, CACHE_ENABLED
+from doc_sections import select_sections, enumerate_sections, SECTION_SELECTION_THRESHOLD
+from chunking import build_chunk_inputs, merge_changes, CHUNK_CONCURRENCY
+from batching import build_batch_documents, split_batch_response
+from stream_parser import AlteracoesStreamParser
+from llm_scheduler import LLMScheduler, ChainProvider, FakeProvider, LLM_PROVIDER
+from metrics import span
+from edit_engine import content_lines
 
 # Configuração do log de erros
 log_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "errors.log")
@@ -22,16 +32,30 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Configurações padrão do modelo (podem ser alteradas por execução com 'configure_model')
+MODEL_NAME = os.getenv("UPDATEDOCS_MODEL", "gemini-2.0-flash-exp")
+MODEL_TEMPERATURE = float(os.getenv("UPDATEDOCS_TEMPERATURE", "1"))
+
+# Tamanho máximo (em caracteres) do diff e da documentação enviados em uma única requisição;
+# entradas maiores são processadas em partes
+MAX_INPUT_CHARS = 100000
+
+# Configuração ativa e registro dos agendadores já construídos, indexados por (provedor, modelo, temperatura).
+# O cliente do modelo (e suas conexões HTTP) é criado uma única vez por processo e reutilizado.
+model_config = {"model": MODEL_NAME, "temperature": MODEL_TEMPERATURE}
+scheduler_registry = {}
+registry_lock = threading.Lock()
+
 def enumerate_lines(documentation):
     """
     Enumera as linhas de um texto de documentação.
     Retorna uma string com as linhas numeradas.
     """
     # Divide o texto de documentação em linhas
-    lines = documentation.splitlines()
+    lines = content_lines(documentation)
 
     # Enumera as linhas e as concatena
-    enumerated_documentation = "".join(f"{i+1}: {line}" for i, line in enumerate(lines))
+    enumerated_documentation = "\n".join(f"{i+1}: {line}" for i, line in enumerate(lines))
 
     # Verifica se não houve algum erro
     if not enumerated_documentation:
@@ -40,15 +64,33 @@ def enumerate_lines(documentation):
     
     return enumerated_documentation
 
-def create_model():
+def configure_model(model_name=None, temperature=None):
+    """
+    Define o modelo e a temperatura utilizados na execução atual.
+    Parâmetros não informados mantêm o valor atual.
+    """
+    with registry_lock:
+        if model_name:
+            model_config["model"] = model_name
+        if temperature is not None:
+            model_config["temperature"] = float(temperature)
+
+def get_model_config():
+    """
+    Retorna a tupla (modelo, temperatura) da configuração ativa.
+    """
+    with registry_lock:
+        return model_config["model"], model_config["temperature"]
+
+def create_model(model_name=MODEL_NAME, temperature=MODEL_TEMPERATURE):
     """
     Inicializa o modelo de IA.
     Retorna o modelo inicializado ou None em caso de erro.
     """
     try:
         model = GoogleGenerativeAI(
-            model="gemini-2.0-flash-exp",
-            temperature=1
+            model=model_name,
+            temperature=temperature
         )
         return model
     except Exception as e:
@@ -86,9 +128,58 @@ def get_system_prompt():
     """
     return system_prompt
 
-def create_chain(commit_diff, documentation_content):
-    # Inicialização do modelo
-    model = create_model()
+def get_batch_system_prompt():
+    system_prompt = """
+        Você é um assistente especializado em gerar documentação de software.
+        Você receberá vários documentos, cada um delimitado por "=== Documento: <caminho> ===" e
+        "=== Fim do documento: <caminho> ===", com o diff do commit que o afeta e o seu conteúdo atual.
+        Para cada documento, atualize ou adicione linhas que reflitam as alterações feitas no commit.
+
+        Instrução:
+        Para cada alteração identificada em um documento, faça o seguinte:
+        1. Determine a linha inicial e a linha final (usando a contagem a partir de 1) no conteúdo atual desse documento onde a alteração deve ser aplicada.
+        2. Gere o novo conteúdo que deverá substituir o trecho identificado ou ser inserido nesse local. **O novo conteúdo DEVE estar formatado em Markdown**, utilizando as convenções do Markdown (como cabeçalhos, listas, ênfases, etc.), conforme necessário.
+
+        Sua resposta DEVE ser um JSON válido, sem nenhum comentário ou explicação adicional, no seguinte formato,
+        com uma entrada para CADA documento recebido, usando exatamente o caminho informado no delimitador:
+
+        {{
+        "documentos": {{
+            "docs/instalacao.md": {{
+            "alteracoes": [
+                {{
+                "inicio": 17,
+                "fim": 19,
+                "novo_conteudo": "# Guia de Instalação  \nExecute o comando abaixo para configurar o ambiente:  \nbash install.sh"
+                }},
+                ... // outras alterações, se houver
+            ]
+            }},
+            "docs/uso.md": {{
+            "alteracoes": []
+            }}
+        }}
+        }}
+
+        Certifique-se de:
+        - Utilizar apenas números inteiros para "inicio" e "fim", referentes às linhas do próprio documento.
+        - Retornar "alteracoes": [] para documentos que não precisam de alterações.
+        - Incluir apenas o JSON na resposta, sem textos extras.
+        - Mantenha o estilo de cada documento, incluindo cabeçalhos, listas, ênfases, etc.
+    """
+    return system_prompt
+
+def create_batch_prompt():
+    # Template das requisições em lote: os documentos já vêm delimitados (ver batching)
+    return ChatPromptTemplate.from_messages([
+        ("system", get_batch_system_prompt()),
+        ("human", "{documents}\n\nObs.: As linhas estão numeradas para referência, mas não devem ser parte da resposta. Trechos omitidos da documentação são indicados por '...'.")
+    ])
+
+def create_chain(model_name=MODEL_NAME, temperature=MODEL_TEMPERATURE, model=None):
+    # Inicialização do modelo (ou reutilização de um modelo já criado)
+    if model is None:
+        model = create_model(model_name, temperature)
 
     if not model:
         logging.error("Erro ao criar a cadeia de execução.")
@@ -97,48 +188,299 @@ def create_chain(commit_diff, documentation_content):
     # Inicialização do template de conversa
     prompt = ChatPromptTemplate.from_messages([
         ("system", get_system_prompt()),
-        ("human", "Diff do commit:\n{commit_diff}\n\nDocumentação existente:\n{documentation_content}\n\nObs.: As linhas estão numeradas para referência, mas não devem ser parte da resposta.")
+        ("human", "Diff do commit:\n{commit_diff}\n\nDocumentação existente:\n{documentation_content}\n\nObs.: As linhas estão numeradas para referência, mas não devem ser parte da resposta. Trechos omitidos da documentação são indicados por '...'.")
     ])
 
-    # Inicialização do parser
-    parser = JsonOutputParser()
+    # A cadeia retorna o texto do modelo, interpretado em 'parse_response' (também no modo streaming)
+    return prompt | model
 
-    # Inicialização da cadeia de execução
-    chain = (
-        prompt
-        | model
-        | parser
-    )
+def create_gemini_provider(model_name, temperature):
+    # Cadeias sem parser: o provedor retorna o texto do modelo, interpretado em 'parse_response'.
+    # As requisições individuais e em lote compartilham o mesmo cliente do modelo
+    model = create_model(model_name, temperature)
+    chain = create_chain(model_name, temperature, model=model)
+    if not chain:
+        return None
+    return ChainProvider(chain, f"gemini:{model_name}", batch_chain=create_batch_prompt() | model)
+
+# Provedores disponíveis, selecionados pela variável UPDATEDOCS_PROVIDER
+PROVIDERS = {
+    "gemini": create_gemini_provider,
+    "fake": lambda model_name, temperature: FakeProvider()
+}
 
-    return chain
+def get_scheduler():
+    """
+    Retorna o agendador de requisições da configuração ativa, construindo-o apenas na primeira chamada.
+    A mesma instância (e seus limites de vazão) é compartilhada entre arquivos e threads.
+    """
+    model_name, temperature = get_model_config()
+    key = (LLM_PROVIDER, model_name, temperature)
+    with registry_lock:
+        scheduler = scheduler_registry.get(key)
+        if scheduler is None:
+            if LLM_PROVIDER not in PROVIDERS:
+                logging.error(f"Provedor de IA desconhecido: {LLM_PROVIDER}")
+                return None
+            provider = PROVIDERS[LLM_PROVIDER](model_name, temperature)
+            if not provider:
+                logging.error("Erro ao criar a cadeia de execução.")
+                return None
+            scheduler = scheduler_registry[key] = LLMScheduler(provider)
+        return scheduler
 
-def run_chain(chain, commit_diff, documentation_content):
+def cancel_pending_requests():
+    """
+    Descarta as requisições ainda não iniciadas de todos os agendadores (ex.: revisão interrompida).
+    Retorna a quantidade de requisições descartadas.
+    """
+    with registry_lock:
+        schedulers = list(scheduler_registry.values())
+    return sum(scheduler.cancel_pending() for scheduler in schedulers)
+
+def make_inputs(commit_diff, documentation_content):
+    return {"commit_diff": commit_diff, "documentation_content": documentation_content}
+
+def parse_response(text):
+    # Interpreta o JSON da resposta (aceita cercas de código Markdown ao redor do JSON)
+    with span("json_parse", chars=len(text)):
+        return JsonOutputParser().parse(text)
+
+def run_chain(scheduler, commit_diff, documentation_content, priority=0):
     # Verificação básica de tamanho
-    if len(commit_diff) > 100000 or len(documentation_content) > 100000:
+    if len(commit_diff) > MAX_INPUT_CHARS or len(documentation_content) > MAX_INPUT_CHARS:
         logging.error("Entrada muito grande para processamento seguro.")
         return None
     
-    # Executa a cadeia de execução
+    # Executa a requisição pelo agendador (limites de vazão, tentativas e tempo limite)
+    try:
+        return parse_response(scheduler.submit(make_inputs(commit_diff, documentation_content), priority).result())
+    except Exception as e:
+        logging.error(f"Erro ao executar a cadeia de execução: {e}")
+        return None
+
+def stream_chain(scheduler, commit_diff, documentation_content, on_change, priority=0):
+    """
+    Executa a requisição em modo streaming.
+    Cada item de 'alteracoes' é entregue a 'on_change' assim que o seu objeto JSON é fechado;
+    ao final, a resposta completa é interpretada e retornada como na execução normal.
+    """
+    if len(commit_diff) > MAX_INPUT_CHARS or len(documentation_content) > MAX_INPUT_CHARS:
+        logging.error("Entrada muito grande para processamento seguro.")
+        return None
+
+    stream_parser = AlteracoesStreamParser()
+
+    def on_chunk(chunk):
+        for change in stream_parser.feed(chunk):
+            on_change(change)
+
     try:
-        response = chain.invoke({"commit_diff": commit_diff, "documentation_content": documentation_content})
+        return parse_response(scheduler.submit(make_inputs(commit_diff, documentation_content), priority, on_chunk).result())
     except Exception as e:
         logging.error(f"Erro ao executar a cadeia de execução: {e}")
         return None
+
+def run_chain_batch(scheduler, inputs, max_concurrency=4, priority=0):
+    """
+    Executa várias requisições (diff, documentação) pelo agendador, reutilizando o mesmo cliente.
+
+    Parâmetros:
+        scheduler (LLMScheduler): Agendador retornado por 'get_scheduler'.
+        inputs (list): Lista de tuplas (commit_diff, documentation_content).
+        max_concurrency (int): Número máximo de requisições deste lote em andamento ao mesmo tempo.
+        priority (int): Prioridade das requisições no agendador.
+
+    Retorna:
+        list: Respostas na mesma ordem das entradas; None para entradas inválidas ou com erro.
+    """
+    responses = [None] * len(inputs)
+    pending = [
+        i for i, (commit_diff, documentation_content) in enumerate(inputs)
+        if len(commit_diff) <= MAX_INPUT_CHARS and len(documentation_content) <= MAX_INPUT_CHARS
+    ]
+    if len(pending) < len(inputs):
+        logging.error("Entrada muito grande para processamento seguro.")
+
+    # Limita as requisições do lote em andamento, sem ocupar todos os workers do agendador
+    slots = threading.BoundedSemaphore(max(1, max_concurrency))
+    futures = {}
+    for i in pending:
+        slots.acquire()
+        futures[i] = scheduler.submit(make_inputs(*inputs[i]), priority)
+        futures[i].add_done_callback(lambda future: slots.release())
+
+    for i, future in futures.items():
+        try:
+            responses[i] = parse_response(future.result())
+        except Exception as e:
+            logging.error(f"Erro ao executar a cadeia de execução: {e}")
+    return responses
+
+def prepare_documentation(commit_diff, documentation_content):
+    """
+    Enumera as linhas da documentação para referência.
+    Em documentos grandes, envia apenas as seções mais relevantes para o diff,
+    mantendo a numeração original das linhas.
+    """
+    if len(documentation_content) > SECTION_SELECTION_THRESHOLD:
+        sections = select_sections(documentation_content, commit_diff)
+        return enumerate_sections(documentation_content, sections)
+    return enumerate_lines(documentation_content)
+
+def run_chunked(scheduler, commit_diff, documentation_content, priority=0):
+    """
+    Processa diffs ou documentos grandes em partes (map-reduce).
+    O diff é dividido por arquivo/hunk, cada parte recebe as seções relevantes da documentação,
+    as partes são executadas em paralelo e as alterações retornadas são combinadas.
+    Se alguma parte não for processada (orçamento de tokens excedido ou falha na requisição),
+    a resposta recebe o campo "aviso", exibido ao revisor, e não é armazenada no cache.
+    """
+    inputs, skipped = build_chunk_inputs(commit_diff, documentation_content)
+    if not inputs:
+        return None
+
+    responses = run_chain_batch(scheduler, inputs, max_concurrency=CHUNK_CONCURRENCY, priority=priority)
+    if not any(responses):
+        return None
+
+    response = merge_changes(responses)
+    missing = skipped + sum(1 for part in responses if not part)
+    if missing:
+        response["aviso"] = f"Proposta parcial: {missing} de {len(inputs) + skipped} parte(s) do diff não foram processadas."
     return response
 
-def generate_documentation_changes(commit_diff, documentation_content):
-    # Enumera as linhas do texto de documentação para referência
-    documentation_content = enumerate_lines(documentation_content)
+def get_cache_key(commit_diff, documentation_content):
+    """
+    Chave da proposta no cache para a configuração ativa (provedor, modelo e temperatura).
+    Propostas obtidas em lote usam a mesma chave das requisições individuais.
+    """
+    model_name, temperature = get_model_config()
+    if LLM_PROVIDER != "gemini":
+        model_name = f"{LLM_PROVIDER}:{model_name}"
+    return make_key(commit_diff, documentation_content, get_system_prompt(), model_name, temperature)
+
+def generate_documentation_changes(commit_diff, documentation_content, on_change=None, priority=0):
+    """
+    Gera as alterações propostas para a documentação a partir do diff.
+    Se 'on_change' for informado, a resposta é obtida em modo streaming e cada alteração
+    é entregue à função assim que estiver completa. Requisições com menor 'priority' são atendidas
+    primeiro pelo agendador. Retorna a resposta em JSON ou None em caso de erro.
+    """
+    if not documentation_content:
+        logging.error("Erro ao enumerar as linhas do texto de documentação.")
+        return None
+
+    # Consulta o cache de propostas antes de chamar o modelo
+    key = None
+    if CACHE_ENABLED:
+        key = get_cache_key(commit_diff, documentation_content)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    # Obtém o agendador de requisições compartilhado
+    scheduler = get_scheduler()
+    if not scheduler:
+        return None
 
-    # Cria a cadeia de execução
-    chain = create_chain(commit_diff, documentation_content)
+    # Enumera as linhas do texto de documentação para referência (apenas as seções relevantes em documentos grandes)
+    with span("prompt_construction", doc_chars=len(documentation_content)) as attributes:
+        prepared_documentation = prepare_documentation(commit_diff, documentation_content)
+        attributes["prompt_chars"] = len(commit_diff) + len(prepared_documentation or "")
+    if not prepared_documentation:
+        return None
 
-    # Executa a cadeia de execução
-    response = run_chain(chain, commit_diff, documentation_content)
+    # Executa a cadeia de execução; entradas grandes demais para uma requisição são divididas em partes
+    if len(commit_diff) > MAX_INPUT_CHARS or len(prepared_documentation) > MAX_INPUT_CHARS:
+        response = run_chunked(scheduler, commit_diff, documentation_content, priority)
+    elif on_change:
+        response = stream_chain(scheduler, commit_diff, prepared_documentation, on_change, priority)
+    else:
+        response = run_chain(scheduler, commit_diff, prepared_documentation, priority)
     
     # Verifica se não houve algum erro
     if not response:
         logging.error("Erro ao executar a cadeia de execução.")
         return None
 
-    return json.dumps(response, ensure_ascii=False)
+    changes = json.dumps(response, ensure_ascii=False)
+
+    # Armazena apenas respostas válidas e completas no cache
+    if key and "aviso" not in response:
+        cache.set(key, changes)
+
+    return changes
+
+def generate_batch_documentation_changes(entries, priority=0):
+    """
+    Gera as alterações propostas de vários documentos pequenos em uma única requisição,
+    evitando reenviar o prompt de sistema e pagar a latência de uma requisição por documento.
+
+    Parâmetros:
+        entries (list): Tuplas (chave, commit_diff, documentation_content); a chave identifica o
+                        documento na resposta (ex.: caminho relativo no repositório) e deve ser única.
+        priority (int): Prioridade da requisição no agendador.
+
+    Retorna:
+        list: Respostas em JSON na mesma ordem das entradas; None para documentos com erro.
+              Documentos ausentes ou malformados na resposta do lote são processados individualmente.
+    """
+    results = [None] * len(entries)
+    keys = [None] * len(entries)
+    prepared = {}
+    for i, (_, commit_diff, documentation_content) in enumerate(entries):
+        if not documentation_content:
+            logging.error("Erro ao enumerar as linhas do texto de documentação.")
+            continue
+
+        # Consulta o cache de propostas antes de chamar o modelo
+        if CACHE_ENABLED:
+            keys[i] = get_cache_key(commit_diff, documentation_content)
+            cached = cache.get(keys[i])
+            if cached is not None:
+                results[i] = cached
+                continue
+        prepared[i] = None
+
+    scheduler = get_scheduler()
+    if not scheduler or not prepared:
+        return results
+
+    with span("prompt_construction", docs=len(prepared), doc_chars=sum(len(entries[i][2]) for i in prepared)) as attributes:
+        for i in list(prepared):
+            prepared[i] = prepare_documentation(entries[i][1], entries[i][2])
+            if not prepared[i]:
+                del prepared[i]
+        documents = build_batch_documents([(entries[i][0], entries[i][1], prepared[i]) for i in prepared])
+        attributes["prompt_chars"] = len(documents)
+
+    # Com um único documento pendente, o lote não traz vantagem: segue o caminho por arquivo
+    answered = {}
+    if len(prepared) > 1:
+        try:
+            response = parse_response(scheduler.submit({"documents": documents}, priority).result())
+            answered = split_batch_response(response, [entries[i][0] for i in prepared])
+        except Exception as e:
+            logging.error(f"Erro na requisição em lote; os documentos serão processados individualmente: {e}")
+
+    fallback = []
+    for i in prepared:
+        if entries[i][0] in answered:
+            results[i] = json.dumps(answered[entries[i][0]], ensure_ascii=False)
+            if keys[i]:
+                cache.set(keys[i], results[i])
+        else:
+            fallback.append(i)
+
+    # Caminho por arquivo para os documentos sem resposta válida no lote
+    if fallback:
+        responses = run_chain_batch(scheduler, [(entries[i][1], prepared[i]) for i in fallback], priority=priority)
+        for i, response in zip(fallback, responses):
+            if not response:
+                logging.error("Erro ao executar a cadeia de execução.")
+                continue
+            results[i] = json.dumps(response, ensure_ascii=False)
+            if keys[i]:
+                cache.set(keys[i], results[i])
+    return results
@@ -0,0 +1,329 @@
+# Standard libraries
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from concurrent.futures import Future
+
+# Auxiliary Functions
+from chunking import estimate_tokens
+from batching import split_batch_documents
+from metrics import registry, span
+
+# Provedor das requisições: "gemini" (LangChain + Google Generative AI) ou "fake" (local e determinístico)
+LLM_PROVIDER = os.getenv("UPDATEDOCS_PROVIDER", "gemini")
+# Limites de vazão por minuto (0, o padrão, desativa o limite)
+REQUESTS_PER_MINUTE = float(os.getenv("UPDATEDOCS_RPM", "0"))
+TOKENS_PER_MINUTE = float(os.getenv("UPDATEDOCS_TPM", "0"))
+# Requisições simultâneas, tentativas após falhas temporárias e tempo limite de cada chamada (em segundos)
+LLM_CONCURRENCY = int(os.getenv("UPDATEDOCS_LLM_CONCURRENCY", "4"))
+MAX_RETRIES = int(os.getenv("UPDATEDOCS_MAX_RETRIES", "5"))
+CALL_TIMEOUT = float(os.getenv("UPDATEDOCS_LLM_TIMEOUT", "120"))
+# Intervalos do backoff exponencial (em segundos)
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+# Simulação do provedor local: latência por requisição (em segundos) e fração de respostas 429
+FAKE_LATENCY = float(os.getenv("UPDATEDOCS_FAKE_LATENCY", "0"))
+FAKE_FAILURE_RATE = float(os.getenv("UPDATEDOCS_FAKE_FAILURE_RATE", "0"))
+
+# Erros temporários do provedor (limite de requisições, indisponibilidade, tempo esgotado)
+RETRYABLE_PATTERN = re.compile(
+    r"\b(429|500|502|503|504)\b|resource.?exhausted|rate.?limit|quota|unavailable|deadline|timed? ?out|overloaded",
+    re.IGNORECASE
+)
+
+class TokenBucket:
+    """
+    Balde de tokens reabastecido continuamente a 'rate_per_minute' unidades por minuto.
+    Consumos maiores que a capacidade são permitidos quando o balde está cheio (o saldo fica negativo),
+    de modo que requisições grandes não ficam bloqueadas para sempre.
+    """
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self, amount=1):
+        """
+        Bloqueia até haver saldo para 'amount' unidades e as consome. Retorna o tempo de espera (em segundos).
+        """
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self.lock:
+                self.refill()
+                needed = min(amount, self.capacity)
+                if self.tokens >= needed:
+                    self.tokens -= amount
+                    return waited
+                delay = (needed - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def consume(self, amount):
+        # Consome sem bloquear (ex.: tokens de saída, conhecidos apenas após a resposta)
+        if self.rate <= 0:
+            return
+        with self.lock:
+            self.refill()
+            self.tokens -= amount
+
+def is_retryable(error):
+    """
+    Indica se o erro é temporário (limite de requisições, indisponibilidade ou tempo esgotado).
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return RETRYABLE_PATTERN.search(f"{type(error).__name__}: {error}") is not None
+
+def backoff_delay(attempt, base=BACKOFF_BASE, maximum=BACKOFF_MAX):
+    """
+    Intervalo antes da tentativa 'attempt' (a partir de 1): backoff exponencial com jitter completo.
+    """
+    return random.uniform(0, min(maximum, base * 2 ** (attempt - 1)))
+
+class ChainProvider:
+    """
+    Provedor baseado em uma cadeia do LangChain que retorna texto (ex.: prompt | GoogleGenerativeAI).
+    Entradas com o campo "documents" (lotes de documentos, ver batching) usam 'batch_chain'.
+    """
+    def __init__(self, chain, name, batch_chain=None):
+        self.chain = chain
+        self.batch_chain = batch_chain
+        self.name = name
+
+    def select(self, inputs):
+        if "documents" in inputs:
+            if self.batch_chain is None:
+                raise ValueError(f"O provedor {self.name} não aceita requisições em lote")
+            return self.batch_chain
+        return self.chain
+
+    def invoke(self, inputs):
+        return self.select(inputs).invoke(inputs)
+
+    def stream(self, inputs):
+        return self.select(inputs).stream(inputs)
+
+class FakeRateLimitError(Exception):
+    pass
+
+class FakeProvider:
+    """
+    Provedor local e determinístico, usado para testar vazão e tratamento de falhas sem acesso à rede.
+
+    A resposta depende apenas da entrada: a primeira linha numerada da documentação é mantida e recebe
+    uma nota com os arquivos do diff. Em lotes, cada documento recebe a sua resposta, indexada pela
+    chave do documento. 'failure_rate' simula respostas 429 de forma determinística
+    (a mesma entrada falha nas mesmas tentativas) e 'latency' simula o tempo de geração.
+    """
+    name = "fake"
+
+    def __init__(self, latency=FAKE_LATENCY, failure_rate=FAKE_FAILURE_RATE):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.attempts = {}
+        self.lock = threading.Lock()
+
+    def respond(self, inputs):
+        key = hashlib.sha256(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()
+        with self.lock:
+            attempt = self.attempts.get(key, 0)
+            self.attempts[key] = attempt + 1
+        draw = int(hashlib.sha256(f"{key}:{attempt}".encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF
+        if draw < self.failure_rate:
+            raise FakeRateLimitError("429 Resource has been exhausted (fake provider)")
+
+        if "documents" in inputs:
+            return json.dumps({"documentos": {
+                key: self.changes(commit_diff, documentation)
+                for key, commit_diff, documentation in split_batch_documents(inputs["documents"])
+            }}, ensure_ascii=False)
+        return json.dumps(self.changes(inputs.get("commit_diff", ""), inputs.get("documentation_content", "")), ensure_ascii=False)
+
+    @staticmethod
+    def changes(commit_diff, documentation):
+        files = sorted(set(re.findall(r"^\+\+\+ b/(.+)$", commit_diff, re.MULTILINE)))
+        first_line = re.search(r"^(\d+): (.*)$", documentation, re.MULTILINE)
+        if not first_line:
+            return {"alteracoes": []}
+        number, content = int(first_line.group(1)), first_line.group(2)
+        note = f"> Atualizado a partir de: {', '.join(files) or 'diff'}"
+        return {"alteracoes": [{"inicio": number, "fim": number, "novo_conteudo": f"{content}\n\n{note}"}]}
+
+    def invoke(self, inputs):
+        response = self.respond(inputs)
+        if self.latency:
+            time.sleep(self.latency)
+        return response
+
+    def stream(self, inputs):
+        response = self.respond(inputs)
+        parts = [response[i:i + 64] for i in range(0, len(response), 64)] or [""]
+        for part in parts:
+            if self.latency:
+                time.sleep(self.latency / len(parts))
+            yield part
+
+class Job:
+    def __init__(self, inputs, on_chunk):
+        self.inputs = inputs
+        self.on_chunk = on_chunk
+        self.future = Future()
+        self.abandoned = False  # Sem novas tentativas (ver 'cancel_pending')
+        self.tokens = estimate_tokens("".join(value for value in inputs.values() if isinstance(value, str)))
+
+class LLMScheduler:
+    """
+    Agenda as requisições ao modelo em uma fila de prioridade atendida por 'concurrency' workers.
+
+    Cada requisição respeita os limites de requisições e de tokens por minuto (baldes de tokens),
+    tem um tempo limite por chamada e é repetida com backoff exponencial (com jitter) após erros
+    temporários como 429 ou 503. Requisições com menor 'priority' são atendidas primeiro.
+    Em modo streaming, a requisição só é repetida se nenhum trecho tiver sido entregue.
+    """
+    def __init__(self, provider, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE,
+                 concurrency=LLM_CONCURRENCY, max_retries=MAX_RETRIES, timeout=CALL_TIMEOUT):
+        self.provider = provider
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.heap = []
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+        self.workers = []
+        self.running = set()
+
+    def submit(self, inputs, priority=0, on_chunk=None):
+        """
+        Agenda uma requisição. Retorna um Future com o texto da resposta.
+        Com 'on_chunk', a resposta é obtida em streaming e cada trecho é entregue à função.
+        """
+        job = Job(inputs, on_chunk)
+        with self.condition:
+            heapq.heappush(self.heap, (priority, next(self.counter), job))
+            if len(self.workers) < self.concurrency:
+                worker = threading.Thread(target=self.worker, daemon=True)
+                self.workers.append(worker)
+                worker.start()
+            self.condition.notify()
+        return job.future
+
+    def worker(self):
+        while True:
+            with self.condition:
+                while not self.heap:
+                    self.condition.wait()
+                _, _, job = heapq.heappop(self.heap)
+                self.running.add(job)
+            try:
+                if job.future.set_running_or_notify_cancel():
+                    self.execute(job)
+            finally:
+                with self.condition:
+                    self.running.discard(job)
+
+    def cancel_pending(self):
+        """
+        Descarta as requisições ainda na fila (ex.: revisão interrompida) e impede novas tentativas das
+        requisições em andamento, que terminam na tentativa atual.
+
+        Retorna:
+            int: Quantidade de requisições descartadas.
+        """
+        with self.condition:
+            pending, self.heap = self.heap, []
+            for job in self.running:
+                job.abandoned = True
+        for _, _, job in pending:
+            job.future.cancel()
+        return len(pending)
+
+    def execute(self, job):
+        attempt = 0
+        while True:
+            delivered = [False]
+            try:
+                throttled = self.request_bucket.acquire(1) + self.token_bucket.acquire(job.tokens)
+                registry.observe("updatedocs_llm_throttled_seconds", throttled, provider=self.provider.name)
+                with span("llm_request", provider=self.provider.name, attempt=attempt + 1,
+                          tokens_in=job.tokens, throttled_ms=round(throttled * 1000, 3)) as attributes:
+                    response = self.call(job, delivered, attributes)
+                    attributes["tokens_out"] = estimate_tokens(response)
+                self.token_bucket.consume(attributes["tokens_out"])
+                registry.inc("updatedocs_llm_requests_total", provider=self.provider.name, outcome="success")
+                registry.inc("updatedocs_llm_tokens_total", job.tokens, direction="in")
+                registry.inc("updatedocs_llm_tokens_total", attributes["tokens_out"], direction="out")
+                job.future.set_result(response)
+                return
+            except Exception as e:
+                attempt += 1
+                retry = is_retryable(e) and attempt <= self.max_retries and not delivered[0] and not job.abandoned
+                registry.inc("updatedocs_llm_requests_total", provider=self.provider.name,
+                             outcome="timeout" if isinstance(e, TimeoutError) else "retry" if retry else "failure")
+                if not retry:
+                    logging.error(f"Erro na requisição ao modelo ({self.provider.name}) após {attempt} tentativa(s): {e}")
+                    job.future.set_exception(e)
+                    return
+                delay = backoff_delay(attempt)
+                logging.error(f"Erro temporário na requisição ao modelo ({self.provider.name}): {e}; nova tentativa em {delay:.1f}s")
+                time.sleep(delay)
+
+    def call(self, job, delivered, attributes):
+        """
+        Executa a chamada ao provedor em uma thread auxiliar, respeitando o tempo limite.
+        Em caso de tempo esgotado, a chamada pendente é abandonada e seu resultado descartado.
+        O tempo até o primeiro trecho da resposta é registrado em 'attributes' ("ttft_ms").
+        """
+        results = queue.Queue()
+
+        def produce():
+            try:
+                if job.on_chunk:
+                    for chunk in self.provider.stream(job.inputs):
+                        results.put(("chunk", chunk))
+                else:
+                    results.put(("chunk", self.provider.invoke(job.inputs)))
+                results.put(("done", None))
+            except Exception as e:
+                results.put(("error", e))
+
+        started = time.monotonic()
+        threading.Thread(target=produce, daemon=True).start()
+        deadline = started + self.timeout if self.timeout > 0 else None
+        text = []
+        while True:
+            try:
+                kind, value = results.get(timeout=max(0.0, deadline - time.monotonic()) if deadline else None)
+            except queue.Empty:
+                raise TimeoutError(f"Tempo limite de {self.timeout}s excedido na requisição ao modelo")
+            if kind == "error":
+                raise value
+            if kind == "done":
+                return "".join(text)
+            if not text:
+                first_token = time.monotonic() - started
+                attributes["ttft_ms"] = round(first_token * 1000, 3)
+                registry.observe("updatedocs_llm_time_to_first_token_seconds", first_token, provider=self.provider.name)
+            text.append(value)
+            if job.on_chunk:
+                delivered[0] = True
+                job.on_chunk(value)
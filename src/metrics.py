@@ -0,0 +1,188 @@
+# Standard libraries
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Traces em JSONL, um arquivo por commit (ou intervalo) processado
+TRACES_ENABLED = os.getenv("UPDATEDOCS_TRACES", "1") != "0"
+TRACES_DIR = os.getenv(
+    "UPDATEDOCS_TRACES_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "traces")
+)
+
+# Descrição das métricas expostas em /metrics (formato de texto do Prometheus)
+METRIC_HELP = {
+    "updatedocs_stage_seconds": ("summary", "Duração das etapas do processamento, em segundos."),
+    "updatedocs_stage_errors_total": ("counter", "Etapas encerradas com erro."),
+    "updatedocs_runs_total": ("counter", "Commits (ou intervalos) processados."),
+    "updatedocs_llm_requests_total": ("counter", "Requisições ao modelo, por provedor e resultado."),
+    "updatedocs_llm_throttled_seconds": ("summary", "Tempo de espera imposto pelos limites de vazão (UPDATEDOCS_RPM/TPM) antes de cada requisição."),
+    "updatedocs_llm_time_to_first_token_seconds": ("summary", "Tempo até o primeiro trecho da resposta do modelo."),
+    "updatedocs_llm_tokens_total": ("counter", "Tokens estimados enviados (in) e recebidos (out) do modelo."),
+    "updatedocs_cache_requests_total": ("counter", "Consultas ao cache de propostas, por resultado (hit ou miss)."),
+    "updatedocs_diff_tokens_total": ("counter", "Tokens estimados dos patches antes (raw) e depois (compacted) da compactação."),
+    "updatedocs_review_decisions_total": ("counter", "Decisões do revisor, por resultado.")
+}
+
+def escape_label(value):
+    # Escapes exigidos pelo formato de texto do Prometheus nos valores dos rótulos
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class MetricsRegistry:
+    """
+    Contadores e resumos (soma e quantidade) agregados no processo, identificados por nome e rótulos.
+    """
+    def __init__(self):
+        self.counters = {}
+        self.summaries = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            total, count = self.summaries.get(key, (0.0, 0))
+            self.summaries[key] = (total + value, count + 1)
+
+    def render(self):
+        """
+        Retorna as métricas no formato de texto do Prometheus.
+        """
+        def format_labels(labels):
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in labels) + "}"
+
+        with self.lock:
+            counters = dict(self.counters)
+            summaries = dict(self.summaries)
+
+        series = {}
+        for (name, labels), value in counters.items():
+            series.setdefault(name, []).append(f"{name}{format_labels(labels)} {value}")
+        for (name, labels), (total, count) in summaries.items():
+            series.setdefault(name, []).append(f"{name}_sum{format_labels(labels)} {total:.6f}")
+            series[name].append(f"{name}_count{format_labels(labels)} {count}")
+
+        lines = []
+        for name in sorted(series):
+            metric_type, description = METRIC_HELP.get(name, ("untyped", name))
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(sorted(series[name]))
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+class Trace:
+    """
+    Spans de um commit (ou intervalo) processado, gravados em um arquivo JSONL ao final.
+    """
+    def __init__(self, **attributes):
+        self.id = uuid.uuid4().hex
+        self.attributes = attributes
+        self.started_at = time.time()
+        self.spans = []
+        self.lock = threading.Lock()
+
+    def add(self, record):
+        with self.lock:
+            self.spans.append(record)
+
+    def write(self, traces_dir=None):
+        traces_dir = traces_dir or TRACES_DIR
+        revision = re.sub(r"[^0-9A-Za-z.]+", "_", str(self.attributes.get("revision") or "run"))[:40]
+        path = os.path.join(traces_dir, f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))}-{revision}.jsonl")
+        try:
+            os.makedirs(traces_dir, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as trace_file:
+                with self.lock:
+                    spans = sorted(self.spans, key=lambda span: span["start"])
+                for span in spans:
+                    trace_file.write(json.dumps(span, ensure_ascii=False) + "\n")
+                trace_file.write(json.dumps({
+                    "trace_id": self.id,
+                    "name": "trace",
+                    "start": self.started_at,
+                    "duration_ms": round((time.time() - self.started_at) * 1000, 3),
+                    "attributes": self.attributes
+                }, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logging.error(f"Erro ao gravar o trace {path}: {e}")
+        return path
+
+# Trace ativo. Os commits são processados um por vez (inclusive pelo daemon), então um único
+# trace global é compartilhado pelas threads de geração e pelos workers do agendador
+current_trace = None
+trace_lock = threading.Lock()
+
+@contextmanager
+def trace(**attributes):
+    """
+    Inicia o trace de um commit e o grava em TRACES_DIR ao final.
+    Chamadas aninhadas reutilizam o trace ativo, apenas acrescentando os atributos.
+    """
+    global current_trace
+    with trace_lock:
+        active = current_trace
+        if active is None:
+            current_trace = Trace(**attributes)
+        else:
+            active.attributes.update(attributes)
+    if active is not None:
+        yield active
+        return
+
+    registry.inc("updatedocs_runs_total")
+    try:
+        yield current_trace
+    finally:
+        with trace_lock:
+            finished, current_trace = current_trace, None
+        if TRACES_ENABLED:
+            finished.write()
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Mede uma etapa: registra a duração em 'updatedocs_stage_seconds' e, se houver um trace ativo, grava o span.
+    O dicionário retornado pode receber atributos durante a etapa (ex.: tokens, quantidade de arquivos).
+    """
+    started_at = time.time()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield attributes
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        registry.inc("updatedocs_stage_errors_total", stage=name)
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        registry.observe("updatedocs_stage_seconds", duration, stage=name)
+        active = current_trace
+        if active is not None:
+            record = {
+                "trace_id": active.id,
+                "name": name,
+                "start": started_at,
+                "duration_ms": round(duration * 1000, 3),
+                "thread": threading.current_thread().name,
+                "attributes": attributes
+            }
+            if error:
+                record["error"] = error
+            active.add(record)
@@ -0,0 +1,157 @@
+# Standard libraries
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# Auxiliary Functions
+from metrics import registry
+
+# Configurações do cache de propostas
+CACHE_ENABLED = os.getenv("UPDATEDOCS_CACHE", "1") != "0"
+CACHE_PATH = os.getenv(
+    "UPDATEDOCS_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "proposals.sqlite")
+)
+CACHE_MAX_ENTRIES = int(os.getenv("UPDATEDOCS_CACHE_MAX_ENTRIES", "5000"))
+CACHE_MAX_BYTES = int(os.getenv("UPDATEDOCS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_MAX_AGE = int(os.getenv("UPDATEDOCS_CACHE_MAX_AGE", str(30 * 24 * 60 * 60)))  # Em segundos
+
+def normalize_diff(commit_diff):
+    """
+    Normaliza um diff para que commits com o mesmo conteúdo gerem a mesma chave
+    (ex.: após 'git commit --amend', rebase ou cherry-pick).
+    Remove o cabeçalho do commit, as linhas 'index' (hashes dos blobs) e espaços no fim das linhas.
+    """
+    lines = []
+    in_patch = False
+    for line in commit_diff.replace("\r\n", "\n").split("\n"):
+        if line.startswith("diff --git "):
+            in_patch = True
+        if not in_patch or line.startswith("index "):
+            continue
+        lines.append(line.rstrip())
+    return "\n".join(lines).strip("\n")
+
+def make_key(commit_diff, documentation_content, system_prompt, model_name, temperature):
+    """
+    Gera a chave de conteúdo (SHA-256) de uma proposta a partir de todas as entradas que a determinam.
+    """
+    digest = hashlib.sha256()
+    for part in (normalize_diff(commit_diff), documentation_content, system_prompt, model_name, repr(float(temperature))):
+        encoded = part.encode("utf-8")
+        # Prefixa o tamanho de cada parte para evitar colisões por concatenação
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+class ProposalCache:
+    """
+    Cache persistente (SQLite) das propostas geradas pela IA, endereçado pelo conteúdo das entradas.
+    Remove as entradas menos usadas recentemente quando os limites de quantidade ou tamanho são
+    excedidos e descarta entradas mais antigas que 'max_age' segundos.
+    """
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES, max_age=CACHE_MAX_AGE):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = None
+
+    def connect(self):
+        if self.connection is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS proposals (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON proposals (accessed_at)")
+            self.connection.commit()
+        return self.connection
+
+    def get(self, key):
+        """
+        Retorna a proposta armazenada para a chave ou None se não existir ou estiver expirada.
+        """
+        try:
+            with self.lock:
+                connection = self.connect()
+                now = time.time()
+                row = connection.execute(
+                    "SELECT value FROM proposals WHERE key = ? AND created_at >= ?",
+                    (key, now - self.max_age)
+                ).fetchone()
+                if row is None:
+                    self.record(hit=False)
+                    return None
+                connection.execute("UPDATE proposals SET accessed_at = ? WHERE key = ?", (now, key))
+                connection.commit()
+                self.record(hit=True)
+                return row[0]
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao consultar o cache de propostas: {e}")
+            with self.lock:
+                self.record(hit=False)
+            return None
+
+    def record(self, hit):
+        # Contadores da execução atual ('stats') e do processo ('/metrics'); chamado com 'self.lock' adquirido
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        registry.inc("updatedocs_cache_requests_total", result="hit" if hit else "miss")
+
+    def set(self, key, value):
+        """
+        Armazena uma proposta e aplica a política de remoção.
+        """
+        try:
+            with self.lock:
+                connection = self.connect()
+                now = time.time()
+                connection.execute(
+                    "INSERT OR REPLACE INTO proposals (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value.encode("utf-8")), now, now)
+                )
+                self.evict(connection, now)
+                connection.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao gravar no cache de propostas: {e}")
+
+    def evict(self, connection, now):
+        # Remove entradas expiradas
+        connection.execute("DELETE FROM proposals WHERE created_at < ?", (now - self.max_age,))
+
+        # Remove as entradas menos usadas recentemente até respeitar os limites
+        count, total = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM proposals").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        removed = []
+        for key, size in connection.execute("SELECT key, size FROM proposals ORDER BY accessed_at ASC"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            removed.append((key,))
+            count -= 1
+            total -= size
+        connection.executemany("DELETE FROM proposals WHERE key = ?", removed)
+
+    def stats(self):
+        """
+        Retorna os contadores de acertos e falhas da execução atual.
+        """
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+cache = ProposalCache()
@@ -1,11 +1,20 @@
 # Standard libraries
+import asyncio
+import json
 import logging
+import os
 import threading
+import time
+import uuid
+from collections import OrderedDict
 from contextlib import asynccontextmanager
+from typing import List, Optional
 
 # FastAPI libraries
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.staticfiles import StaticFiles
 
 # Pydantic library
 from pydantic import BaseModel
@@ -13,8 +22,14 @@ from pydantic import BaseModel
 # Uvicorn library
 import uvicorn
 
+# Auxiliary Functions
+from metrics import registry
+from edit_engine import content_lines, validate_edit, normalize_edits, apply_edits, compute_hunks, EditError
+
+log_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "errors.log")
+os.makedirs(os.path.dirname(log_path), exist_ok=True)
 logging.basicConfig(
-    filename=r'logs\errors.log',  
+    filename=log_path,  
     level=logging.ERROR,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
@@ -22,28 +37,209 @@ logging.basicConfig(
 # Variáveis de configuração
 SERVER_HOST = "localhost"
 SERVER_PORT = 5000
+SERVER_URL = f"http://{SERVER_HOST}:{SERVER_PORT}"
+SERVER_START_TIMEOUT = 10  # Em segundos
+EVENTS_KEEPALIVE = 15  # Intervalo, em segundos, dos comentários que mantêm a conexão SSE aberta
 
-# Estrutura de comunicação thread-safe
-class ApprovalState:
-    def __init__(self):
-        self.event = threading.Event()
-        self.value = None
+# Interface pré-compilada ('npm run build')
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUILD_DIR = os.path.join(base_dir, "build")
+
+# Item de revisão: uma proposta de alteração aguardando a decisão do revisor.
+# O documento atual fica apenas no servidor; a interface recebe um diff compacto ('hunks')
+# e as alterações aprovadas são aplicadas pelo servidor (ver edit_engine)
+class ReviewItem:
+    def __init__(self, source_file, doc_path, current, alteracoes, error=None, status="pending"):
+        self.id = uuid.uuid4().hex
+        self.source_file = source_file
+        self.doc_path = doc_path
+        self.current = current
+        self.line_count = len(content_lines(current))
+        self.alteracoes = alteracoes
+        self.edits, _ = normalize_edits(alteracoes, self.line_count)
+        self.hunks = compute_hunks(current, self.edits)
+        self.error = error
+        self.status = status  # "generating", "pending", "approved" ou "rejected"
         self.data = ""
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "source_file": self.source_file,
+            "doc_path": self.doc_path,
+            "alteracoes": self.alteracoes,
+            "hunks": self.hunks,
+            "error": self.error,
+            "status": self.status
+        }
+
+# Fila de revisão thread-safe compartilhada entre o UpdateDocs e os endpoints da API
+class ReviewQueue:
+    def __init__(self):
+        self.items = OrderedDict()
+        self.subscribers = []
+        self.finished = False
         self.lock = threading.Lock()
+        # Notificada a cada decisão do revisor (ver 'wait_decisions')
+        self.decided = threading.Condition(self.lock)
 
-    def update_value(self, new_value: bool, data: str = ""):
+    def enqueue(self, source_file, doc_path, current, alteracoes, error=None, status="pending"):
+        """
+        Adiciona uma proposta à fila, notifica a interface e retorna o id do item.
+        Itens com status "generating" recebem as alterações aos poucos ('append_change')
+        e só podem ser revisados após 'complete'.
+        """
+        item = ReviewItem(source_file, doc_path, current, alteracoes, error, status)
         with self.lock:
-            self.value = new_value
-            self.data = data
-            self.event.set()
+            self.items[item.id] = item
+            self.finished = False
+        self.publish("item_added", item.to_dict())
+        return item.id
 
-    def aguardar_valor(self):
-        self.event.wait()
+    def pending(self):
+        # Itens ainda não decididos, incluindo os que estão sendo gerados
         with self.lock:
-            self.event.clear()
-            return self.value, self.data
+            return [item.to_dict() for item in self.items.values() if item.status in ("generating", "pending")]
 
-state = ApprovalState()
+    def append_change(self, item_id, change):
+        """
+        Acrescenta uma alteração recebida em streaming a um item em geração e notifica a interface
+        com o trecho do diff correspondente (alterações inválidas são enviadas sem trecho).
+        """
+        with self.lock:
+            item = self.items[item_id]
+            item.alteracoes.append(change)
+            index = len(item.alteracoes) - 1
+            try:
+                hunk = compute_hunks(item.current, [validate_edit(change, item.line_count)])[0]
+            except EditError:
+                hunk = None
+            # Mantém os trechos parciais no item para que a carga inicial da interface os inclua
+            if hunk:
+                item.hunks = sorted(item.hunks + [hunk], key=lambda h: h["inicio"])
+        self.publish("change_added", {"id": item_id, "index": index, "change": change, "hunk": hunk})
+
+    def complete(self, item_id, alteracoes, error=None):
+        """
+        Conclui a geração de um item com a lista final de alterações, liberando-o para revisão.
+        As alterações são validadas (limites, ordem e sobreposição); as inválidas são descartadas
+        e informadas ao revisor.
+        """
+        with self.lock:
+            item = self.items[item_id]
+            item.alteracoes = alteracoes
+            item.edits, problems = normalize_edits(alteracoes, item.line_count)
+            item.hunks = compute_hunks(item.current, item.edits)
+            if problems:
+                logging.error(f"Alterações inválidas descartadas em {item.doc_path}: {'; '.join(problems)}")
+                error = error or f"{len(problems)} alteração(ões) inválida(s) descartada(s): {'; '.join(problems)}"
+            item.error = error
+            item.status = "pending"
+        self.publish("item_ready", {"id": item_id, "alteracoes": alteracoes, "hunks": item.hunks,
+                                    "error": error, "status": item.status})
+
+    def get(self, item_id):
+        with self.lock:
+            item = self.items.get(item_id)
+            return item.to_dict() if item else None
+
+    def decide(self, item_id, approved):
+        """
+        Registra a decisão do revisor para um item pendente. Se aprovado, as alterações validadas
+        são aplicadas ao documento atual pelo servidor.
+        Lança KeyError se o item não existir e ValueError se já tiver sido decidido.
+        """
+        with self.lock:
+            item = self.items[item_id]
+            if item.status == "generating":
+                raise ValueError(f"Item ainda em geração: {item_id}")
+            if item.status != "pending":
+                raise ValueError(f"Item já revisado: {item_id}")
+            item.status = "approved" if approved else "rejected"
+            item.data = apply_edits(item.current, item.edits) if approved else ""
+            self.decided.notify_all()
+        registry.inc("updatedocs_review_decisions_total", decision=item.status)
+        self.publish("item_decided", {"id": item_id, "status": item.status})
+
+    def decide_many(self, item_ids, approved):
+        """
+        Registra a mesma decisão para vários itens (ou para todos os itens pendentes, se 'item_ids' for None).
+        Itens inexistentes, ainda em geração ou já revisados são ignorados.
+
+        Retorna:
+            tuple: (ids decididos, ids ignorados)
+        """
+        if item_ids is None:
+            with self.lock:
+                item_ids = [item.id for item in self.items.values() if item.status == "pending"]
+        decided, skipped = [], []
+        for item_id in item_ids:
+            try:
+                self.decide(item_id, approved)
+                decided.append(item_id)
+            except (KeyError, ValueError):
+                skipped.append(item_id)
+        return decided, skipped
+
+    def oldest_pending(self):
+        with self.lock:
+            return next((item.id for item in self.items.values() if item.status == "pending"), None)
+
+    def wait_decisions(self, item_ids):
+        """
+        Entrega as decisões dos itens informados na ordem em que o revisor as toma, como tuplas
+        (item_id, aprovado, documentação); decisões simultâneas seguem a ordem de 'item_ids'.
+        Cada item é removido da fila após a sua decisão ser entregue.
+        """
+        remaining = list(item_ids)
+        while remaining:
+            with self.decided:
+                while True:
+                    ready = [item_id for item_id in remaining if self.items[item_id].status in ("approved", "rejected")]
+                    if ready:
+                        break
+                    self.decided.wait()
+                items = [self.items.pop(item_id) for item_id in ready]
+            ready = set(ready)
+            remaining = [item_id for item_id in remaining if item_id not in ready]
+            for item in items:
+                yield item.id, item.status == "approved", item.data
+
+    def finish(self):
+        """
+        Indica à interface que não haverá novas propostas.
+        """
+        with self.lock:
+            self.finished = True
+        self.publish("finished", {})
+
+    def subscribe(self):
+        queue = asyncio.Queue()
+        with self.lock:
+            self.subscribers.append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def has_subscribers(self):
+        # Indica se alguma interface está conectada ao fluxo de eventos
+        with self.lock:
+            return bool(self.subscribers)
+
+    def unsubscribe(self, queue):
+        with self.lock:
+            self.subscribers = [(loop, q) for loop, q in self.subscribers if q is not queue]
+
+    def publish(self, event, payload):
+        # Os eventos podem ser publicados a partir de qualquer thread
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (event, payload))
+            except RuntimeError:
+                # Loop já encerrado
+                self.unsubscribe(queue)
+
+review_queue = ReviewQueue()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -70,18 +266,86 @@ app = create_application()
 
 class RequestData(BaseModel):
     Approved: bool
-    Data: str
+    # Ignorado: o texto final é calculado pelo servidor (mantido por compatibilidade com clientes antigos)
+    Data: Optional[str] = None
 
-@app.post('/approve_changes')
-async def receive_approval(data: RequestData):
+@app.get('/review/items')
+async def list_items():
+    return {"items": review_queue.pending(), "finished": review_queue.finished}
+
+@app.get('/review/items/{item_id}')
+async def get_item(item_id: str):
+    item = review_queue.get(item_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Item não encontrado")
+    return item
+
+class BulkDecisionData(BaseModel):
+    Approved: bool
+    # Itens a decidir; se omitido, a decisão vale para todos os itens pendentes
+    Ids: Optional[List[str]] = None
+
+@app.post('/review/decisions')
+async def decide_items(data: BulkDecisionData):
+    decided, skipped = review_queue.decide_many(data.Ids, data.Approved)
+    return {"status": "success", "code": 200, "decided": decided, "skipped": skipped}
+
+@app.post('/review/items/{item_id}/decision')
+async def decide_item(item_id: str, data: RequestData):
     try:
-        state.update_value(data.Approved, data.Data)
+        review_queue.decide(item_id, data.Approved)
         return {"status": "success", "code": 200}
-    except Exception as e:
-        logging.error(f"Error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Item não encontrado")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get('/review/events')
+async def review_events():
+    queue = review_queue.subscribe()
+
+    async def event_stream():
+        try:
+            while True:
+                try:
+                    event, payload = await asyncio.wait_for(queue.get(), EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+        finally:
+            review_queue.unsubscribe(queue)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-store"})
+
+@app.get('/metrics')
+async def metrics():
+    # Contadores agregados no formato de texto do Prometheus
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.post('/approve_changes')
+async def receive_approval(data: RequestData):
+    # Compatibilidade: aplica a decisão ao item pendente mais antigo
+    item_id = review_queue.oldest_pending()
+    if item_id is None:
+        raise HTTPException(status_code=404, detail="Nenhum item pendente")
+    return await decide_item(item_id, data)
+
+def ui_build_available():
+    """
+    Verifica se a interface React já foi compilada com 'npm run build'.
+    """
+    return os.path.isfile(os.path.join(BUILD_DIR, "index.html"))
+
+# A interface pré-compilada é servida pelo próprio FastAPI (registrada após as rotas da API)
+if ui_build_available():
+    app.mount("/", StaticFiles(directory=BUILD_DIR, html=True), name="ui")
+
+server = None
+server_thread = None
 
 def run_server():
+    global server
     config = uvicorn.Config(
         app,
         host=SERVER_HOST,
@@ -94,6 +358,12 @@ def run_server():
     server.run()
 
 def server_init():
+    global server_thread
+
+    # O servidor é iniciado uma única vez por processo (o daemon o reutiliza entre commits)
+    if server_thread is not None and server_thread.is_alive():
+        return
+
     # Inicialização do servidor em thread separada
     server_thread = threading.Thread(
         target=run_server,
@@ -101,11 +371,22 @@ def server_init():
     )
     server_thread.start()
 
-def approve_changes():
+    # Aguarda o servidor aceitar conexões antes de liberar a abertura da interface
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline and server_thread.is_alive():
+        if server is not None and server.started:
+            return
+        time.sleep(0.01)
+    logging.error("Servidor não iniciou dentro do tempo limite.")
+
+def approve_changes(item_ids):
+    """
+    Aguarda as decisões do revisor para os itens informados, entregando cada uma assim que for tomada
+    (ver 'ReviewQueue.wait_decisions'). Uma interrupção (Ctrl+C) encerra a espera pelos itens restantes.
+    """
     try:
-        approved, data = state.aguardar_valor()            
+        yield from review_queue.wait_decisions(item_ids)
     except KeyboardInterrupt:
         print("\nInterruption received, closing...")
     finally:
         print("Processing completed.")
-        return approved, data
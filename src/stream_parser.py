@@ -0,0 +1,70 @@
+# Standard libraries
+import json
+import logging
+
+class AlteracoesStreamParser:
+    """
+    Parser incremental da resposta JSON da IA.
+    Recebe o texto em partes (à medida que o modelo o gera) e retorna cada item da lista
+    'alteracoes' assim que o objeto correspondente é fechado, sem aguardar o fim da resposta.
+    Texto anterior ao primeiro '{' (ex.: cercas de código Markdown) é ignorado.
+    """
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.stack = []
+        self.in_string = False
+        self.escape = False
+        self.item_start = None
+        self.key = ""
+        self.last_key = None
+        self.collecting_key = False
+
+    def feed(self, text):
+        """
+        Adiciona um trecho da resposta e retorna a lista de alterações concluídas neste trecho.
+        """
+        self.buffer += text
+        completed = []
+        while self.position < len(self.buffer):
+            char = self.buffer[self.position]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.collecting_key:
+                        self.last_key = self.key
+                        self.collecting_key = False
+                elif self.collecting_key:
+                    self.key += char
+            elif char == '"':
+                self.in_string = True
+                # Apenas as chaves do objeto raiz são acompanhadas
+                if len(self.stack) == 1:
+                    self.collecting_key = True
+                    self.key = ""
+            elif char in "{[":
+                if char == "{" and self.is_item_level():
+                    self.item_start = self.position
+                self.stack.append(char)
+            elif char in "}]" and self.stack:
+                self.stack.pop()
+                if char == "}" and self.item_start is not None and self.is_item_level():
+                    completed.extend(self.parse_item(self.buffer[self.item_start:self.position + 1]))
+                    self.item_start = None
+            self.position += 1
+        return completed
+
+    def is_item_level(self):
+        # Objeto dentro da lista 'alteracoes', que por sua vez está no objeto raiz
+        return self.stack == ["{", "["] and self.last_key == "alteracoes"
+
+    def parse_item(self, text):
+        try:
+            return [json.loads(text)]
+        except ValueError as e:
+            logging.error(f"Erro ao interpretar alteração parcial: {e}")
+            return []
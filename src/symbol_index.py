@@ -0,0 +1,300 @@
+# Standard libraries
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+
+# Auxiliary Functions
+from git_access import read_blobs
+from doc_sections import parse_sections, FENCE_PATTERN
+from edit_engine import content_lines, write_atomic
+
+# Ativa a busca de documentos afetados pelos símbolos alterados (READMEs, guias, páginas de API)
+SYMBOL_INDEX_ENABLED = os.getenv("UPDATEDOCS_SYMBOL_INDEX", "1") != "0"
+# Quantidade máxima de documentos adicionados por revisão através do índice de símbolos
+SYMBOL_MAX_DOCS = int(os.getenv("UPDATEDOCS_SYMBOL_MAX_DOCS", "5"))
+# Símbolos citados em mais documentos do que isto são genéricos demais para indicar um documento
+SYMBOL_MAX_DOC_FREQUENCY = 25
+
+# Diretório dos índices persistidos, um arquivo por repositório
+SYMBOL_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "symbol_index")
+DOC_EXTENSIONS = (".md", ".markdown", ".rst")
+
+IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*")
+FLAG_PATTERN = re.compile(r"(?<![\w-])--[a-z0-9][a-z0-9-]+")
+CODE_SPAN_PATTERN = re.compile(r"`([^`\n]+)`")
+CALL_PATTERN = re.compile(r"\b([A-Za-z_][A-Za-z0-9_]*)\s*\(")
+DEFINITION_PATTERN = re.compile(
+    r"\b(?:def|class|function|func|fn|interface|struct|enum|type|module|trait)\s+([A-Za-z_][A-Za-z0-9_]*)"
+)
+
+# Palavras reservadas comuns, ignoradas mesmo dentro de trechos de código
+STOPWORDS = {
+    "and", "args", "async", "await", "bool", "break", "case", "catch", "class", "const", "continue",
+    "def", "default", "dict", "elif", "else", "enum", "except", "export", "false", "final", "finally",
+    "float", "for", "from", "func", "function", "if", "import", "int", "kwargs", "lambda", "let",
+    "list", "new", "none", "not", "null", "object", "pass", "print", "private", "public", "raise",
+    "return", "self", "static", "str", "string", "super", "this", "throw", "true", "try", "type",
+    "undefined", "var", "void", "while", "with", "yield"
+}
+
+def is_distinctive(token):
+    # snake_case, camelCase/PascalCase, CONSTANTES_COM_SUBLINHADO, chaves pontuadas e flags de linha de comando
+    return (
+        token.startswith("--")
+        or "_" in token.strip("_")
+        or "." in token
+        or re.search(r"[a-z][A-Z]", token) is not None
+    )
+
+def normalize_symbol(token):
+    token = token.strip("_.") if not token.startswith("--") else token
+    if len(token) < 3 or token.lower() in STOPWORDS:
+        return None
+    return token
+
+def line_symbols(line, in_code):
+    """
+    Extrai os símbolos de uma linha de documentação.
+    Em blocos e trechos de código (`...`) todos os identificadores são considerados; no texto corrido,
+    apenas flags, chamadas e identificadores distintivos, evitando indexar palavras comuns.
+    """
+    symbols = set(FLAG_PATTERN.findall(line))
+    if in_code:
+        code = [line]
+    else:
+        code = CODE_SPAN_PATTERN.findall(line)
+        text = CODE_SPAN_PATTERN.sub(" ", line)
+        symbols.update(token for token in IDENTIFIER_PATTERN.findall(text) if is_distinctive(token))
+        symbols.update(CALL_PATTERN.findall(text))
+    for fragment in code:
+        symbols.update(IDENTIFIER_PATTERN.findall(fragment))
+    return {symbol for symbol in map(normalize_symbol, symbols) if symbol}
+
+def extract_doc_symbols(documentation):
+    """
+    Extrai os símbolos citados em um documento e as seções (intervalos de linhas) onde aparecem.
+
+    Retorna:
+        dict: Símbolo associado à lista de intervalos [início, fim] (base 1, inclusivos) das seções que o citam.
+    """
+    lines = content_lines(documentation)
+    sections = parse_sections(lines)
+    symbols = {}
+    in_fence = False
+    section = 0
+    for number, line in enumerate(lines, start=1):
+        while section + 1 < len(sections) and sections[section + 1].start <= number:
+            section += 1
+        if FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+            continue
+        line_range = [sections[section].start, sections[section].end] if sections else [number, number]
+        for symbol in line_symbols(line, in_fence):
+            ranges = symbols.setdefault(symbol, [])
+            if not ranges or ranges[-1] != line_range:
+                ranges.append(line_range)
+    return symbols
+
+def extract_diff_symbols(file_diff):
+    """
+    Extrai os símbolos alterados em um diff: nomes definidos (funções, classes, tipos), identificadores
+    distintivos e flags das linhas adicionadas ou removidas e a função indicada nos cabeçalhos dos hunks.
+
+    Retorna:
+        dict: Símbolo associado ao seu peso (definições pesam mais que identificadores citados).
+    """
+    symbols = {}
+    for line in content_lines(file_diff):
+        if line.startswith("@@"):
+            # O contexto após o segundo '@@' indica a função ou classe que contém o hunk
+            changed = line.split("@@", 2)[-1]
+        elif line[:1] in ("+", "-") and not line.startswith(("+++", "---")):
+            changed = line[1:]
+        else:
+            continue
+        for name in DEFINITION_PATTERN.findall(changed):
+            if normalize_symbol(name):
+                symbols[name] = 3
+        if line.startswith("@@"):
+            continue
+        for token in FLAG_PATTERN.findall(changed) + IDENTIFIER_PATTERN.findall(changed):
+            symbol = normalize_symbol(token)
+            if symbol and is_distinctive(symbol):
+                symbols.setdefault(symbol, 1)
+    return symbols
+
+class SymbolIndex:
+    """
+    Índice invertido símbolo -> documentos (e intervalos de linhas) de um repositório.
+
+    O índice guarda, para cada documento, o hash do blob indexado. A cada atualização, apenas os documentos
+    cujo blob mudou são relidos (em um único processo 'git cat-file --batch') e reindexados.
+    """
+    def __init__(self, repo_path, path=None):
+        self.repo_path = repo_path
+        key = hashlib.sha256(os.path.realpath(repo_path).encode("utf-8")).hexdigest()[:16]
+        self.path = path or os.path.join(SYMBOL_CACHE_DIR, f"{key}.json")
+        self.docs = {}
+        self.postings = {}
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as index_file:
+                self.docs = json.load(index_file).get("docs", {})
+        except FileNotFoundError:
+            self.docs = {}
+        except (OSError, ValueError, AttributeError) as e:
+            logging.error(f"Erro ao ler o índice de símbolos em cache: {e}")
+            self.docs = {}
+        self.postings = {}
+        for doc_path, entry in self.docs.items():
+            self.add_postings(doc_path, entry["symbols"])
+
+    def persist(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            write_atomic(self.path, json.dumps({"docs": self.docs}))
+        except OSError as e:
+            logging.error(f"Erro ao gravar o índice de símbolos: {e}")
+
+    def add_postings(self, doc_path, symbols):
+        for symbol, ranges in symbols.items():
+            self.postings.setdefault(symbol, {})[doc_path] = ranges
+
+    def remove_postings(self, doc_path):
+        for symbol in self.docs[doc_path]["symbols"]:
+            postings = self.postings.get(symbol)
+            if postings is not None:
+                postings.pop(doc_path, None)
+                if not postings:
+                    del self.postings[symbol]
+
+    def update(self, files):
+        """
+        Sincroniza o índice com uma árvore do repositório.
+
+        Parâmetros:
+            files (dict): Arquivos da árvore associados ao hash do blob (ver 'DocMapper.files').
+
+        Retorna:
+            int: Quantidade de documentos reindexados.
+        """
+        with self.lock:
+            docs = {path: blob for path, blob in files.items() if path.lower().endswith(DOC_EXTENSIONS)}
+            removed = [path for path in self.docs if path not in docs]
+            changed = {path: blob for path, blob in docs.items()
+                       if not blob or self.docs.get(path, {}).get("blob") != blob}
+
+            for path in removed:
+                self.remove_postings(path)
+                del self.docs[path]
+            if not changed:
+                if removed:
+                    self.persist()
+                return 0
+
+            contents = read_blobs(self.repo_path, [blob for blob in changed.values() if blob])
+            for path, blob in changed.items():
+                if path in self.docs:
+                    self.remove_postings(path)
+                documentation = contents.get(blob) if blob else self.read_file(path)
+                if documentation is None:
+                    self.docs.pop(path, None)
+                    continue
+                symbols = extract_doc_symbols(documentation)
+                self.docs[path] = {"blob": blob, "symbols": symbols}
+                self.add_postings(path, symbols)
+            self.persist()
+            return len(changed)
+
+    def read_file(self, path):
+        # Usado apenas quando o hash do blob não é conhecido
+        try:
+            with open(os.path.join(self.repo_path, path), "r", encoding="utf-8") as doc_file:
+                return doc_file.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def lookup(self, symbols):
+        """
+        Consulta os documentos que citam os símbolos informados.
+
+        Parâmetros:
+            symbols (dict): Símbolo associado ao seu peso (ver 'extract_diff_symbols').
+
+        Retorna:
+            dict: Documento associado a {"score": soma dos pesos, "symbols": símbolos encontrados}.
+        """
+        matches = {}
+        with self.lock:
+            for symbol, weight in symbols.items():
+                postings = self.postings.get(symbol)
+                if not postings or len(postings) > SYMBOL_MAX_DOC_FREQUENCY:
+                    continue
+                for doc_path in postings:
+                    match = matches.setdefault(doc_path, {"score": 0, "symbols": []})
+                    match["score"] += weight
+                    match["symbols"].append(symbol)
+        return matches
+
+index_cache = {}
+index_lock = threading.Lock()
+
+def get_symbol_index(repo_path, files):
+    """
+    Retorna o índice de símbolos do repositório, atualizado para a árvore informada.
+    O índice é mantido em memória entre execuções (ex.: no daemon) e persistido em disco.
+    """
+    key = os.path.realpath(repo_path)
+    with index_lock:
+        index = index_cache.get(key)
+        if index is None:
+            index = index_cache[key] = SymbolIndex(repo_path)
+    index.update(files)
+    return index
+
+def find_affected_docs(repo_path, patches, files, exclude=(), max_docs=SYMBOL_MAX_DOCS):
+    """
+    Encontra os documentos que citam os símbolos alterados na revisão, além dos já mapeados.
+
+    Parâmetros:
+        repo_path (str): Caminho do repositório.
+        patches (dict): Patches da revisão (caminho -> diff).
+        files (dict): Arquivos da árvore associados ao hash do blob.
+        exclude (iterable): Documentos (caminhos relativos) já associados à revisão.
+        max_docs (int): Quantidade máxima de documentos retornados.
+
+    Retorna:
+        list: Tuplas (documento, arquivos de origem cujos símbolos ele cita), ordenadas por relevância.
+              O índice só é carregado e atualizado se algum arquivo que não é documentação alterar símbolos.
+    """
+    if max_docs <= 0:
+        return []
+    changed_symbols = {}
+    for source_file, file_diff in patches.items():
+        if source_file.lower().endswith(DOC_EXTENSIONS):
+            continue
+        symbols = extract_diff_symbols(file_diff)
+        if symbols:
+            changed_symbols[source_file] = symbols
+    if not changed_symbols:
+        return []
+    index = get_symbol_index(repo_path, files)
+
+    exclude = set(exclude) | set(patches)
+    scores = {}
+    for source_file, symbols in changed_symbols.items():
+        for doc_path, match in index.lookup(symbols).items():
+            if doc_path in exclude:
+                continue
+            score, sources = scores.setdefault(doc_path, [0, []])
+            scores[doc_path][0] = score + match["score"]
+            sources.append(source_file)
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1][0], item[0]))
+    return [(doc_path, sources) for doc_path, (_, sources) in ranked[:max_docs]]
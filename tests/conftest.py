@@ -0,0 +1,14 @@
+# Os módulos do UpdateDocs ficam em src/ e são importados pelo nome, como em 'python src/UpdateDocs.py'
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+@pytest.fixture(autouse=True)
+def traces_dir(tmp_path, monkeypatch):
+    # Os traces gravados durante os testes não devem ir para src/logs
+    import metrics
+    monkeypatch.setattr(metrics, "TRACES_DIR", str(tmp_path / "traces"))
@@ -0,0 +1,43 @@
+from batching import build_batch_documents, pack_entries, split_batch_documents, split_batch_response
+
+
+def test_pack_entries_groups_small_entries_in_order():
+    assert pack_entries([100, 100, 100, 100], token_budget=250, item_max_tokens=200, max_docs=8) == [[0, 1], [2, 3]]
+
+
+def test_pack_entries_sends_large_entries_alone():
+    groups = pack_entries([100, 500, 100, 100], token_budget=1000, item_max_tokens=200, max_docs=8)
+    assert groups == [[0, 2, 3], [1]]
+
+
+def test_pack_entries_respects_max_docs():
+    assert pack_entries([10] * 5, token_budget=1000, item_max_tokens=200, max_docs=2) == [[0, 1], [2, 3], [4]]
+
+
+def test_pack_entries_disabled():
+    assert pack_entries([10, 10], token_budget=0) == [[0], [1]]
+    assert pack_entries([10, 10], token_budget=1000, max_docs=1) == [[0], [1]]
+
+
+def test_batch_documents_round_trip():
+    entries = [
+        ("docs/a.md", "diff --git a/a.py b/a.py\n+x\n", "1: # A\n2: \n3: === Documento: falso ===\n4: texto"),
+        ("docs/b.md", "diff --git a/b.py b/b.py\n-y\n", "1: # B\n2:\n3:\n4: fim"),
+    ]
+    assert split_batch_documents(build_batch_documents(entries)) == entries
+
+
+def test_split_batch_response_accepts_both_formats():
+    change = {"inicio": 1, "fim": 1, "conteudo": "x"}
+    response = {"documentos": {"a.md": {"alteracoes": [change]}, "b.md": []}}
+    assert split_batch_response(response, ["a.md", "b.md"]) == {
+        "a.md": {"alteracoes": [change]},
+        "b.md": {"alteracoes": []},
+    }
+
+
+def test_split_batch_response_leaves_missing_and_malformed_documents_out():
+    response = {"documentos": {"a.md": {"alteracoes": "x"}, "b.md": [1], "extra.md": []}}
+    assert split_batch_response(response, ["a.md", "b.md", "c.md"]) == {}
+    assert split_batch_response({"alteracoes": []}, ["a.md"]) == {}
+    assert split_batch_response(None, ["a.md"]) == {}
@@ -0,0 +1,61 @@
+import functools
+
+import llm_chain
+from chunking import build_chunk_inputs, estimate_tokens, merge_changes, split_diff
+from llm_scheduler import FakeProvider, LLMScheduler
+
+
+def make_diff(files, lines=40):
+    return "".join(
+        f"diff --git a/{name} b/{name}\n--- a/{name}\n+++ b/{name}\n@@ -1,{lines} +1,{lines} @@\n"
+        + "".join(f"-old {name} {i}\n+new {name} {i}\n" for i in range(lines))
+        for name in files
+    )
+
+
+DOCUMENTATION = "".join(f"# Seção {i}\n\nTexto da seção {i}.\n\n" for i in range(20))
+
+
+def test_split_diff_repeats_file_header_in_each_chunk():
+    chunks = split_diff(make_diff(["a.py"], lines=100), max_chars=1500)
+    assert len(chunks) > 1
+    assert all(chunk.startswith("diff --git a/a.py b/a.py\n--- a/a.py\n+++ b/a.py\n") for chunk in chunks)
+    assert sum(chunk.count("\n+new") for chunk in chunks) == 100
+
+
+def first_input_tokens(inputs):
+    return estimate_tokens(inputs[0][0]) + estimate_tokens(inputs[0][1])
+
+
+def test_build_chunk_inputs_reports_chunks_over_the_budget():
+    commit_diff = make_diff(["a.py", "b.py", "c.py"])
+    inputs, skipped = build_chunk_inputs(commit_diff, DOCUMENTATION, max_chars=1500)
+    assert len(inputs) == 3 and skipped == 0
+    limited, skipped = build_chunk_inputs(commit_diff, DOCUMENTATION, max_chars=1500, token_budget=first_input_tokens(inputs))
+    assert limited == inputs[:1]
+    assert skipped == 2
+
+
+def test_merge_changes_drops_overlapping_and_invalid_changes():
+    merged = merge_changes([
+        {"alteracoes": [{"inicio": 3, "fim": 4, "novo_conteudo": "a"}, {"inicio": 0, "fim": 1}]},
+        {"alteracoes": [{"inicio": 4, "fim": 5, "novo_conteudo": "b"}, {"inicio": 7, "fim": 6, "novo_conteudo": "c"}]},
+        None
+    ])
+    assert merged == {"alteracoes": [{"inicio": 3, "fim": 4, "novo_conteudo": "a"},
+                                     {"inicio": 7, "fim": 6, "novo_conteudo": "c"}]}
+
+
+def test_run_chunked_flags_partial_proposals(monkeypatch):
+    scheduler = LLMScheduler(FakeProvider(), requests_per_minute=0, tokens_per_minute=0)
+    commit_diff = make_diff(["a.py", "b.py", "c.py"])
+    monkeypatch.setattr(llm_chain, "build_chunk_inputs", functools.partial(build_chunk_inputs, max_chars=1500))
+    complete = llm_chain.run_chunked(scheduler, commit_diff, DOCUMENTATION)
+    assert complete["alteracoes"] and "aviso" not in complete
+
+    budget = first_input_tokens(build_chunk_inputs(commit_diff, DOCUMENTATION, max_chars=1500)[0])
+    monkeypatch.setattr(llm_chain, "build_chunk_inputs",
+                        functools.partial(build_chunk_inputs, max_chars=1500, token_budget=budget))
+    partial = llm_chain.run_chunked(scheduler, commit_diff, DOCUMENTATION)
+    assert partial["alteracoes"]
+    assert partial["aviso"] == "Proposta parcial: 2 de 3 parte(s) do diff não foram processadas."
@@ -0,0 +1,86 @@
+import json
+import os
+import socket
+import tempfile
+import threading
+
+import pytest
+
+from daemon import DaemonServer, JobQueue, remove_stale_socket
+from hook_client import enqueue
+
+
+@pytest.fixture
+def socket_path():
+    # Caminhos de sockets Unix são limitados a ~100 caracteres: usa um diretório curto
+    with tempfile.TemporaryDirectory(prefix="ud") as directory:
+        yield os.path.join(directory, "daemon.sock")
+
+
+def test_duplicate_jobs_are_ignored_while_pending_or_running(tmp_path):
+    jobs = JobQueue(str(tmp_path / "jobs.json"))
+    assert jobs.put(str(tmp_path), "abc")
+    assert not jobs.put(str(tmp_path / "."), "abc")  # Mesmo repositório, caminho diferente
+    assert jobs.put(str(tmp_path), "def")
+    assert jobs.get() == (os.path.realpath(tmp_path), "abc")
+    assert not jobs.put(str(tmp_path), "abc")
+    jobs.done()
+    assert jobs.put(str(tmp_path), "abc")
+
+
+def test_jobs_are_recovered_after_a_restart(tmp_path):
+    path = str(tmp_path / "cache" / "jobs.json")
+    jobs = JobQueue(path)
+    jobs.put(str(tmp_path), "abc")
+    jobs.put(str(tmp_path), "def")
+    jobs.get()  # Interrompido durante a execução: o job continua gravado
+
+    recovered = JobQueue(path)
+    assert list(recovered.jobs) == [(os.path.realpath(tmp_path), "abc"), (os.path.realpath(tmp_path), "def")]
+    recovered.get()
+    recovered.done()
+    with open(path, encoding="utf-8") as jobs_file:
+        assert json.load(jobs_file) == [[os.path.realpath(tmp_path), "def"]]
+
+
+def test_corrupted_jobs_file_starts_empty(tmp_path):
+    path = tmp_path / "jobs.json"
+    path.write_text("{", encoding="utf-8")
+    assert list(JobQueue(str(path)).jobs) == []
+
+
+def test_hook_client_queues_jobs_through_the_socket(tmp_path, socket_path):
+    jobs = JobQueue(str(tmp_path / "jobs.json"))
+    server = DaemonServer(socket_path, jobs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        assert enqueue(str(tmp_path), "abc", socket_path) == {"status": "queued"}
+        assert enqueue(str(tmp_path), "abc", socket_path) == {"status": "duplicate"}
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            client.sendall(b"{}\n")
+            assert json.loads(client.makefile("r").readline()) == {"status": "invalid"}
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert list(jobs.jobs) == [(os.path.realpath(tmp_path), "abc")]
+
+
+def test_stale_socket_is_removed(socket_path):
+    # Socket de uma execução anterior que terminou sem removê-lo
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(socket_path)
+    stale.close()
+    assert os.path.exists(socket_path)
+    remove_stale_socket(socket_path)
+    assert not os.path.exists(socket_path)
+    remove_stale_socket(socket_path)  # Sem socket: nada a fazer
+
+
+def test_running_daemon_socket_is_kept(socket_path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as running:
+        running.bind(socket_path)
+        running.listen()
+        with pytest.raises(RuntimeError):
+            remove_stale_socket(socket_path)
+    assert os.path.exists(socket_path)
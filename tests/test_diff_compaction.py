@@ -0,0 +1,106 @@
+import subprocess
+
+import pytest
+
+from diff_compaction import compact_patch, compact_patches, is_indentation_sensitive
+from git_access import get_commit_patches
+
+
+def git(repo_path, *args, input=None):
+    return subprocess.run(["git", *args], cwd=repo_path, check=True, capture_output=True, input=input).stdout.decode("utf-8")
+
+
+@pytest.fixture
+def repo(tmp_path):
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "config", "user.email", "test@example.com")
+    git(tmp_path, "config", "user.name", "test")
+    return tmp_path
+
+
+def commit(repo_path, files):
+    for name, content in files.items():
+        path = repo_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content.encode("utf-8"))
+    git(repo_path, "add", ".")
+    git(repo_path, "commit", "-qm", "commit")
+    return git(repo_path, "rev-parse", "HEAD").strip()
+
+
+def revision_patch(repo_path, before, after, name):
+    commit(repo_path, {name: before})
+    commit_hash = commit(repo_path, {name: after})
+    return get_commit_patches(str(repo_path), commit_hash)[name]
+
+
+def patch_for(path, removed, added):
+    return (
+        f"diff --git a/{path} b/{path}\nindex 1111111..2222222 100644\n--- a/{path}\n+++ b/{path}\n"
+        f"@@ -1,3 +1,3 @@\n ctx\n-{removed}\n+{added}\n ctx\n"
+    )
+
+
+def test_python_indentation_change_is_kept():
+    patch = patch_for("app.py", "    return value", "return value")
+    compacted = compact_patch("app.py", patch)
+    assert "-    return value\n+return value\n" in compacted
+    assert "index " not in compacted
+
+
+def test_indentation_change_is_dropped_for_insensitive_files():
+    patch = patch_for("app.js", "    return value;", "  return value;")
+    compacted = compact_patch("app.js", patch)
+    assert "@@" not in compacted
+    assert "alterações apenas de formatação" in compacted
+
+
+def test_whitespace_inside_string_literal_is_kept():
+    patch = patch_for("app.js", 'greet("hello world");', 'greet("helloworld");')
+    assert '+greet("helloworld");' in compact_patch("app.js", patch)
+
+
+def test_line_break_changes_are_kept():
+    patch = (
+        "diff --git a/app.js b/app.js\n--- a/app.js\n+++ b/app.js\n"
+        "@@ -1 +1,2 @@\n-call(a, b);\n+call(a,\n+     b);\n"
+    )
+    assert "+     b);" in compact_patch("app.js", patch)
+
+
+def test_trailing_whitespace_only_file_is_kept_with_note():
+    patch = patch_for("app.py", "x = 1   ", "x = 1")
+    compacted = compact_patches({"app.py": patch})
+    assert list(compacted) == ["app.py"]
+    assert compacted["app.py"].startswith("diff --git a/app.py b/app.py\n")
+    assert "@@" not in compacted["app.py"]
+    assert "2 linha(s) com alterações apenas de formatação" in compacted["app.py"]
+
+
+def test_line_ending_only_changes_are_dropped(repo):
+    patch = revision_patch(repo, "a = 1\r\nb = 2\r\n", "a = 1\nb = 2\n", "app.py")
+    assert "@@" not in compact_patch("app.py", patch)
+
+
+def test_generated_file_is_summarized():
+    patch = patch_for("package-lock.json", '"a": 1', '"a": 2')
+    compacted = compact_patch("package-lock.json", patch)
+    assert compacted.endswith("... [arquivo gerado: 1 linha(s) adicionada(s) e 1 removida(s) omitidas]\n")
+
+
+def test_indentation_sensitive_patterns():
+    assert is_indentation_sensitive("src/app.py")
+    assert is_indentation_sensitive("config/ci.yml")
+    assert is_indentation_sensitive("Makefile")
+    assert not is_indentation_sensitive("src/app.js")
+
+
+def test_compacted_patch_applies_to_the_revision(repo):
+    before = "".join(f"line {i}\n" for i in range(40))
+    after = before.replace("line 5\n", "line 5 changed\n").replace("line 30\n", "line 30\x0cchanged\n")
+    patch = revision_patch(repo, before, after, "notes.txt")
+    compacted = compact_patch("notes.txt", patch, context=1)
+    assert compacted.count("@@ -") == 2
+    assert "+line 30\x0cchanged" in compacted
+    # O patch compactado continua aplicável (em sentido reverso) sobre a revisão
+    git(repo, "apply", "--check", "-R", input=compacted.encode("utf-8"))
@@ -0,0 +1,56 @@
+import os
+import subprocess
+
+import pytest
+
+import doc_mapping
+from doc_mapping import DEFAULT_RULES, DocMapper, get_doc_mapper
+
+
+def git(repo_path, *args):
+    return subprocess.run(["git", *args], cwd=repo_path, check=True, capture_output=True, text=True).stdout
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.setattr(doc_mapping, "INDEX_CACHE_DIR", str(tmp_path / "doc_index"))
+    monkeypatch.setattr(doc_mapping, "mapper_cache", doc_mapping.OrderedDict())
+    path = tmp_path / "repo"
+    path.mkdir()
+    git(path, "init", "-q")
+    git(path, "config", "user.email", "test@example.com")
+    git(path, "config", "user.name", "test")
+    for name in ("src/app.py", "src/util.py", "docs/app.md"):
+        (path / name).parent.mkdir(parents=True, exist_ok=True)
+        (path / name).write_text("x\n", encoding="utf-8")
+    git(path, "add", ".")
+    git(path, "commit", "-qm", "base")
+    return path
+
+
+def test_default_rule_maps_src_to_docs():
+    mapper = DocMapper(DEFAULT_RULES, ["src/utils/Helper.py", "docs/utils/Helper.md", "pkg/src/a.py", "pkg/docs/a.md"])
+    assert mapper.lookup("src/utils/Helper.py") == ["docs/utils/Helper.md"]
+    assert mapper.lookup("pkg/src/a.py") == ["pkg/docs/a.md"]
+    assert mapper.lookup("src/other.py") == []
+
+
+def test_untracked_docs_in_the_working_tree_are_mapped(repo):
+    (repo / "docs" / "util.md").write_text("# Util\n", encoding="utf-8")
+    mapper = get_doc_mapper(str(repo))
+    assert mapper.lookup("src/app.py") == ["docs/app.md"]
+    assert mapper.lookup("src/util.py") == ["docs/util.md"]
+
+
+def test_in_memory_and_disk_caches_are_bounded(repo, monkeypatch):
+    monkeypatch.setattr(doc_mapping, "MAPPER_CACHE_MAX_ENTRIES", 2)
+    for i in range(4):
+        (repo / "src" / f"new{i}.py").write_text("y\n", encoding="utf-8")
+        git(repo, "add", ".")
+        git(repo, "commit", "-qm", f"commit {i}")
+        get_doc_mapper(str(repo))
+    assert len(doc_mapping.mapper_cache) == 2
+    assert len(os.listdir(doc_mapping.INDEX_CACHE_DIR)) == 4
+
+    doc_mapping.prune_index_cache(max_files=2)
+    assert len(os.listdir(doc_mapping.INDEX_CACHE_DIR)) == 2
@@ -0,0 +1,74 @@
+from doc_sections import Section, SECTION_SELECTION_THRESHOLD, enumerate_sections, parse_sections, select_sections
+from llm_chain import enumerate_lines, prepare_documentation
+
+DIFF = (
+    "diff --git a/src/cache.py b/src/cache.py\n--- a/src/cache.py\n+++ b/src/cache.py\n"
+    "@@ -1,2 +1,2 @@ def load_cache():\n-    return read_cache_file()\n+    return read_cache_file(path)\n"
+)
+
+
+def test_parse_sections_ignores_headings_inside_fenced_code():
+    lines = ["Introdução", "# Uso", "```sh", "# comentário do shell", "```", "~~~", "## também não", "~~~",
+             "## Configuração", "texto"]
+    assert parse_sections(lines) == [
+        Section("", 0, 1, 1),
+        Section("Uso", 1, 2, 8),
+        Section("Configuração", 2, 9, 10),
+    ]
+
+
+def test_parse_sections_without_headings_is_a_single_section():
+    assert parse_sections(["a", "b"]) == [Section("", 0, 1, 2)]
+    assert parse_sections([]) == []
+
+
+def build_document(filler):
+    return (
+        "# Projeto\n\nVisão geral.\n\n"
+        f"## Instalação\n\n{filler}\n\n"
+        "## Cache\n\nA função `load_cache` chama `read_cache_file`.\n\n"
+        f"## Licença\n\n{filler}\n"
+    )
+
+
+def test_select_sections_keeps_relevant_sections_within_the_budget():
+    document = build_document("Texto sem relação.")
+    titles = [section.title for section in select_sections(document, DIFF, budget=10 ** 6)]
+    # Seções sem termos em comum com o diff não são enviadas
+    assert titles == ["Cache"]
+
+
+def test_select_sections_always_keeps_the_most_relevant_section():
+    document = build_document("Texto sem relação.")
+    assert [section.title for section in select_sections(document, DIFF, budget=1)] == ["Cache"]
+
+
+def test_select_sections_skips_related_sections_over_the_budget():
+    # A instalação cita o cache (relação fraca) mas não cabe no orçamento restante
+    document = build_document("O cache fica em disco. " + "x" * 500)
+    sections = select_sections(document, DIFF, budget=200)
+    assert [section.title for section in sections] == ["Cache"]
+    sections = select_sections(document, DIFF, budget=10 ** 6)
+    assert [section.title for section in sections] == ["Instalação", "Cache", "Licença"]
+
+
+def test_enumerate_sections_keeps_the_original_line_numbers():
+    document = build_document("Texto sem relação.")
+    lines = document.split("\n")
+    cache = next(section for section in parse_sections(lines[:-1]) if section.title == "Cache")
+    output = enumerate_sections(document, [cache]).split("\n")
+    assert output[0] == "..."
+    assert output[1] == f"{cache.start}: ## Cache"
+    assert output[3] == f"{cache.start + 2}: {lines[cache.start + 1]}"
+    assert output[-1] == "..."
+
+
+def test_prepare_documentation_only_trims_documents_over_the_threshold():
+    small = build_document("Texto sem relação.")
+    assert prepare_documentation(DIFF, small) == enumerate_lines(small)
+
+    large = build_document("Texto sem relação. " * (SECTION_SELECTION_THRESHOLD // 19))
+    assert len(large) > SECTION_SELECTION_THRESHOLD
+    prepared = prepare_documentation(DIFF, large)
+    assert "## Cache" in prepared and "## Licença" not in prepared
+    assert len(prepared) < len(large)
@@ -0,0 +1,98 @@
+import os
+import stat
+import subprocess
+
+import pytest
+
+from doc_sections import enumerate_sections, get_section_index
+from edit_engine import (EditError, apply_edits, compute_hunks, content_lines, normalize_edits, split_lines,
+                         unified_diff, validate_edit, write_atomic)
+from llm_chain import enumerate_lines
+
+DOCUMENT = "# Título\n\nPrimeira linha.\nSegunda linha.\n"
+
+
+def change(start, end, content):
+    return {"inicio": start, "fim": end, "novo_conteudo": content}
+
+
+def apply(text, alteracoes):
+    edits, problems = normalize_edits(alteracoes, len(content_lines(text)))
+    return apply_edits(text, edits), problems
+
+
+def test_validate_edit_rejects_invalid_ranges_and_types():
+    assert validate_edit(change(1, 1, "x"), 4) == (1, 1, "x")
+    assert validate_edit(change(5, 4, "x"), 4) == (5, 4, "x")  # Inserção após a última linha
+    for invalid in (change(0, 1, "x"), change(3, 1, "x"), change(1, 6, "x"), change(True, 1, "x"),
+                    change(1, 1, None), {"inicio": 1}):
+        with pytest.raises(EditError):
+            validate_edit(invalid, 5)
+
+
+def test_replace_insert_and_delete_in_one_pass():
+    result, problems = apply(DOCUMENT, [
+        change(3, 3, "Primeira linha revisada."),
+        change(2, 1, "Introdução."),       # Inserção antes da linha 2
+        change(4, 4, "")                    # Substituição por uma linha vazia
+    ])
+    assert problems == []
+    assert result == "# Título\nIntrodução.\n\nPrimeira linha revisada.\n\n"
+
+
+def test_document_ending_with_newline_has_no_extra_line():
+    # A linha vazia após a quebra final não é numerada para o modelo, logo não pode ser alvo de alterações
+    assert len(content_lines("x\n")) == 1
+    result, problems = apply("x\n", [change(2, 1, "y")])
+    assert (result, problems) == ("x\ny\n", [])
+    result, problems = apply("x\n", [change(3, 2, "z")])
+    assert result == "x\n"
+    assert problems == ["Linha inicial fora do documento (1 linhas): 3"]
+
+
+def test_overlapping_and_invalid_changes_are_reported():
+    result, problems = apply(DOCUMENT, [change(3, 4, "A"), change(4, 4, "B"), change(9, 9, "C")])
+    assert result == "# Título\n\nA\n"
+    assert len(problems) == 2
+
+
+def test_line_numbers_shown_to_the_model_match_the_applied_ones():
+    # '\x0c', '\r' e '\u2028' não quebram a linha: a numeração enviada ao modelo é a mesma usada na aplicação
+    document = "# Título\x0c\nlinha\ra\u2028b\nalvo\n"
+    assert enumerate_lines(document).split("\n")[2] == "3: alvo"
+    assert enumerate_sections(document, get_section_index(document)).split("\n")[2] == "3: alvo"
+    assert content_lines(document) == split_lines(document)[:-1]
+    result, _ = apply(document, [change(3, 3, "novo")])
+    assert result == "# Título\x0c\nlinha\ra\u2028b\nnovo\n"
+
+
+def test_compute_hunks_does_not_repeat_context():
+    text = "\n".join(f"linha {i}" for i in range(1, 11))
+    edits, _ = normalize_edits([change(3, 3, "A"), change(5, 5, "B")], 10)
+    first, second = compute_hunks(text, edits, context=2)
+    assert first["contexto_antes"] == ["linha 1", "linha 2"]
+    assert first["contexto_depois"] == ["linha 4"]
+    assert second["contexto_antes"] == []
+    assert second["removidas"] == ["linha 5"]
+
+
+def test_unified_diff_applies_with_git(tmp_path):
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    old = "a\nfolha\x0cb\nc"
+    new = "a\nfolha\x0cB\nc\nd\n"
+    (tmp_path / "doc.md").write_text(old, encoding="utf-8", newline="")
+    patch = unified_diff("doc.md", old, new)
+    assert patch.startswith("diff --git a/doc.md b/doc.md\n")
+    assert unified_diff("doc.md", old, old) == ""
+    subprocess.run(["git", "apply"], input=patch.encode("utf-8"), cwd=tmp_path, check=True)
+    assert (tmp_path / "doc.md").read_bytes().decode("utf-8") == new
+
+
+def test_write_atomic_preserves_permissions(tmp_path):
+    path = tmp_path / "doc.md"
+    path.write_text("antigo\n", encoding="utf-8")
+    os.chmod(path, 0o600)
+    write_atomic(str(path), "novo\n")
+    assert path.read_text(encoding="utf-8") == "novo\n"
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
@@ -0,0 +1,93 @@
+import subprocess
+
+import pytest
+
+from git_access import commit_files, get_commit_patches, parse_patches
+
+
+def git(repo_path, *args):
+    return subprocess.run(["git", *args], cwd=repo_path, check=True, capture_output=True, text=True).stdout
+
+
+@pytest.fixture
+def repo(tmp_path):
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "config", "user.email", "test@example.com")
+    git(tmp_path, "config", "user.name", "test")
+    return tmp_path
+
+
+def commit(repo_path, files, message="commit"):
+    for name, content in files.items():
+        path = repo_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content.encode("utf-8"))
+    git(repo_path, "add", ".")
+    git(repo_path, "commit", "-qm", message)
+    return git(repo_path, "rev-parse", "HEAD").strip()
+
+
+def test_parse_patches_splits_blocks_and_drops_commit_header():
+    output = (
+        "commit abc\n\n    message\n\n"
+        "diff --git a/one.py b/one.py\n--- a/one.py\n+++ b/one.py\n@@ -1 +1 @@\n-a\n+b\n"
+        "diff --git a/two.py b/two.py\n--- a/two.py\n+++ b/two.py\n@@ -1 +1 @@\n-c\n+d\n"
+    )
+    patches = parse_patches(output)
+    assert list(patches) == ["one.py", "two.py"]
+    assert patches["one.py"] == "diff --git a/one.py b/one.py\n--- a/one.py\n+++ b/one.py\n@@ -1 +1 @@\n-a\n+b\n"
+
+
+def test_parse_patches_uses_new_path_for_renames_and_old_path_for_deletions():
+    output = (
+        "diff --git a/old.py b/new.py\nsimilarity index 90%\nrename from old.py\nrename to new.py\n"
+        "diff --git a/gone.py b/gone.py\ndeleted file mode 100644\n--- a/gone.py\n+++ /dev/null\n@@ -1 +0,0 @@\n-x\n"
+    )
+    assert list(parse_patches(output)) == ["new.py", "gone.py"]
+
+
+def test_parse_patches_keeps_form_feed_and_carriage_return_inside_lines():
+    patch = "diff --git a/f.txt b/f.txt\n--- a/f.txt\n+++ b/f.txt\n@@ -1 +1 @@\n-a\x0cb\r\n+a b\rc\r\n"
+    assert parse_patches(patch) == {"f.txt": patch}
+
+
+def test_commit_patches_ignore_noprefix_configuration(repo):
+    commit(repo, {"src/app.py": "x = 1\n"})
+    git(repo, "config", "diff.noprefix", "true")
+    commit_hash = commit(repo, {"src/app.py": "x = 2\n", "docs/app.md": "# App\n"})
+    patches = get_commit_patches(str(repo), commit_hash)
+    assert set(patches) == {"src/app.py", "docs/app.md"}
+    assert "+++ b/src/app.py\n" in patches["src/app.py"]
+
+
+def test_commit_patches_round_trip_special_line_separators(repo):
+    commit(repo, {"page.txt": "first\x0csecond\nthird\n"})
+    commit_hash = commit(repo, {"page.txt": "first\x0csecond\nthird\rfourth\n"})
+    patch = get_commit_patches(str(repo), commit_hash)["page.txt"]
+    assert " first\x0csecond\n" in patch
+    assert "+third\rfourth\n" in patch
+    subprocess.run(["git", "apply", "--check", "-R"], input=patch, cwd=repo, check=True, text=True)
+
+
+def test_commit_patches_keep_crlf_line_endings(repo):
+    commit(repo, {"win.txt": "a\r\nb\r\n"})
+    commit_hash = commit(repo, {"win.txt": "a\r\nc\r\n"})
+    patch = get_commit_patches(str(repo), commit_hash)["win.txt"]
+    assert "-b\r\n+c\r\n" in patch
+
+
+def test_commit_files_never_overwrites_an_existing_branch(repo):
+    parent = commit(repo, {"docs/app.md": "# App\n"})
+    created = commit_files(str(repo), parent, {"docs/app.md": "# App v2\n"}, "docs", "docs/update")
+    assert git(repo, "rev-parse", "docs/update").strip() == created
+    assert git(repo, "show", f"{created}:docs/app.md") == "# App v2\n"
+
+    # O branch não aponta mais para o commit de origem: nada é alterado
+    with pytest.raises(ValueError):
+        commit_files(str(repo), parent, {"docs/app.md": "# App v3\n"}, "docs", "docs/update")
+    assert git(repo, "rev-parse", "docs/update").strip() == created
+
+    # Um branch que aponta para o commit de origem é avançado
+    git(repo, "branch", "docs/ff", parent)
+    advanced = commit_files(str(repo), parent, {"docs/app.md": "# App v3\n"}, "docs", "docs/ff")
+    assert git(repo, "rev-parse", "docs/ff").strip() == advanced
@@ -0,0 +1,102 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+import doc_mapping
+import llm_chain
+import symbol_index
+import UpdateDocs
+from llm_scheduler import FakeProvider
+
+
+def git(repo_path, *args):
+    return subprocess.run(["git", *args], cwd=repo_path, check=True, capture_output=True, text=True).stdout
+
+
+class FailingProvider(FakeProvider):
+    # Falha (sem novas tentativas) nas requisições que incluem o diff de src/b.py
+    def respond(self, inputs):
+        if "src/b.py" in json.dumps(inputs):
+            raise RuntimeError("resposta inválida")
+        return super().respond(inputs)
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    repo_path = tmp_path / "repo"
+    repo_path.mkdir()
+    git(repo_path, "init", "-q")
+    git(repo_path, "config", "user.email", "test@example.com")
+    git(repo_path, "config", "user.name", "test")
+    for name in ("a", "b"):
+        (repo_path / "src").mkdir(exist_ok=True)
+        (repo_path / "docs").mkdir(exist_ok=True)
+        (repo_path / "src" / f"{name}.py").write_text("def main():\n    return 0\n", encoding="utf-8")
+        (repo_path / "docs" / f"{name}.md").write_text(f"# {name}\n\nFunção `main`.\n", encoding="utf-8")
+    git(repo_path, "add", ".")
+    git(repo_path, "commit", "-qm", "base")
+    for name in ("a", "b"):
+        with open(repo_path / "src" / f"{name}.py", "a", encoding="utf-8") as source:
+            source.write("\ndef extra():\n    return 1\n")
+    git(repo_path, "commit", "-qam", "change")
+
+    # Provedor local, sem cache de propostas e com o estado e os índices em um diretório temporário
+    monkeypatch.setenv("UPDATEDOCS_PROVIDER", "fake")
+    monkeypatch.setattr(llm_chain, "LLM_PROVIDER", "fake")
+    monkeypatch.setattr(llm_chain, "scheduler_registry", {})
+    monkeypatch.setattr(llm_chain, "CACHE_ENABLED", False)
+    monkeypatch.setattr(UpdateDocs, "STATE_PATH", str(tmp_path / "state.json"))
+    monkeypatch.setattr(doc_mapping, "INDEX_CACHE_DIR", str(tmp_path / "doc_index"))
+    monkeypatch.setattr(symbol_index, "SYMBOL_CACHE_DIR", str(tmp_path / "symbol_index"))
+    return repo_path
+
+
+def run_main(monkeypatch, tmp_path, repo_path, *args):
+    summary_path = tmp_path / "summary.json"
+    monkeypatch.setattr(sys, "argv", ["UpdateDocs.py", str(repo_path), "HEAD", "--headless",
+                                      "--summary", str(summary_path), *args])
+    status = UpdateDocs.main()
+    return status, json.loads(summary_path.read_text(encoding="utf-8"))
+
+
+def test_diff_output_applies_to_the_working_tree(repo, tmp_path, monkeypatch):
+    patch_path = tmp_path / "docs.patch"
+    status, summary = run_main(monkeypatch, tmp_path, repo, "--diff-file", str(patch_path))
+    assert status == UpdateDocs.EXIT_OK
+    assert summary["changed"] == ["docs/a.md", "docs/b.md"]
+    assert summary["failed"] == [] and summary["partial"] == []
+    patch = patch_path.read_text(encoding="utf-8")
+    assert "+> Atualizado a partir de: src/a.py" in patch
+    git(repo, "apply", "--check", str(patch_path))
+    # A revisão é registrada como documentada
+    assert json.loads((tmp_path / "state.json").read_text(encoding="utf-8"))
+
+
+def test_branch_output_creates_a_commit_without_touching_the_working_tree(repo, tmp_path, monkeypatch):
+    head = git(repo, "rev-parse", "HEAD").strip()
+    status, summary = run_main(monkeypatch, tmp_path, repo, "--output", "branch", "--branch", "docs/update")
+    assert status == UpdateDocs.EXIT_OK
+    assert summary["branch"] == "docs/update"
+    assert git(repo, "rev-parse", "docs/update").strip() == summary["commit"]
+    assert git(repo, "rev-parse", f"{summary['commit']}^").strip() == head
+    assert "> Atualizado a partir de: src/b.py" in git(repo, "show", "docs/update:docs/b.md")
+    assert git(repo, "status", "--porcelain") == ""
+
+    # Um branch existente que não aponta para o HEAD não é sobrescrito
+    status, summary = run_main(monkeypatch, tmp_path, repo, "--output", "branch", "--branch", "docs/update")
+    assert status == UpdateDocs.EXIT_ERROR
+    assert "docs/update" in summary["error"]
+
+
+def test_failed_documents_return_exit_partial(repo, tmp_path, monkeypatch):
+    monkeypatch.setitem(llm_chain.PROVIDERS, "fake", lambda model_name, temperature: FailingProvider(latency=0))
+    patch_path = tmp_path / "docs.patch"
+    status, summary = run_main(monkeypatch, tmp_path, repo, "--diff-file", str(patch_path))
+    assert status == UpdateDocs.EXIT_PARTIAL
+    assert summary["changed"] == ["docs/a.md"]
+    assert [entry["doc"] for entry in summary["failed"]] == ["docs/b.md"]
+    git(repo, "apply", "--check", str(patch_path))
+    # Revisões com falhas continuam pendentes para o próximo --since-last
+    assert not (tmp_path / "state.json").exists()
@@ -0,0 +1,153 @@
+import json
+import threading
+import time
+
+import pytest
+
+import llm_scheduler
+from batching import build_batch_documents
+from llm_scheduler import FakeProvider, FakeRateLimitError, LLMScheduler, TokenBucket, is_retryable
+from metrics import registry
+
+DOCUMENTATION = "1: # Título\n2: \n3: Texto.\n"
+DIFF = "diff --git a/src/app.py b/src/app.py\n--- a/src/app.py\n+++ b/src/app.py\n@@ -1 +1 @@\n-a\n+b\n"
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "backoff_delay", lambda attempt: 0)
+
+
+def make_scheduler(provider=None, **kwargs):
+    kwargs.setdefault("requests_per_minute", 0)
+    kwargs.setdefault("tokens_per_minute", 0)
+    return LLMScheduler(provider or FakeProvider(latency=0, failure_rate=0), **kwargs)
+
+
+def inputs(diff=DIFF):
+    return {"commit_diff": diff, "documentation_content": DOCUMENTATION}
+
+
+def test_fake_provider_is_deterministic():
+    response = json.loads(make_scheduler().submit(inputs()).result(timeout=5))
+    assert response == {"alteracoes": [{"inicio": 1, "fim": 1,
+                                        "novo_conteudo": "# Título\n\n> Atualizado a partir de: src/app.py"}]}
+    assert json.loads(make_scheduler().submit(inputs()).result(timeout=5)) == response
+
+
+def test_fake_provider_answers_batches_by_document_key():
+    documents = build_batch_documents([("docs/a.md", DIFF, DOCUMENTATION), ("docs/b.md", DIFF, "")])
+    response = json.loads(make_scheduler().submit({"documents": documents}).result(timeout=5))
+    assert set(response["documentos"]) == {"docs/a.md", "docs/b.md"}
+    assert response["documentos"]["docs/b.md"] == {"alteracoes": []}
+
+
+def test_streaming_delivers_every_chunk():
+    chunks = []
+    result = make_scheduler().submit(inputs(), on_chunk=chunks.append).result(timeout=5)
+    assert len(chunks) > 1
+    assert "".join(chunks) == result
+
+
+def test_rate_limit_errors_are_retried_until_the_limit():
+    provider = FakeProvider(latency=0, failure_rate=1)
+    future = make_scheduler(provider, max_retries=2).submit(inputs())
+    with pytest.raises(FakeRateLimitError):
+        future.result(timeout=5)
+    assert sum(provider.attempts.values()) == 3
+
+
+def test_partial_failures_succeed_after_retries():
+    provider = FakeProvider(latency=0, failure_rate=0.5)
+    scheduler = make_scheduler(provider, max_retries=20)
+    futures = [scheduler.submit(inputs(DIFF.replace("+b", f"+b{i}"))) for i in range(10)]
+    assert all(json.loads(future.result(timeout=5))["alteracoes"] for future in futures)
+    assert sum(provider.attempts.values()) > 10
+
+
+def test_non_retryable_errors_fail_immediately():
+    class BrokenProvider:
+        name = "broken"
+        calls = 0
+
+        def invoke(self, inputs):
+            BrokenProvider.calls += 1
+            raise ValueError("prompt inválido")
+
+    with pytest.raises(ValueError):
+        make_scheduler(BrokenProvider()).submit(inputs()).result(timeout=5)
+    assert BrokenProvider.calls == 1
+    assert is_retryable(TimeoutError()) and is_retryable(RuntimeError("503 Service Unavailable"))
+
+
+def test_calls_over_the_timeout_are_abandoned():
+    class SlowProvider:
+        name = "slow"
+
+        def invoke(self, inputs):
+            time.sleep(1)
+            return "{}"
+
+    with pytest.raises(TimeoutError):
+        make_scheduler(SlowProvider(), timeout=0.05, max_retries=0).submit(inputs()).result(timeout=5)
+
+
+def test_lower_priority_values_run_first():
+    order = []
+    release = threading.Event()
+
+    class RecordingProvider:
+        name = "recording"
+
+        def invoke(self, inputs):
+            if inputs["commit_diff"] == "first":
+                release.wait(5)
+            order.append(inputs["commit_diff"])
+            return "{}"
+
+    scheduler = make_scheduler(RecordingProvider(), concurrency=1)
+    futures = [scheduler.submit(inputs("first"))]
+    time.sleep(0.05)  # O primeiro job ocupa o único worker
+    futures += [scheduler.submit(inputs("low"), priority=5), scheduler.submit(inputs("high"), priority=0)]
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    assert order == ["first", "high", "low"]
+
+
+def test_token_bucket_throttles_and_reports_waits():
+    bucket = TokenBucket(rate_per_minute=600, capacity=1)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() > 0.0
+    assert TokenBucket(0).acquire(10 ** 9) == 0.0
+
+    key = registry.key("updatedocs_llm_throttled_seconds", {"provider": "fake"})
+    before = registry.summaries.get(key, (0.0, 0))[1]
+    make_scheduler().submit(inputs()).result(timeout=5)
+    assert registry.summaries[key][1] == before + 1
+
+
+def test_cancel_pending_drops_queued_requests_and_stops_retries():
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    class BlockingProvider:
+        name = "fake"
+
+        def invoke(self, inputs):
+            calls.append(inputs["commit_diff"])
+            started.set()
+            release.wait(5)
+            raise FakeRateLimitError("429 Too Many Requests")
+
+    scheduler = make_scheduler(BlockingProvider(), concurrency=1)
+    running = scheduler.submit(inputs("running"))
+    started.wait(5)
+    queued = [scheduler.submit(inputs("queued")) for _ in range(2)]
+    assert scheduler.cancel_pending() == 2
+    assert all(future.cancelled() for future in queued)
+    release.set()
+    # O erro temporário não é repetido após o cancelamento
+    with pytest.raises(FakeRateLimitError):
+        running.result(timeout=5)
+    assert calls == ["running"]
@@ -0,0 +1,27 @@
+from metrics import registry
+from proposal_cache import ProposalCache, make_key
+
+
+def cache_requests(result):
+    return registry.counters.get(registry.key("updatedocs_cache_requests_total", {"result": result}), 0)
+
+
+def test_hits_and_misses_are_published_as_metrics(tmp_path):
+    cache = ProposalCache(path=str(tmp_path / "proposals.sqlite"))
+    key = make_key("diff --git a/x b/x\n+y\n", "doc", "prompt", "model", 0.3)
+    hits, misses = cache_requests("hit"), cache_requests("miss")
+
+    assert cache.get(key) is None
+    cache.set(key, '{"alteracoes": []}')
+    assert cache.get(key) == '{"alteracoes": []}'
+
+    assert cache.stats() == {"hits": 1, "misses": 1}
+    assert (cache_requests("hit"), cache_requests("miss")) == (hits + 1, misses + 1)
+    assert 'updatedocs_cache_requests_total{result="hit"}' in registry.render()
+
+
+def test_key_ignores_blob_hashes_and_trailing_whitespace():
+    first = make_key("commit a\ndiff --git a/x b/x\nindex 111..222\n+y  \n", "doc", "p", "m", 0.3)
+    second = make_key("diff --git a/x b/x\nindex 333..444\n+y\n", "doc", "p", "m", 0.3)
+    assert first == second
+    assert first != make_key("diff --git a/x b/x\n+y\n", "doc", "p", "m", 0.4)
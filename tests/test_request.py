@@ -0,0 +1,88 @@
+import pytest
+
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+
+import request
+from request import ReviewQueue
+
+DOCUMENT = "# Título\n\nTexto.\n"
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    queue = ReviewQueue()
+    monkeypatch.setattr(request, "review_queue", queue)
+    return queue
+
+
+@pytest.fixture
+def client(queue):
+    return TestClient(request.app)
+
+
+def change(start, end, content):
+    return {"inicio": start, "fim": end, "novo_conteudo": content}
+
+
+def test_item_still_generating_cannot_be_decided(queue, client):
+    item_id = queue.enqueue("app.py", "docs/app.md", DOCUMENT, [], status="generating")
+    response = client.post(f"/review/items/{item_id}/decision", json={"Approved": True})
+    assert response.status_code == 409
+    assert client.get("/review/items").json()["items"][0]["status"] == "generating"
+
+    queue.complete(item_id, [change(3, 3, "Texto revisado.")])
+    assert client.post(f"/review/items/{item_id}/decision", json={"Approved": True}).status_code == 200
+    # Uma segunda decisão para o mesmo item é recusada
+    assert client.post(f"/review/items/{item_id}/decision", json={"Approved": False}).status_code == 409
+    assert list(queue.wait_decisions([item_id])) == [(item_id, True, "# Título\n\nTexto revisado.\n")]
+
+
+def test_unknown_items_return_404(client):
+    assert client.get("/review/items/unknown").status_code == 404
+    assert client.post("/review/items/unknown/decision", json={"Approved": True}).status_code == 404
+
+
+def test_streamed_changes_keep_partial_hunks_and_report_invalid_edits(queue, client):
+    item_id = queue.enqueue("app.py", "docs/app.md", DOCUMENT, [], status="generating")
+    queue.append_change(item_id, change(3, 3, "Texto revisado."))
+    queue.append_change(item_id, change(9, 9, "Fora do documento"))
+    item = client.get(f"/review/items/{item_id}").json()
+    assert [hunk["inicio"] for hunk in item["hunks"]] == [3]
+    assert len(item["alteracoes"]) == 2
+
+    queue.complete(item_id, item["alteracoes"])
+    item = client.get(f"/review/items/{item_id}").json()
+    assert item["status"] == "pending"
+    assert item["error"].startswith("1 alteração(ões) inválida(s) descartada(s)")
+    # Apenas a alteração válida é aplicada na aprovação
+    queue.decide(item_id, True)
+    assert list(queue.wait_decisions([item_id])) == [(item_id, True, "# Título\n\nTexto revisado.\n")]
+
+
+def test_bulk_decisions_skip_generating_and_unknown_items(queue, client):
+    ready = [queue.enqueue("a.py", "docs/a.md", DOCUMENT, [change(1, 1, "# A")]) for _ in range(2)]
+    generating = queue.enqueue("b.py", "docs/b.md", DOCUMENT, [], status="generating")
+
+    response = client.post("/review/decisions", json={"Approved": False, "Ids": [ready[0], generating, "unknown"]})
+    assert response.json()["decided"] == [ready[0]]
+    assert response.json()["skipped"] == [generating, "unknown"]
+
+    # Sem 'Ids', a decisão vale para todos os itens pendentes (os em geração continuam aguardando)
+    response = client.post("/review/decisions", json={"Approved": True})
+    assert response.json()["decided"] == [ready[1]]
+    assert dict((item_id, approved) for item_id, approved, _ in queue.wait_decisions(ready)) == {
+        ready[0]: False, ready[1]: True
+    }
+    assert [item["id"] for item in client.get("/review/items").json()["items"]] == [generating]
+
+
+def test_approve_changes_route_decides_the_oldest_pending_item(queue, client):
+    assert client.post("/approve_changes", json={"Approved": True}).status_code == 404
+    first = queue.enqueue("a.py", "docs/a.md", DOCUMENT, [change(1, 1, "# A")])
+    second = queue.enqueue("b.py", "docs/b.md", DOCUMENT, [change(1, 1, "# B")])
+    # O campo 'Data' de clientes antigos é ignorado: o texto é calculado pelo servidor
+    response = client.post("/approve_changes", json={"Approved": True, "Data": "ignorado"})
+    assert response.json() == {"status": "success", "code": 200}
+    assert list(queue.wait_decisions([first])) == [(first, True, "# A\n\nTexto.\n")]
+    assert queue.oldest_pending() == second
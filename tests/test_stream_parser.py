@@ -0,0 +1,51 @@
+import json
+
+from stream_parser import AlteracoesStreamParser
+
+
+def feed_in_parts(text, size):
+    parser = AlteracoesStreamParser()
+    items = []
+    for i in range(0, len(text), size):
+        items.extend(parser.feed(text[i:i + size]))
+    return items
+
+
+RESPONSE = {
+    "resumo": "ignorado",
+    "outros": [{"inicio": 99}],
+    "alteracoes": [
+        {"inicio": 1, "fim": 2, "conteudo": "texto com } e { e \"aspas\" e \\ barra"},
+        {"inicio": 5, "fim": 5, "conteudo": "bloco", "extra": {"nivel": [1, {"x": 2}]}}
+    ]
+}
+
+
+def test_items_are_returned_in_order_for_any_chunk_size():
+    text = json.dumps(RESPONSE, ensure_ascii=False)
+    for size in (1, 2, 7, len(text)):
+        assert feed_in_parts(text, size) == RESPONSE["alteracoes"]
+
+
+def test_each_item_is_returned_as_soon_as_it_closes():
+    parser = AlteracoesStreamParser()
+    assert parser.feed('{"alteracoes": [{"inicio": 1, "fim": 1, "conteudo": "a"}') == [
+        {"inicio": 1, "fim": 1, "conteudo": "a"}
+    ]
+    assert parser.feed(', {"inicio": 2') == []
+    assert parser.feed(', "fim": 2, "conteudo": "b"}]}') == [{"inicio": 2, "fim": 2, "conteudo": "b"}]
+
+
+def test_markdown_fence_before_the_json_is_ignored():
+    text = '```json\n{"alteracoes": [{"inicio": 3, "fim": 3, "conteudo": "c"}]}\n```'
+    assert feed_in_parts(text, 3) == [{"inicio": 3, "fim": 3, "conteudo": "c"}]
+
+
+def test_lists_under_other_keys_are_ignored():
+    text = '{"outros": [{"inicio": 1}], "alteracoes": []}'
+    assert feed_in_parts(text, 4) == []
+
+
+def test_malformed_item_is_skipped():
+    text = '{"alteracoes": [{"inicio": 1, "fim": }, {"inicio": 2, "fim": 2, "conteudo": "ok"}]}'
+    assert feed_in_parts(text, 5) == [{"inicio": 2, "fim": 2, "conteudo": "ok"}]
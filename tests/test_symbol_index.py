@@ -0,0 +1,51 @@
+import pytest
+
+import symbol_index
+from symbol_index import extract_diff_symbols, extract_doc_symbols, find_affected_docs
+
+
+@pytest.fixture(autouse=True)
+def isolated_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(symbol_index, "SYMBOL_CACHE_DIR", str(tmp_path / "symbol_index"))
+    monkeypatch.setattr(symbol_index, "index_cache", {})
+
+
+def write_docs(repo_path, docs):
+    for name, content in docs.items():
+        path = repo_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+    # Sem hash do blob, o índice lê os documentos da árvore de trabalho
+    return dict.fromkeys(docs, "")
+
+
+def test_extract_diff_symbols_weights_definitions():
+    diff = "@@ -1,2 +1,2 @@ class Loader:\n-def load_config(path):\n+def load_config(path, strict):\n+    run(\"--dry-run\")\n"
+    symbols = extract_diff_symbols(diff)
+    assert symbols["load_config"] == 3
+    assert symbols["Loader"] == 3
+    assert "--dry-run" in symbols
+
+
+def test_extract_doc_symbols_reads_code_spans_and_fences():
+    symbols = extract_doc_symbols("# Uso\n\nChame `load_config` antes.\n\n```\nloader.run()\n```\n")
+    assert {"load_config", "loader.run"} <= set(symbols)
+
+
+def test_docs_citing_changed_symbols_are_found(tmp_path):
+    files = write_docs(tmp_path, {"README.md": "# Uso\n\nChame `load_config` antes.\n", "docs/other.md": "# Outro\n"})
+    patches = {"src/config.py": "@@ -1 +1 @@\n-def load_config(path):\n+def load_config(path, strict):\n"}
+    assert find_affected_docs(str(tmp_path), patches, files) == [("README.md", ["src/config.py"])]
+    assert find_affected_docs(str(tmp_path), patches, files, exclude=["README.md"]) == []
+
+
+def test_index_is_skipped_without_changed_symbols(tmp_path, monkeypatch):
+    def fail(*args):
+        raise AssertionError("o índice de símbolos não deveria ser carregado")
+
+    monkeypatch.setattr(symbol_index, "get_symbol_index", fail)
+    patches = {
+        "docs/guide.md": "@@ -1 +1 @@\n-def old_name\n+def new_name\n",
+        "setup.cfg": "@@ -1 +1,2 @@\n [metadata]\n+# alteração sem documentação\n"
+    }
+    assert find_affected_docs(str(tmp_path), patches, {}) == []
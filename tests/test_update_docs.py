@@ -0,0 +1,96 @@
+import json
+import time
+from concurrent.futures import Future
+
+import interface_controller
+import request
+import UpdateDocs
+
+
+class FakeInterface:
+    def __init__(self, *args, **kwargs):
+        self.running = False
+
+    def start_server(self):
+        self.running = True
+
+    def stop_server(self):
+        self.running = False
+
+
+def done(changes):
+    future = Future()
+    future.set_result(json.dumps({"alteracoes": changes}))
+    return future
+
+
+def setup_revision(monkeypatch, tmp_path, decisions):
+    docs = []
+    for name in ("a.md", "b.md"):
+        path = tmp_path / name
+        path.write_text("# Título\n", encoding="utf-8")
+        docs.append(([name.replace(".md", ".py")], str(path), "# Título\n"))
+    saved = []
+    monkeypatch.setattr(UpdateDocs, "collect_doc_files", lambda repo_path, revision: ({}, docs))
+    monkeypatch.setattr(UpdateDocs, "prefetch_proposals", lambda executor, patches, valid_doc_files, item_ids, *args: [
+        done([{"inicio": 1, "fim": 1, "novo_conteudo": f"# {path}"}]) for _, path, _ in valid_doc_files
+    ])
+    monkeypatch.setattr(UpdateDocs, "save_last_documented", lambda repo_path, revision: saved.append(revision))
+    monkeypatch.setattr(request, "server_init", lambda: None)
+    monkeypatch.setattr(interface_controller, "ReactManager", FakeInterface)
+
+    def approve_changes(item_ids):
+        # Decide os primeiros itens e simula uma interrupção (Ctrl+C) antes dos demais
+        for item_id in item_ids[:decisions]:
+            request.review_queue.decide(item_id, True)
+        yield from request.review_queue.wait_decisions(item_ids[:decisions])
+
+    monkeypatch.setattr(request, "approve_changes", approve_changes)
+    return docs, saved
+
+
+def test_interrupted_review_is_not_recorded(monkeypatch, tmp_path):
+    docs, saved = setup_revision(monkeypatch, tmp_path, decisions=1)
+    assert UpdateDocs.process_revision(str(tmp_path), "abc") == UpdateDocs.EXIT_PARTIAL
+    assert saved == []
+    assert (tmp_path / "a.md").read_text(encoding="utf-8") == f"# {docs[0][1]}\n"
+
+
+def test_complete_review_is_recorded(monkeypatch, tmp_path):
+    _, saved = setup_revision(monkeypatch, tmp_path, decisions=2)
+    assert UpdateDocs.process_revision(str(tmp_path), "abc") == UpdateDocs.EXIT_OK
+    assert saved == ["abc"]
+
+
+def test_persistent_interface_stays_open_between_revisions(monkeypatch, tmp_path):
+    setup_revision(monkeypatch, tmp_path, decisions=2)
+    interface = FakeInterface()
+    finished = []
+    monkeypatch.setattr(request.review_queue, "finish", lambda: finished.append(True))
+    assert UpdateDocs.run(str(tmp_path), "abc", interface) == UpdateDocs.EXIT_OK
+    assert interface.running
+    assert finished == []
+
+
+def test_interrupted_review_discards_pending_proposals(monkeypatch, tmp_path):
+    import llm_chain
+
+    setup_revision(monkeypatch, tmp_path, decisions=0)
+    generated = []
+
+    def generate(path):
+        time.sleep(0.1)
+        generated.append(path)
+        return json.dumps({"alteracoes": []})
+
+    monkeypatch.setattr(UpdateDocs, "MAX_WORKERS", 1)
+    monkeypatch.setattr(UpdateDocs, "FIRST_PROPOSAL_TIMEOUT", 0.01)
+    monkeypatch.setattr(UpdateDocs, "prefetch_proposals", lambda executor, patches, valid_doc_files, item_ids, *args: [
+        executor.submit(generate, path) for _, path, _ in valid_doc_files
+    ])
+    cancelled = []
+    monkeypatch.setattr(llm_chain, "cancel_pending_requests", lambda: cancelled.append(True))
+    assert UpdateDocs.process_revision(str(tmp_path), "abc") == UpdateDocs.EXIT_PARTIAL
+    # Apenas a proposta já em execução termina; a que aguardava no pool não chega a ser gerada
+    assert generated == [str(tmp_path / "a.md")]
+    assert cancelled == [True]